@@ -0,0 +1,176 @@
+# agent.py
+import argparse
+import multiprocessing
+import random
+import time
+
+import logs
+import metrics
+import scenario
+from node import Node
+from game import stop_processes
+from it_node import ItNode
+from not_it_node import NotItNode
+
+# Import the messages.lcm
+from messages import game_init_t, join_request_t
+
+
+class JoinClient(Node):
+    '''
+    Asks the GameNode for node ids and the board configuration through JOIN_REQUEST / GAME_INIT
+    '''
+
+    def __init__(self, node_type, num_ids, game_id=None, timeout=10.0):
+        '''
+        Args:
+            node_type (int): 1 for ItNode, 2 for NotItNode
+            num_ids (int): Number of node ids wanted
+            game_id (str): Game to join (None for the global channels)
+            timeout (float): Seconds to wait for the GameNode to reply
+        '''
+        super().__init__(game_id=game_id)
+        self.log = logs.get_logger("JoinClient")
+        self.node_type = node_type
+        self.num_ids = num_ids
+        self.timeout = timeout
+        self.request_id = random.getrandbits(63)
+        self.game_init = None # game_init_t reply, once received
+
+    def on_start(self):
+        '''
+        Listen for the GameNode's reply
+        '''
+        self.subscribe(self.channel("GAME_INIT"), self.handle_game_init)
+
+    def run(self):
+        '''
+        Send the join request until the GameNode replies (it may not be up yet, or a datagram may be lost)
+        '''
+        request = join_request_t()
+        request.request_id = self.request_id
+        request.node_type = self.node_type
+        request.num_ids = self.num_ids
+
+        deadline = time.monotonic() + self.timeout
+        while self.game_init is None and self.running and time.monotonic() < deadline:
+            self.publish(self.channel("JOIN_REQUEST"), request)
+            time.sleep(0.5)
+
+        if self.game_init is None:
+            self.log.error("No reply from the GameNode after %ss", self.timeout)
+
+    def on_stop(self):
+        pass
+
+    def handle_game_init(self, channel, data):
+        '''
+        Handle the GameNode's reply to a join request
+
+        Args:
+            channel (str): LCM channel
+            data (bytes): LCM message data
+        '''
+        msg = game_init_t.decode(data)
+        if msg.request_id == self.request_id:
+            self.game_init = msg
+
+
+def main():
+    """
+    Join a running GameNode with an It agent and/or a group of NotIt agents, each in its own process.
+    """
+    parser = argparse.ArgumentParser(description='Join a Distributed Freeze Tag game from a separate process or host')
+    parser.add_argument('--it', action='store_true', help='Start the It agent')
+    parser.add_argument('--not-it', type=int, default=0, help='Number of NotIt agents to start')
+    parser.add_argument('--game-id', default=None, help='Game to join when the GameNode hosts several games')
+    parser.add_argument('--scenario', help='Scenario .npy file; each agent takes the row of its assigned node id')
+    parser.add_argument('--layout', choices=scenario.LAYOUTS,
+                        help='Built-in layout; every launcher generates the same layout from --seed and takes its own rows')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the start positions')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Seconds to wait for the GameNode to reply')
+    parser.add_argument('--it-horizon', type=int, default=0,
+                        help='Ticks the It intercept planner looks ahead (0 to chase the closest NotIt)')
+    parser.add_argument('--evasion', type=float, default=0.0,
+                        help='Share of NotIt moves that flee from the It instead of picking a random direction (0 to 1)')
+    parser.add_argument('--batch', action='store_true', help='Pack outbound messages into one datagram per channel per tick')
+    parser.add_argument('--metrics-interval', type=float, default=0.0,
+                        help='Seconds between two metrics pushes per agent to a running collector (0 to disable)')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Minimum log level; DEBUG includes per-move messages')
+    args = parser.parse_args()
+
+    if not args.it and args.not_it <= 0:
+        parser.error("Nothing to start: pass --it and/or --not-it N")
+    if args.scenario is not None and args.layout is not None:
+        parser.error("Give at most one of --scenario or --layout")
+
+    logs.configure(args.log_level)
+    logs.start()
+    if args.metrics_interval > 0:
+        metrics.configure(args.metrics_interval)
+    log = logs.get_logger("Agent")
+    rng = random.Random(args.seed)
+
+    # Ask the GameNode for ids and the board; each group of agents gets its own request
+    assignments = []
+    for node_type, num_ids in ((1, 1 if args.it else 0), (2, args.not_it)):
+        if num_ids == 0:
+            continue
+
+        client = JoinClient(node_type, num_ids, args.game_id, args.timeout)
+        client.launch_node()
+        if client.game_init is None:
+            return
+        if client.game_init.num_ids < num_ids:
+            log.warning("Asked for %d node id(s) but the game only had %d left", num_ids, client.game_init.num_ids)
+        assignments.append((node_type, client.game_init))
+
+    processes = []
+    try:
+        for node_type, game_init in assignments:
+            width, height = game_init.width, game_init.height
+
+            # Start positions: rows of a shared layout (NotIt id i is row i-1, the It is the last row) or random
+            layout = None
+            if args.scenario is not None:
+                layout = scenario.load_scenario(args.scenario)
+            elif args.layout is not None:
+                layout = scenario.generate(args.layout, game_init.num_not_it, width, height, args.seed or 0)
+
+            for node_id in range(game_init.first_node_id, game_init.first_node_id + game_init.num_ids):
+                if layout is None:
+                    x, y = rng.randrange(width), rng.randrange(height)
+                else:
+                    x, y = (int(v) for v in layout[-1 if node_type == 1 else node_id - 1])
+                    if not (0 <= x < width and 0 <= y < height):
+                        log.error("Position (%d, %d) of node %d is outside the %dx%d board", x, y, node_id, width, height)
+                        continue
+                if node_type == 1:
+                    node = ItNode(x, y, width, height, batch=args.batch, game_id=args.game_id, horizon=args.it_horizon)
+                    name = "ItNode"
+                else:
+                    node = NotItNode(node_id, x, y, width, height, batch=args.batch, game_id=args.game_id,
+                                     evasion=args.evasion)
+                    name = f"NotItNode_{node_id}"
+
+                process = multiprocessing.Process(target=node.launch_node, name=name)
+                process.start()
+                processes.append(process)
+
+        log.info("Started %d agent(s)", len(processes))
+
+        # Agents run until the game is over or they are interrupted
+        for process in processes:
+            process.join()
+
+    except KeyboardInterrupt:
+        log.info("Interrupted. Terminating all agents...")
+
+    finally:
+        stop_processes(processes, log)
+        logs.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+# agent_table.py
+import time
+from collections import namedtuple
+
+import numpy as np
+
+
+# Node ids per snapshot block. A snapshot only copies the blocks that changed since the previous one and shares
+# the others with it.
+BLOCK_SIZE = 256
+BLOCK_SHIFT = BLOCK_SIZE.bit_length() - 1
+
+# Read-only copy of one block of the table: one array per column, BLOCK_SIZE rows
+Block = namedtuple("Block", ["known", "xs", "ys", "is_it", "frozen"])
+
+
+def grow(array, size, fill=0):
+    '''
+    Copy of an array enlarged to at least size entries (doubling), with the new entries set to fill
+    '''
+    larger = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+    larger[:len(array)] = array
+    return larger
+
+
+def read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+class AgentSnapshot:
+    '''
+    Immutable view of the agent table handed to readers: the version and one read-only array per column
+    (node_ids, xs, ys, is_it, frozen, lost), one row per known agent in node id order.
+
+    The snapshot holds the table's blocks, most of them shared with the previous snapshot. The columns are
+    joined from the blocks the first time a reader asks for them, on the reader's thread.
+    '''
+
+    def __init__(self, version, blocks, lost):
+        '''
+        Args:
+            version (int): Table version
+            blocks (tuple): Block of every BLOCK_SIZE node ids
+            lost (frozenset): Node ids considered lost
+        '''
+        self.version = version
+        self.blocks = blocks
+        self.lost_ids = lost
+        self._columns = None
+
+    def columns(self):
+        '''
+        Join the blocks into one row per known agent (computed once)
+
+        Returns:
+            tuple: (node_ids, xs, ys, is_it, frozen, lost) read-only arrays
+        '''
+        if self._columns is None:
+            if self.blocks:
+                known = np.concatenate([block.known for block in self.blocks])
+                node_ids = np.flatnonzero(known).astype(np.int32)
+                columns = [np.concatenate([getattr(block, name) for block in self.blocks])[node_ids]
+                           for name in ("xs", "ys", "is_it", "frozen")]
+            else:
+                node_ids = np.zeros(0, dtype=np.int32)
+                columns = [np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int8),
+                           np.zeros(0, dtype=bool)]
+            lost = np.isin(node_ids, np.fromiter(self.lost_ids, dtype=np.int64, count=len(self.lost_ids)))
+            self._columns = tuple(read_only(column) for column in [node_ids, *columns, lost])
+        return self._columns
+
+    @property
+    def node_ids(self):
+        return self.columns()[0]
+
+    @property
+    def xs(self):
+        return self.columns()[1]
+
+    @property
+    def ys(self):
+        return self.columns()[2]
+
+    @property
+    def is_it(self):
+        return self.columns()[3]
+
+    @property
+    def frozen(self):
+        return self.columns()[4]
+
+    @property
+    def lost(self):
+        return self.columns()[5]
+
+
+class AgentTable:
+    '''
+    Agent state owned by the LCM handler thread and shared with other threads through snapshots.
+
+    The state is a struct of arrays indexed by node id (ids are small and dense: the It is 0 and the NotIt
+    agents count up from 1): x, y, is_it, frozen and whether the id has reported at all. A position update
+    writes its decoded fields in place, so the hot path allocates nothing, and bulk work such as snapshots,
+    checkpoints and counts is a handful of vectorized array operations. The arrays double when a larger id
+    shows up.
+
+    Only the handler thread mutates the table. At most once per interval, and only when something
+    changed, it builds an immutable AgentSnapshot and swaps it in with a single reference assignment.
+    Readers such as the checkpoint writer call snapshot() to get the latest one without taking a lock.
+    Snapshots are copy-on-write per block of BLOCK_SIZE node ids: writes flag their block, and a snapshot
+    copies the flagged blocks and reuses the rest of the previous snapshot, so publishing costs the
+    changes since the last snapshot rather than the whole table.
+    '''
+
+    def __init__(self, capacity=1024, snapshot_interval=0.05):
+        '''
+        Args:
+            capacity (int): Node ids to allocate room for up front
+            snapshot_interval (float): Minimum seconds between two published snapshots
+        '''
+        self.snapshot_interval = snapshot_interval
+        capacity = -(-capacity // BLOCK_SIZE) * BLOCK_SIZE # Whole blocks
+
+        # Writer-side state (handler thread only), indexed by node id
+        self.known = np.zeros(capacity, dtype=bool)    # The id has reported a position
+        self.xs = np.zeros(capacity, dtype=np.int32)
+        self.ys = np.zeros(capacity, dtype=np.int32)
+        self.is_it = np.zeros(capacity, dtype=np.int8)
+        self.frozen = np.zeros(capacity, dtype=bool)   # Frozen NotIt agents
+        self.count = 0 # Known agents
+        self.version = 0
+        self._dirty = False
+        self._changed = set() # Blocks written since the last snapshot
+        self._published_at = 0.0
+
+        # Latest published snapshot (read from any thread)
+        self._snapshot = AgentSnapshot(0, (), frozenset())
+
+    def reserve(self, size):
+        '''
+        Make room for node ids below size
+        '''
+        if size > len(self.known):
+            size = -(-size // BLOCK_SIZE) * BLOCK_SIZE # Whole blocks
+            self.known = grow(self.known, size)
+            self.xs = grow(self.xs, size)
+            self.ys = grow(self.ys, size)
+            self.is_it = grow(self.is_it, size)
+            self.frozen = grow(self.frozen, size)
+
+    def has(self, node_id):
+        '''
+        Check if an agent has reported a position
+        '''
+        return node_id < len(self.known) and bool(self.known[node_id])
+
+    def update(self, node_id, x, y, is_it):
+        '''
+        Store the latest position of an agent
+
+        Args:
+            node_id (int): Agent identifier (not negative)
+            x (int): x-coordinate
+            y (int): y-coordinate
+            is_it (int): 1 for the It agent, 0 for a NotIt agent
+        '''
+        if node_id >= len(self.known):
+            self.reserve(node_id + 1)
+        if not self.known[node_id]:
+            self.known[node_id] = True
+            self.count += 1
+        self.xs[node_id] = x
+        self.ys[node_id] = y
+        self.is_it[node_id] = is_it
+        self._changed.add(node_id >> BLOCK_SHIFT)
+        self._dirty = True
+
+    def load(self, node_ids, xs, ys, is_it):
+        '''
+        Store the positions of many agents at once (e.g. from a checkpoint)
+
+        Args:
+            node_ids (np.ndarray): Agent identifiers
+            xs (np.ndarray): x-coordinates
+            ys (np.ndarray): y-coordinates
+            is_it (np.ndarray): 1 for the It agent, 0 for NotIt agents
+        '''
+        if len(node_ids):
+            self.reserve(int(node_ids.max()) + 1)
+        self.known[node_ids] = True
+        self.xs[node_ids] = xs
+        self.ys[node_ids] = ys
+        self.is_it[node_ids] = is_it
+        self.count = int(np.count_nonzero(self.known))
+        self._changed.update(np.unique(np.asarray(node_ids) >> BLOCK_SHIFT).tolist())
+        self._dirty = True
+
+    def freeze(self, node_id):
+        '''
+        Mark a NotIt agent as frozen
+
+        Args:
+            node_id (int): Agent identifier
+        '''
+        if node_id >= len(self.frozen):
+            self.reserve(node_id + 1)
+        self.frozen[node_id] = True
+        self._changed.add(node_id >> BLOCK_SHIFT)
+        self._dirty = True
+
+    def unfreeze(self, node_id):
+        '''
+        Mark a frozen NotIt agent as free again (rescue rule)
+
+        Args:
+            node_id (int): Agent identifier
+        '''
+        self.frozen[node_id] = False
+        self._changed.add(node_id >> BLOCK_SHIFT)
+        self._dirty = True
+
+    def is_frozen(self, node_id):
+        '''
+        Check if a NotIt agent is frozen
+        '''
+        return node_id < len(self.frozen) and bool(self.frozen[node_id])
+
+    def touch(self):
+        '''
+        Flag a change that lives outside the table (e.g. the lost set) so the next publish picks it up
+        '''
+        self._dirty = True
+
+    def publish(self, lost=(), force=False, now=None):
+        '''
+        Build and swap in a new snapshot if the table changed and the interval has elapsed.
+        Must only be called from the handler thread.
+
+        Args:
+            lost (iterable): Node ids currently considered lost
+            force (bool): Publish even if the interval has not elapsed
+            now (float): Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            bool: True if a new snapshot was published
+        '''
+        if not self._dirty:
+            return False
+
+        if now is None:
+            now = time.monotonic()
+        if not force and now - self._published_at < self.snapshot_interval:
+            return False
+
+        # Copy the blocks written since the last snapshot (and the ones the table grew by); share the others
+        blocks = list(self._snapshot.blocks)
+        changed = self._changed
+        changed.update(range(len(blocks), len(self.known) >> BLOCK_SHIFT))
+        blocks.extend([None] * ((len(self.known) >> BLOCK_SHIFT) - len(blocks)))
+        for index in changed:
+            rows = slice(index << BLOCK_SHIFT, (index + 1) << BLOCK_SHIFT)
+            blocks[index] = Block(read_only(self.known[rows].copy()), read_only(self.xs[rows].copy()),
+                                  read_only(self.ys[rows].copy()), read_only(self.is_it[rows].copy()),
+                                  read_only(self.frozen[rows].copy()))
+        changed.clear()
+
+        self.version += 1
+        self._snapshot = AgentSnapshot(self.version, tuple(blocks), frozenset(lost))
+        self._dirty = False
+        self._published_at = now
+        return True
+
+    def snapshot(self):
+        '''
+        Get the latest published snapshot. Safe to call from any thread.
+
+        Returns:
+            AgentSnapshot: Immutable view of the agent table
+        '''
+        return self._snapshot
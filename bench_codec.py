@@ -0,0 +1,221 @@
+# bench_codec.py
+import argparse
+import random
+import time
+
+import numpy as np
+
+from node import BATCH_MAX_BYTES
+from game_session import POSITION_FIELDS
+from position_codec import PositionEncoder, PositionDecoder, SEQUENCE_MODULO
+from messages import position_t
+
+# LCM header of a small message: 8 bytes plus the channel name and its terminating zero
+LCM_HEADER_BYTES = 8 + len("POSITION") + 1
+
+
+def random_walks(num_agents, num_ticks, width, height, frozen_share, seed):
+    '''
+    Positions of agents that take one random step per tick; a frozen_share of them stand still
+
+    Returns:
+        numpy.ndarray: (num_ticks, num_agents, 2) array of (x, y)
+    '''
+    rng = np.random.default_rng(seed)
+    steps = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])
+    positions = np.empty((num_ticks, num_agents, 2), dtype=np.int64)
+    positions[0, :, 0] = rng.integers(0, width, num_agents)
+    positions[0, :, 1] = rng.integers(0, height, num_agents)
+    moving = rng.random(num_agents) >= frozen_share
+
+    upper = np.array([width - 1, height - 1])
+    for t in range(1, num_ticks):
+        step = steps[rng.integers(0, 4, num_agents)] * moving[:, None]
+        positions[t] = np.clip(positions[t - 1] + step, 0, upper)
+    return positions
+
+
+def updates_of(positions, t):
+    '''
+    (node_id, x, y, is_it) tuples of one tick: node 0 is the It, the others NotIt agents
+    '''
+    return [(node_id, x, y, int(node_id == 0)) for node_id, (x, y) in enumerate(positions[t].tolist())]
+
+
+def encode_tick(encoder, updates, per_tick):
+    '''
+    Packets of one tick: one per update (as agents send them), or as few as fit in a datagram each
+    '''
+    if per_tick:
+        return encoder.encode_packets(updates, BATCH_MAX_BYTES)
+    return [encoder.encode([update]) for update in updates]
+
+
+def check_round_trip(positions, width, height, keyframe_interval, per_tick, loss, seed):
+    '''
+    Encode every tick, drop a share of the packets and decode the rest. Every decoded position must be the
+    true one; lost packets only make a node wait for its next absolute record. (Random losses practically
+    never drop a multiple of 16 records of one node in a row; check_sequence_wrap covers that case.)
+
+    Returns:
+        tuple: (positions decoded, positions sent, steps skipped after a loss)
+    '''
+    rng = random.Random(seed)
+    encoder = PositionEncoder(width, height, keyframe_interval)
+    decoder = PositionDecoder(width, height)
+    decoded = sent = 0
+
+    for t in range(len(positions)):
+        updates = updates_of(positions, t)
+        packets = encode_tick(encoder, updates, per_tick)
+        truth = {node_id: (x, y, is_it) for node_id, x, y, is_it in updates}
+        sent += len(updates)
+
+        for packet in packets:
+            if rng.random() < loss:
+                continue
+            for node_id, x, y, is_it in decoder.decode(packet):
+                if truth[node_id] != (x, y, is_it):
+                    raise AssertionError(f"Tick {t}: node {node_id} decoded at {(x, y, is_it)}, sent {truth[node_id]}")
+                decoded += 1
+
+    return decoded, sent, decoder.skipped_count
+
+
+def check_sequence_wrap(keyframe_interval, width=1000):
+    '''
+    Drop runs of exactly 16 and 32 records of one node that moves one cell per record, starting at every
+    offset within a keyframe interval. The sequence numbers cannot tell such a run from no loss, so the node
+    may decode at a stale position afterwards, but only until its next absolute record.
+
+    Returns:
+        int: Most consecutive wrong positions of the node (at most keyframe_interval - 1)
+    '''
+    worst = 0
+    for run in (SEQUENCE_MODULO, 2 * SEQUENCE_MODULO):
+        for first_lost in range(1, keyframe_interval + 1):
+            encoder = PositionEncoder(width, 1, keyframe_interval)
+            decoder = PositionDecoder(width, 1)
+            wrong = 0
+            for record in range(first_lost + run + 2 * keyframe_interval):
+                packet = encoder.encode([(5, record, 0, 0)])
+                if first_lost <= record < first_lost + run:
+                    continue
+                for _, x, _, _ in decoder.decode(packet):
+                    wrong = wrong + 1 if x != record else 0
+                    if wrong >= keyframe_interval:
+                        raise AssertionError(f"{run} lost records from record {first_lost}: wrong for {wrong} records")
+                    worst = max(worst, wrong)
+            if wrong:
+                raise AssertionError(f"{run} lost records from record {first_lost}: still wrong at the end")
+    return worst
+
+
+def time_position_t(positions):
+    '''
+    Encode and decode every update as a position_t, and decode with the GameSession struct fast path
+
+    Returns:
+        tuple: (bytes, encode seconds, decode seconds, struct decode seconds)
+    '''
+    updates = [updates_of(positions, t) for t in range(len(positions))]
+
+    start = time.perf_counter()
+    encoded = []
+    pose = position_t()
+    for tick in updates:
+        for node_id, x, y, is_it in tick:
+            pose.node_id = node_id
+            pose.x = x
+            pose.y = y
+            pose.is_it = is_it
+            encoded.append(pose.encode())
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in encoded:
+        position_t.decode(data)
+    decode_time = time.perf_counter() - start
+
+    unpack_from = POSITION_FIELDS.unpack_from
+    start = time.perf_counter()
+    for data in encoded:
+        unpack_from(data, 8)
+    struct_time = time.perf_counter() - start
+
+    return sum(len(data) for data in encoded), encode_time, decode_time, struct_time
+
+
+def time_v2(positions, width, height, keyframe_interval, per_tick):
+    '''
+    Encode and decode every update in the version-2 format, one packet per update or datagram-sized packets per tick
+
+    Returns:
+        tuple: (bytes, packets, encode seconds, decode seconds)
+    '''
+    updates = [updates_of(positions, t) for t in range(len(positions))]
+    encoder = PositionEncoder(width, height, keyframe_interval)
+    decoder = PositionDecoder(width, height)
+
+    start = time.perf_counter()
+    packets = []
+    for tick in updates:
+        packets.extend(encode_tick(encoder, tick, per_tick))
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for packet in packets:
+        decoder.decode(packet)
+    decode_time = time.perf_counter() - start
+
+    return sum(len(packet) for packet in packets), len(packets), encode_time, decode_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and benchmark the version-2 position format against position_t')
+    parser.add_argument('--agents', type=int, default=1000, help='Agents sending one update per tick (node 0 is the It)')
+    parser.add_argument('--ticks', type=int, default=100, help='Ticks to simulate')
+    parser.add_argument('--width', type=int, default=1000, help='Width of the board')
+    parser.add_argument('--height', type=int, default=1000, help='Height of the board')
+    parser.add_argument('--frozen', type=float, default=0.5, help='Share of agents standing still (frozen)')
+    parser.add_argument('--keyframe-interval', type=int, default=8, help='Records per node between two absolute records')
+    parser.add_argument('--loss', type=float, default=0.05, help='Share of packets dropped in the lossy round trip')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the walks and the losses')
+    args = parser.parse_args()
+
+    positions = random_walks(args.agents, args.ticks, args.width, args.height, args.frozen, args.seed)
+    updates = args.agents * args.ticks
+
+    # Round trips: exact without losses, never wrong with random losses
+    for per_tick in (False, True):
+        for loss in (0.0, args.loss):
+            decoded, sent, skipped = check_round_trip(positions, args.width, args.height, args.keyframe_interval,
+                                                      per_tick, loss, args.seed)
+            if loss == 0.0 and decoded != sent:
+                raise AssertionError(f"Lossless round trip decoded {decoded} of {sent} updates")
+            label = "datagram-sized packets per tick" if per_tick else "one packet per update"
+            print(f"round trip, {label}, {loss:.0%} loss: {decoded}/{sent} updates decoded correctly, "
+                  f"{skipped} steps skipped after losses")
+    worst = check_sequence_wrap(args.keyframe_interval)
+    print(f"sequence wrap: after {SEQUENCE_MODULO} or {2 * SEQUENCE_MODULO} lost records in a row a node was wrong for "
+          f"at most {worst} records, until its next absolute record")
+
+    # Sizes and throughput
+    size, encode_time, decode_time, struct_time = time_position_t(positions)
+    print(f"\n{updates} updates of {args.agents} agents on a {args.width}x{args.height} board, "
+          f"{args.frozen:.0%} standing still, keyframe every {args.keyframe_interval} records")
+    print(f"{'position_t':>22}: {size / updates:5.2f} B/update payload, {size / updates + LCM_HEADER_BYTES:5.2f} B with "
+          f"the LCM header, encode {encode_time / updates * 1e6:.2f} us, decode {decode_time / updates * 1e6:.2f} us "
+          f"({struct_time / updates * 1e6:.2f} us with struct)")
+
+    for per_tick in (False, True):
+        size, packets, encode_time, decode_time = time_v2(positions, args.width, args.height, args.keyframe_interval,
+                                                          per_tick)
+        label = "v2, packets per tick" if per_tick else "v2, packet per update"
+        print(f"{label:>22}: {size / updates:5.2f} B/update payload, "
+              f"{(size + packets * LCM_HEADER_BYTES) / updates:5.2f} B with the LCM header, "
+              f"encode {encode_time / updates * 1e6:.2f} us, decode {decode_time / updates * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
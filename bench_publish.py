@@ -0,0 +1,83 @@
+# bench_publish.py
+import argparse
+import threading
+import time
+
+from node import Node
+from messages import position_t
+
+
+class BenchReceiver(Node):
+    '''
+    Counts position records arriving on POSITION, whether sent plainly or inside batches
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self.received = 0
+
+    def on_start(self):
+        self.subscribe("POSITION", self.handle_position)
+
+    def handle_position(self, channel, data):
+        self.received += 1
+
+
+def run_sender(lc, num_updates, per_tick, batch):
+    '''
+    Publish num_updates position updates, flushing after every tick of per_tick updates
+
+    Returns:
+        tuple: (datagrams sent, CPU seconds spent publishing)
+    '''
+    sender = Node(batch=batch)
+    sender.lc = lc
+
+    pose = position_t()
+    start = time.process_time()
+    for i in range(num_updates):
+        pose.node_id = i % per_tick + 1
+        pose.x = i
+        pose.y = i
+        sender.publish("POSITION", pose)
+
+        if (i + 1) % per_tick == 0:
+            sender.flush()
+            time.sleep(0.001) # Give the receiver a chance to keep up between ticks
+    sender.flush()
+    cpu = time.process_time() - start
+
+    return sender.datagram_count, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Node.publish with and without batching')
+    parser.add_argument('--updates', type=int, default=10000, help='Position updates per run')
+    parser.add_argument('--per-tick', type=int, default=100, help='Updates published between flushes')
+    parser.add_argument('--url', default='udpm://239.255.76.67:7667?ttl=0', help='LCM provider URL')
+    args = parser.parse_args()
+
+    import lcm
+
+    for batch in (False, True):
+        receiver = BenchReceiver()
+        receiver.lc = lcm.LCM(args.url)
+        receiver.running = True
+        receiver.on_start()
+        receive_thread = threading.Thread(target=receiver._handle_loop, daemon=True)
+        receive_thread.start()
+
+        datagrams, cpu = run_sender(lcm.LCM(args.url), args.updates, args.per_tick, batch)
+
+        time.sleep(0.5) # Let the receiver drain
+        receiver.running = False
+        receive_thread.join()
+
+        label = "batched" if batch else "unbatched"
+        print(f"{label:>9}: {datagrams} datagrams (sendmsg calls), "
+              f"{cpu * 1e3:.1f} ms sender CPU per {args.updates} updates, "
+              f"{receiver.received}/{args.updates} received")
+
+
+if __name__ == "__main__":
+    main()
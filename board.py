@@ -0,0 +1,142 @@
+# board.py
+import numpy as np
+
+# Cells per chunk side. A chunk is allocated when the first agent enters it and released when the last one leaves.
+CHUNK_SIZE = 16
+
+
+def neighbor_counts(width, height, x0, y0, x1, y1):
+    '''
+    Number of on-board neighbors of every cell in a window, computed from the window's coordinates alone
+
+    Args:
+        width (int): Width of the board
+        height (int): Height of the board
+        x0, y0 (int): Top left cell of the window (included)
+        x1, y1 (int): Bottom right corner of the window (excluded)
+
+    Returns:
+        numpy.ndarray: (y1 - y0, x1 - x0) float array, at least 1 so it can be divided by
+    '''
+    columns = np.arange(x0, x1)
+    rows = np.arange(y0, y1)
+    horizontal = 2.0 - (columns == 0) - (columns == width - 1)
+    vertical = 2.0 - (rows == 0) - (rows == height - 1)
+    return np.maximum(vertical[:, None] + horizontal[None, :], 1.0)
+
+
+def viewport(width, height, x, y, columns, rows):
+    '''
+    Window of at most columns x rows cells centered on (x, y), shifted to stay on the board
+
+    Returns:
+        tuple: (x0, y0, x1, y1) with x1 and y1 excluded
+    '''
+    columns, rows = min(columns, width), min(rows, height)
+    x0 = min(max(0, x - columns // 2), width - columns)
+    y0 = min(max(0, y - rows // 2), height - rows)
+    return x0, y0, x0 + columns, y0 + rows
+
+
+class ChunkedBoard:
+    '''
+    Agent counts per cell for boards of any size.
+
+    The board is cut into square chunks, and only chunks with agents on them exist: each one is a small
+    dense array, allocated when its first agent arrives and released when its last one leaves. Memory and
+    per-tick work follow the number of agents instead of the board area, so a 1,000,000 x 1,000,000 board
+    with a few thousand agents costs a few thousand chunks at most. Dense arrays are only built for the
+    windows that need them (e.g. around the It for the intercept planner).
+    '''
+
+    def __init__(self, width, height, chunk_size=CHUNK_SIZE):
+        '''
+        Args:
+            width (int): Width of the board
+            height (int): Height of the board
+            chunk_size (int): Cells per chunk side
+        '''
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.chunks = {}     # Map of (chunk x, chunk y) to a (chunk_size, chunk_size) count array
+        self.population = {} # Map of (chunk x, chunk y) to the agents on that chunk
+
+    def contains(self, x, y):
+        '''
+        Check if a cell is on the board
+        '''
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def add(self, x, y, amount=1):
+        '''
+        Add agents to a cell (a negative amount removes them), allocating or releasing its chunk as needed
+        '''
+        key = (x // self.chunk_size, y // self.chunk_size)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = np.zeros((self.chunk_size, self.chunk_size), dtype=np.int32)
+            self.population[key] = 0
+
+        chunk[y % self.chunk_size, x % self.chunk_size] += amount
+        population = self.population[key] + amount
+        if population > 0:
+            self.population[key] = population
+        else:
+            del self.chunks[key]
+            del self.population[key]
+
+    def remove(self, x, y, amount=1):
+        '''
+        Remove agents from a cell
+        '''
+        self.add(x, y, -amount)
+
+    def move(self, x0, y0, x1, y1):
+        '''
+        Move one agent from (x0, y0) to (x1, y1)
+        '''
+        if (x0, y0) != (x1, y1):
+            self.add(x1, y1)
+            self.remove(x0, y0)
+
+    def get(self, x, y):
+        '''
+        Agents on a cell
+        '''
+        chunk = self.chunks.get((x // self.chunk_size, y // self.chunk_size))
+        return 0 if chunk is None else int(chunk[y % self.chunk_size, x % self.chunk_size])
+
+    def window(self, x0, y0, x1, y1):
+        '''
+        Dense counts of a window, copied from the chunks that overlap it (missing chunks are empty)
+
+        Args:
+            x0, y0 (int): Top left cell of the window (included)
+            x1, y1 (int): Bottom right corner of the window (excluded)
+
+        Returns:
+            numpy.ndarray: (y1 - y0, x1 - x0) float array
+        '''
+        size = self.chunk_size
+        counts = np.zeros((y1 - y0, x1 - x0), dtype=np.float64)
+        if not self.chunks:
+            return counts
+
+        for cy in range(y0 // size, (y1 - 1) // size + 1):
+            for cx in range(x0 // size, (x1 - 1) // size + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None:
+                    continue
+                # Overlap of this chunk and the window, in board coordinates
+                left, right = max(x0, cx * size), min(x1, (cx + 1) * size)
+                top, bottom = max(y0, cy * size), min(y1, (cy + 1) * size)
+                counts[top - y0:bottom - y0, left - x0:right - x0] = \
+                    chunk[top - cy * size:bottom - cy * size, left - cx * size:right - cx * size]
+        return counts
+
+    def nbytes(self):
+        '''
+        Memory held by the chunk arrays
+        '''
+        return len(self.chunks) * self.chunk_size * self.chunk_size * 4
@@ -0,0 +1,132 @@
+# checkpoint.py
+import os
+import threading
+
+import numpy as np
+
+import logs
+
+# Array name prefix of the game on the global channels; hosted games use "game/<game id>", so no game id can
+# collide with it (not even "")
+GLOBAL_PREFIX = "global"
+GAME_PREFIX = "game/"
+
+
+class Checkpointer:
+    '''
+    Writes referee checkpoints from a background thread.
+
+    The LCM thread only hands over immutable captures of the session state (see GameSession.capture), which
+    is cheap. This thread turns the latest capture into NumPy arrays and writes them as one .npz file: first to
+    a temporary file that is synced to disk, then renamed over the checkpoint. A reader therefore always
+    sees a complete checkpoint, old or new. If a newer capture arrives before the previous one is written,
+    the older one is skipped.
+    '''
+
+    def __init__(self, path):
+        '''
+        Args:
+            path (str): Checkpoint file
+        '''
+        self.path = path
+        self.log = logs.get_logger("Checkpointer")
+        self.written_count = 0
+
+        self._pending = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._write_loop, name="Checkpointer", daemon=True)
+        self._thread.start()
+
+    def submit(self, captures):
+        '''
+        Queue a checkpoint without blocking. Safe to call from any thread.
+
+        Args:
+            captures (dict): Map of game id to GameSession.capture()
+        '''
+        with self._cond:
+            self._pending = captures
+            self._cond.notify()
+
+    def close(self):
+        '''
+        Write the last queued checkpoint and stop the writer thread
+        '''
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                captures, self._pending = self._pending, None
+                if captures is None:
+                    return
+
+            # Any failure only costs this checkpoint: the thread keeps serving the next captures
+            try:
+                save_checkpoint(self.path, captures)
+                self.written_count += 1
+            except OSError as e:
+                self.log.error("Could not write checkpoint %s: %s", self.path, e)
+            except Exception:
+                self.log.exception("Could not write checkpoint %s", self.path)
+
+
+def save_checkpoint(path, captures):
+    '''
+    Atomically write session captures to a checkpoint file
+
+    Args:
+        path (str): Checkpoint file
+        captures (dict): Map of game id to GameSession.capture()
+    '''
+    arrays = {}
+    for game_id, capture in captures.items():
+        prefix = GLOBAL_PREFIX if game_id is None else GAME_PREFIX + game_id
+        snapshot = capture["snapshot"]
+        arrays[f"{prefix}:agents"] = np.column_stack([snapshot.node_ids, snapshot.xs, snapshot.ys,
+                                                      snapshot.is_it]).astype(np.int32)
+        arrays[f"{prefix}:frozen"] = snapshot.node_ids[snapshot.frozen]
+        arrays[f"{prefix}:lost"] = snapshot.node_ids[snapshot.lost]
+        arrays[f"{prefix}:roster"] = np.array(sorted(capture["roster"]), dtype=np.int32).reshape(-1, 2)
+        arrays[f"{prefix}:joins"] = np.array([(request_id, first, count)
+                                              for request_id, (first, count) in capture["joins"].items()],
+                                             dtype=np.int64).reshape(-1, 3)
+        arrays[f"{prefix}:flags"] = np.array([capture["game_active"], capture["finished"], capture["it_assigned"],
+                                              capture["next_node_id"]], dtype=np.int64)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path):
+    '''
+    Read a checkpoint file
+
+    Args:
+        path (str): Checkpoint file
+
+    Returns:
+        dict: Map of game id to a dict of arrays (agents, frozen, lost, roster, joins, flags)
+    '''
+    sessions = {}
+    with np.load(path) as data:
+        for key in data.files:
+            prefix, _, name = key.rpartition(":")
+            if prefix == GLOBAL_PREFIX:
+                game_id = None
+            elif prefix.startswith(GAME_PREFIX):
+                game_id = prefix[len(GAME_PREFIX):]
+            else:
+                game_id = prefix or None # Checkpoints written before the prefixes
+            sessions.setdefault(game_id, {})[name] = data[key]
+    return sessions
@@ -0,0 +1,149 @@
+# collector.py
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import logs
+from node import Node
+from metrics import METRICS_CHANNEL
+
+# Import the messages.lcm
+from messages import metrics_t
+
+
+class MetricsCollector(Node):
+    '''
+    Collects the metrics the nodes push on the METRICS channel and serves them in the Prometheus text
+    format on a loopback HTTP port.
+
+    The LCM thread only swaps in the latest message per node; a scrape renders whatever is there, so
+    scraping never slows the handling loop. Nodes that have not reported for a while are left out.
+    '''
+
+    def __init__(self, port=9100, host="127.0.0.1", stale_after=30.0):
+        '''
+        Args:
+            port (int): HTTP port for /metrics
+            host (str): Address to bind (loopback by default)
+            stale_after (float): Seconds without a report before a node is left out of scrapes
+        '''
+        super().__init__()
+        self.log = logs.get_logger("MetricsCollector")
+        self.port = port
+        self.host = host
+        self.stale_after = stale_after
+        self.reports = {}      # Map of node name to (monotonic receive time, metrics_t)
+        self.report_count = 0
+        self.server = None
+
+    def on_start(self):
+        self.subscribe(METRICS_CHANNEL, self.handle_metrics)
+
+        collector = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = collector.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Scrapes are not worth a log line
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.log.info("Serving metrics on http://%s:%d/metrics", self.host, self.server.server_port)
+
+    def run(self):
+        while self.running:
+            time.sleep(0.5)
+
+    def on_stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def handle_metrics(self, channel, data):
+        '''
+        Keep the latest report of a node
+
+        Args:
+            channel (str): LCM channel
+            data (bytes): LCM message data
+        '''
+        msg = metrics_t.decode(data)
+        self.reports[msg.node] = (time.monotonic(), msg)
+        self.report_count += 1
+
+    def render(self):
+        '''
+        Prometheus text format of the latest reports, with a node label on every series
+        '''
+        now = time.monotonic()
+        # The LCM thread adds nodes while we render on the HTTP thread: copy the items in one step first
+        reports = list(self.reports.items())
+        families = {} # Map of metric family to its lines, in first-seen order
+        for node, (received_at, msg) in sorted(reports):
+            if now - received_at > self.stale_after:
+                continue
+            node_label = 'node="%s",pid="%d"' % (node.replace('"', "'"), msg.pid)
+            for name, value in zip(msg.names, msg.values):
+                base, brace, labels = name.partition("{")
+                labeled = f"{base}{{{node_label},{labels}" if brace else f"{base}{{{node_label}}}"
+                families.setdefault(family_of(base), []).append(f"{labeled} {value!r}")
+
+        live = sum(1 for _, (received_at, _) in reports if now - received_at <= self.stale_after)
+        families["freezetag_collector_nodes"] = [f"freezetag_collector_nodes {live}"]
+        families["freezetag_collector_reports_total"] = [f"freezetag_collector_reports_total {self.report_count}"]
+
+        lines = []
+        for family, samples in families.items():
+            lines.append(f"# TYPE {family} {type_of(family)}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def family_of(name):
+    '''
+    Metric family of a series name: histogram series share the name without _bucket, _sum or _count
+    '''
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and name[:-len(suffix)].endswith("_seconds"):
+            return name[:-len(suffix)]
+    return name
+
+
+def type_of(family):
+    '''
+    Prometheus type of a family, from the naming convention: *_seconds are histograms, *_total counters
+    '''
+    if family.endswith("_seconds"):
+        return "histogram"
+    if family.endswith("_total"):
+        return "counter"
+    return "gauge"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the metrics of Distributed Freeze Tag nodes to Prometheus')
+    parser.add_argument('--port', type=int, default=9100, help='Loopback HTTP port for /metrics')
+    parser.add_argument('--stale-after', type=float, default=30.0,
+                        help='Seconds without a report before a node is left out of scrapes')
+    args = parser.parse_args()
+
+    collector = MetricsCollector(args.port, stale_after=args.stale_after)
+    try:
+        collector.launch_node()
+    except KeyboardInterrupt:
+        collector.stop()
+        logs.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# frozen_set.py
+import random
+
+import numpy as np
+
+# Import the messages.lcm
+from messages import frozen_set_t
+
+
+class FrozenSetPublisher:
+    '''
+    Referee side of the FROZEN_SET channel.
+
+    Freezes and rescues are collected per node id (the last change of a tick wins) and sent as one versioned
+    delta per tick with changes. Every keyframe interval the whole set goes out as a bitmap, one bit per node
+    id, so a consumer that joined late, missed a delta or follows a restarted referee catches up.
+    '''
+
+    def __init__(self):
+        self.epoch = random.getrandbits(63) # Tells consumers that a restarted referee's versions start over
+        self.version = 0
+        self.pending = {} # Map of node id to True (frozen) or False (rescued) since the last delta
+
+    def freeze(self, node_id):
+        self.pending[node_id] = True
+
+    def unfreeze(self, node_id):
+        self.pending[node_id] = False
+
+    def delta(self):
+        '''
+        Build the delta for the changes since the last one
+
+        Returns:
+            frozen_set_t: The delta, or None if nothing changed
+        '''
+        if not self.pending:
+            return None
+
+        self.version += 1
+        msg = self._message(keyframe=False)
+        msg.frozen = [node_id for node_id, frozen in self.pending.items() if frozen]
+        msg.num_frozen = len(msg.frozen)
+        msg.unfrozen = [node_id for node_id, frozen in self.pending.items() if not frozen]
+        msg.num_unfrozen = len(msg.unfrozen)
+        self.pending = {}
+        return msg
+
+    def keyframe(self, frozen):
+        '''
+        Build a keyframe. Pending changes must have been sent as a delta first.
+
+        Args:
+            frozen (np.ndarray): Frozen flag per node id
+
+        Returns:
+            frozen_set_t: The whole set at the current version
+        '''
+        msg = self._message(keyframe=True)
+        ids = np.flatnonzero(frozen)
+        bits = np.zeros(ids[-1] + 1 if len(ids) else 0, dtype=bool)
+        bits[ids] = True
+        msg.bitmap = np.packbits(bits, bitorder="little").tobytes()
+        msg.num_bytes = len(msg.bitmap)
+        return msg
+
+    def _message(self, keyframe):
+        msg = frozen_set_t()
+        msg.epoch = self.epoch
+        msg.version = self.version
+        msg.keyframe = int(keyframe)
+        return msg
+
+
+class FrozenSetFollower:
+    '''
+    Consumer side of the FROZEN_SET channel: keeps a copy of the referee's frozen set.
+
+    A delta that follows the local version is applied in O(changes). Deltas from another epoch or after a
+    gap are ignored until the next keyframe, which replaces the whole set.
+    '''
+
+    def __init__(self, frozen=None):
+        '''
+        Args:
+            frozen (set): Set to keep up to date (a new one by default); ids already in it are reconciled by the first keyframe
+        '''
+        self.frozen = frozen if frozen is not None else set()
+        self.epoch = None
+        self.version = None # None until the first keyframe
+        self.skipped_count = 0 # Deltas ignored while out of sync
+
+    def apply(self, msg):
+        '''
+        Apply a frozen_set_t message
+
+        Args:
+            msg (frozen_set_t): Delta or keyframe
+
+        Returns:
+            tuple: (ids frozen, ids rescued) by this message, relative to the local set
+        '''
+        if msg.keyframe:
+            if msg.epoch == self.epoch and self.version is not None and msg.version < self.version:
+                return [], [] # Older than the deltas already applied
+
+            bits = np.unpackbits(np.frombuffer(msg.bitmap, dtype=np.uint8), bitorder="little")
+            current = set(np.flatnonzero(bits).tolist())
+            frozen = sorted(current - self.frozen)
+            unfrozen = sorted(self.frozen - current)
+            self.frozen.clear()
+            self.frozen.update(current)
+            self.epoch, self.version = msg.epoch, msg.version
+            return frozen, unfrozen
+
+        in_sync = self.version is not None and msg.epoch == self.epoch
+        if not in_sync or msg.version != self.version + 1:
+            if not in_sync or msg.version > self.version:
+                self.skipped_count += 1 # Out of sync: wait for the next keyframe
+            return [], []
+
+        self.version = msg.version
+        frozen = [node_id for node_id in msg.frozen if node_id not in self.frozen]
+        unfrozen = [node_id for node_id in msg.unfrozen if node_id in self.frozen]
+        self.frozen.update(frozen)
+        self.frozen.difference_update(unfrozen)
+        return frozen, unfrozen
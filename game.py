@@ -1,11 +1,20 @@
 # game.py
 import multiprocessing
+from multiprocessing.connection import wait
 import argparse
 import time
 import lcm
 import sys 
+import numpy as np
 
+import logs
+import metrics
+import scenario
+from collector import MetricsCollector
 from game_node import GameNode
+from game_session import AGENT_FROZEN
+from supervisor import Supervisor, parse_cores
+from term_viewer import TerminalViewer
 from it_node import ItNode
 from not_it_node import NotItNode
 
@@ -15,8 +24,56 @@ def parse_arguments():
     parser.add_argument('--width', type=int, required=True, help='Width of the game board')
     parser.add_argument('--height', type=int, required=True, help='Height of the game board')
     parser.add_argument('--num-not-it', type=int, required=True, help='Number of NotIt agents')
-    parser.add_argument('--positions', type=int, nargs='+', required=True, 
+    parser.add_argument('--positions', type=int, nargs='+',
                         help='Positions for all agents: [not_it_1_x not_it_1_y ... not_it_n_x not_it_n_y it_x it_y]')
+    parser.add_argument('--scenario',
+                        help='Scenario .npy file with the positions of all agents (NotIt rows first, It last)')
+    parser.add_argument('--layout', choices=scenario.LAYOUTS,
+                        help='Generate the start positions with a built-in layout instead')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for --layout')
+    parser.add_argument('--referee-only', action='store_true',
+                        help='Only start the GameNode; agents join from separate agent.py processes')
+    parser.add_argument('--agent-timeout', type=float, default=5.0,
+                        help='Seconds without an update before the GameNode marks an agent as lost')
+    parser.add_argument('--coalesce', action='store_true',
+                        help='Only process the newest queued position per agent in the GameNode and ItNode')
+    parser.add_argument('--it-horizon', type=int, default=0,
+                        help='Ticks the It intercept planner looks ahead (0 to chase the closest NotIt)')
+    parser.add_argument('--evasion', type=float, default=0.0,
+                        help='Share of NotIt moves that flee from the It instead of picking a random direction (0 to 1)')
+    parser.add_argument('--rescue', action='store_true',
+                        help='Free NotIt agents unfreeze frozen teammates on or next to their cell')
+    parser.add_argument('--batch', action='store_true',
+                        help='Pack outbound messages into one datagram per channel per tick')
+    parser.add_argument('--num-games', type=int, default=1,
+                        help='Number of concurrent games refereed by one GameNode, each with its own agents and namespaced channels')
+    parser.add_argument('--viewer', default='pygame', choices=['pygame', 'terminal', 'none'],
+                        help='Viewer process to start for the first game: a PyGame window, an ANSI terminal view, or none')
+    parser.add_argument('--view-rate', type=float,
+                        help='Max SNAPSHOT messages per second per game (default: 10, or 0 with --viewer none and no --supervise); '
+                             'set it to attach viewers from another terminal')
+    parser.add_argument('--checkpoint',
+                        help='GameNode checkpoint file; resumed on start if it exists, so a restarted referee continues the game')
+    parser.add_argument('--checkpoint-interval', type=float, default=1.0, help='Seconds between two checkpoints')
+    parser.add_argument('--supervise', action='store_true',
+                        help='Pin processes to cores, restart crashed ones and report their CPU and RSS')
+    parser.add_argument('--referee-cores', type=parse_cores,
+                        help='With --supervise: cores for the GameNode, e.g. 0 or 0-1 (agents then get the other cores)')
+    parser.add_argument('--agent-cores', type=parse_cores, help='With --supervise: cores for agents and the viewer')
+    parser.add_argument('--agent-nice', type=int, default=0,
+                        help='With --supervise: niceness added to agent and viewer processes')
+    parser.add_argument('--restart-budget', type=int, default=5,
+                        help='With --supervise: max crashed processes restarted over the run')
+    parser.add_argument('--stats-interval', type=float, default=10.0,
+                        help='With --supervise: seconds between two CPU/RSS reports (0 to disable)')
+    parser.add_argument('--metrics-port', type=int,
+                        help='Start a metrics collector serving Prometheus text on this loopback port; nodes push to it')
+    parser.add_argument('--metrics-interval', type=float, default=5.0,
+                        help='Seconds between two metrics pushes per node (with --metrics-port)')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Minimum log level; DEBUG includes per-move messages')
+    parser.add_argument('--log-rate', type=float, default=100.0,
+                        help='Max log records per second per node below WARNING (0 for unlimited)')
     
     args = parser.parse_args()
 
@@ -27,30 +84,125 @@ def parse_arguments():
     # Validate number of NotIt agents
     if args.num_not_it <= 0:
         parser.error(f"Number of NotIt agents must be positive (got {args.num_not_it})")
+
+    # Validate number of games
+    if args.num_games <= 0:
+        parser.error(f"Number of games must be positive (got {args.num_games})")
+
+    # Validate the planner horizon
+    if args.it_horizon < 0:
+        parser.error(f"It horizon must not be negative (got {args.it_horizon})")
+
+    # Validate the evasion share
+    if not 0.0 <= args.evasion <= 1.0:
+        parser.error(f"Evasion must be between 0 and 1 (got {args.evasion})")
+
+    # Validate the checkpoint interval
+    if args.checkpoint_interval <= 0:
+        parser.error(f"Checkpoint interval must be positive (got {args.checkpoint_interval})")
+
+    # Validate the supervisor settings
+    if args.restart_budget < 0:
+        parser.error(f"Restart budget must not be negative (got {args.restart_budget})")
+    if args.stats_interval < 0:
+        parser.error(f"Stats interval must not be negative (got {args.stats_interval})")
+
+    # Validate the metrics settings
+    if args.metrics_interval <= 0:
+        parser.error(f"Metrics interval must be positive (got {args.metrics_interval})")
+
+    # Validate the liveness timeout
+    if args.agent_timeout <= 0:
+        parser.error(f"Agent timeout must be positive (got {args.agent_timeout})")
     
-    # Validate number of positions matches the number of agents
-    expected_positions = 2 * (args.num_not_it + 1)  # NotIt agents + It agent, each with x and y
-    if len(args.positions) != expected_positions:
-        parser.error(f"Expected {expected_positions} position values but got {len(args.positions)}")
-
-    # Validate all positions are within board boundaries
-    for i in range(args.num_not_it + 1):  # Check all agents (NotIt + It)
-        if i < args.num_not_it:
-            # NotIt agent positions
-            x, y = args.positions[2*i], args.positions[2*i + 1]
-            agent_type = f"NotIt agent {i+1}"
-        else:
-            # It agent position (last pair in the positions list)
-            x, y = args.positions[-2], args.positions[-1]
-            agent_type = "It agent"
+    # Agents started elsewhere pick their own positions
+    if args.referee_only:
+        return args
+
+    # Start positions come from exactly one source
+    if sum(source is not None for source in (args.positions, args.scenario, args.layout)) != 1:
+        parser.error("Give exactly one of --positions, --scenario or --layout unless --referee-only is given")
+
+    if args.positions is not None:
+        # Validate number of positions matches the number of agents
+        expected_positions = 2 * (args.num_not_it + 1)  # NotIt agents + It agent, each with x and y
+        if len(args.positions) != expected_positions:
+            parser.error(f"Expected {expected_positions} position values but got {len(args.positions)}")
+        positions = np.array(args.positions, dtype=np.int64).reshape(-1, 2)
+
+    elif args.scenario is not None:
+        try:
+            positions = scenario.load_scenario(args.scenario)
+        except (OSError, ValueError) as e:
+            parser.error(f"Could not load scenario: {e}")
+        if len(positions) != args.num_not_it + 1:
+            parser.error(f"Scenario has {len(positions) - 1} NotIt agents but --num-not-it is {args.num_not_it}")
+
+    else:
+        positions = scenario.generate(args.layout, args.num_not_it, args.width, args.height, args.seed)
+
+    # Validate all positions are within board boundaries (one vectorized check over the whole layout)
+    outside = scenario.out_of_bounds(positions, args.width, args.height)
+    if outside.size:
+        i = outside[0]
+        x, y = positions[i]
+        agent_type = "It agent" if i == args.num_not_it else f"NotIt agent {i+1}"
+        others = f" (and {outside.size - 1} more agents)" if outside.size > 1 else ""
         
         if x < 0 or x >= args.width:
-            parser.error(f"{agent_type} x-coordinate ({x}) is outside board boundaries [0, {args.width-1}]")
-        if y < 0 or y >= args.height:
-            parser.error(f"{agent_type} y-coordinate ({y}) is outside board boundaries [0, {args.height-1}]")
-    
+            parser.error(f"{agent_type} x-coordinate ({x}) is outside board boundaries [0, {args.width-1}]{others}")
+        parser.error(f"{agent_type} y-coordinate ({y}) is outside board boundaries [0, {args.height-1}]{others}")
+
+    args.start_positions = positions
     return args
 
+def wait_processes(processes, deadline):
+    """
+    Wait until every process has exited or the deadline (monotonic time) has passed, whichever comes first.
+    """
+    pending = {process.sentinel: process for process in processes if process.is_alive()}
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        for sentinel in wait(list(pending), remaining):
+            pending.pop(sentinel).join()
+
+def stop_processes(processes, log, services=(), timeout=1.0):
+    """
+    Stop every process with one deadline per step instead of one per process: agents exit on their own
+    once they acknowledged game over, so wait for all of them at once, then terminate the stragglers and
+    services (viewers, the metrics collector) in bulk and kill whatever is still running after that.
+
+    Args:
+        processes (list): Processes to stop
+        log (logging.Logger): Logger for the teardown report
+        services (iterable): Names of processes that do not exit on game over; they are terminated without waiting
+        timeout (float): Seconds to wait for processes to exit on their own, and again after terminating them
+    """
+    start = time.monotonic()
+    services = set(services)
+    alive = [process for process in processes if process.is_alive()]
+
+    # Agents that got game over are already on their way out
+    wait_processes([process for process in alive if process.name not in services], start + timeout)
+
+    # Terminate everything that is left at once, then kill what ignores it
+    terminated = [process for process in alive if process.is_alive()]
+    for process in terminated:
+        process.terminate()
+    wait_processes(terminated, time.monotonic() + timeout)
+
+    killed = [process for process in terminated if process.is_alive()]
+    for process in killed:
+        log.warning("Process %s did not terminate. Killing it.", process.name)
+        process.kill()
+    for process in killed:
+        process.join()
+
+    log.info("All %d processes stopped in %.0f ms (%d terminated, %d killed).", len(processes),
+             1000 * (time.monotonic() - start), len(terminated) - len(killed), len(killed))
+
 def main():
     """
     Main function to parse arguments and launch the required nodes.
@@ -63,60 +215,113 @@ def main():
     
     args = parse_arguments()
 
-    # Extract positions 
-    not_it_positions = []
-    for i in range(args.num_not_it):
-        # Append the (x,y) pairs for NotIt agents
-        not_it_positions.append((args.positions[2*i], args.positions[2*i + 1]))
+    # Nodes inherit these settings and start their own log writer thread
+    logs.configure(args.log_level, args.log_rate or None)
+    logs.start()
+    log = logs.get_logger("Game")
+    if args.metrics_port is not None:
+        metrics.configure(args.metrics_interval)
 
-    # Set the (x,y) pair for the It agent
-    it_position = (args.positions[-2], args.positions[-1])
+    # Extract positions: NotIt rows first, It last. Each agent only receives its own (x, y)
+    positions = None if args.referee_only else args.start_positions
 
     # Create processes list to tack
     processes = []
+    services = [] # Names of the processes that do not exit on game over
+    supervisor = None
 
     try:
+        # A single game uses the global channels; several games are namespaced by game id
+        game_ids = [str(g) for g in range(args.num_games)] if args.num_games > 1 else [None]
+
+        # Every node is built by a factory, so the supervisor can build it again from the last known agents
+        # of its game ({node_id: (x, y, flags)}, empty on the first start)
+        # Snapshots only go out when something reads them: a viewer, or the supervisor restarting crashed agents
+        view_rate = args.view_rate
+        if view_rate is None:
+            view_rate = 10.0 if args.viewer != 'none' or args.supervise else 0.0
+
+        def make_game_node(agents):
+            return GameNode(args.width, args.height, args.num_not_it, args.agent_timeout, args.coalesce, args.batch,
+                            game_ids if args.num_games > 1 else None,
+                            checkpoint=args.checkpoint, checkpoint_interval=args.checkpoint_interval,
+                            view_rate=view_rate, rescue=args.rescue)
+
+        def make_viewer(agents):
+            if args.viewer == 'pygame':
+                from viewer import Viewer # Only needed (with pygame) when a window is wanted
+                return Viewer(game_ids[0])
+            return TerminalViewer(game_ids[0])
+
+        def make_it_node(game_id):
+            def factory(agents):
+                x, y, _ = agents.get(0, (*(int(v) for v in positions[-1]), 0))
+                node = ItNode(x, y, args.width, args.height, args.coalesce, args.batch, game_id, args.it_horizon)
+                for node_id, (_, _, flags) in agents.items():
+                    if flags & AGENT_FROZEN:
+                        node.mark_frozen(node_id)
+                return node
+            return factory
+
+        def make_not_it_node(game_id, i):
+            def factory(agents):
+                x, y, flags = agents.get(i + 1, (*(int(v) for v in positions[i]), 0))
+                node = NotItNode(i+1, x, y, args.width, args.height, args.batch, game_id, args.evasion)
+                node.frozen = bool(flags & AGENT_FROZEN)
+                return node
+            return factory
+
+        if args.supervise:
+            # Pinned, restarted on crashes and sampled for CPU and RSS; runs in this process
+            supervisor = Supervisor(game_ids, args.restart_budget, args.stats_interval, args.referee_cores,
+                                    args.agent_cores, args.agent_nice)
+            def start(name, factory, role="agent", game_id=None):
+                # Without a checkpoint a restarted referee would wait for a sync round that never comes
+                supervisor.add(name, factory, role, game_id, restart=role != "referee" or args.checkpoint is not None)
+        else:
+            def start(name, factory, role="agent", game_id=None):
+                process = multiprocessing.Process(target=factory({}).launch_node, name=name)
+                process.start()
+                processes.append(process)
+
         # Start the game node first 
-        game_node = GameNode(args.width, args.height, args.num_not_it)
-        game_process = multiprocessing.Process(target=game_node.launch_node, name="GameNode")
-        game_process.start()
-        processes.append(game_process)
+        start("GameNode", make_game_node, role="referee")
+
+        # Start the metrics collector before the agents that push to it
+        if args.metrics_port is not None:
+            start("MetricsCollector", lambda agents: MetricsCollector(args.metrics_port))
+            services.append("MetricsCollector")
+
+        # Start the viewer in its own process; it follows the first game through SNAPSHOT messages
+        if args.viewer != 'none':
+            start("Viewer", make_viewer, game_id=game_ids[0])
+            services.append("Viewer")
 
         # Allow the game node to initialize
         time.sleep(0.5)
 
-        # Start the It node
-        it_node = ItNode(it_position[0], it_position[1], args.width, args.height)
-        it_process = multiprocessing.Process(target=it_node.launch_node, name="ItNode")
-        it_process.start()
-        processes.append(it_process)
+        for game_id in (game_ids if not args.referee_only else []):
+            suffix = "" if game_id is None else f"_{game_id}"
+
+            # Start the It node
+            start(f"ItNode{suffix}", make_it_node(game_id), game_id=game_id)
 
-        # Start the NotIt nodes
-        for i in range(args.num_not_it):
-            not_it_node = NotItNode(i+1, not_it_positions[i][0], not_it_positions[i][1], args.width, args.height)
-            not_it_process = multiprocessing.Process(target=not_it_node.launch_node, name=f"NotItNode_{i+1}")
-            not_it_process.start()
-            processes.append(not_it_process)
+            # Start the NotIt nodes
+            for i in range(args.num_not_it):
+                start(f"NotItNode{suffix}_{i+1}", make_not_it_node(game_id, i), game_id=game_id)
 
         # Wait for the game node to finish (it will, once the game is over)
-        game_process.join()
+        if supervisor is not None:
+            supervisor.launch_node()
+        else:
+            processes[0].join()
 
     except KeyboardInterrupt:
-        print("Game interrupted. Terminating all nodes...")
+        log.info("Game interrupted. Terminating all nodes...")
 
     finally:
-        # Clean up all processes
-        for process in processes:
-            if process.is_alive():
-                process.terminate()
-                process.join(timeout=1.0)
-
-                # Force kill the process if it doesn't terminate
-                if process.is_alive():
-                    print(f"Process {process.name} did not terminate. Killing it.")
-                    process.kill()
-        
-        print("All processes terminated.")
+        stop_processes(supervisor.processes() if supervisor is not None else processes, log, services)
+        logs.shutdown()
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,18 @@
 # game_node.py
+import os
 import time
-import threading
+import zipfile
 # import lcm
-import pygame
-from node import Node
-
-# Import the messages.lcm
-from messages import position_t, freeze_t, sync_request_t, sync_confirm_t, game_init_t, gameover_t
+import logs
+from node import Node, position_key, channel_game_id
+from game_session import GameSession
+from checkpoint import Checkpointer, load_checkpoint
 
 class GameNode(Node):
 
-    def __init__(self, width, height, num_not_it):
+    def __init__(self, width, height, num_not_it, agent_timeout=5.0, coalesce=False, batch=False, game_ids=None, quantum=64,
+                 checkpoint=None, checkpoint_interval=1.0, view_rate=10.0, rescue=False,
+                 shutdown_timeout=1.0):
         '''
         Initialize the GameNode with board dimensions and NotIt agents
 
@@ -18,64 +20,102 @@ class GameNode(Node):
             width (int): Width of the board
             height (int): Height of the board
             num_not_it (list): List of NotIt agents
+            agent_timeout (float): Seconds without a message before an agent is marked lost
+            coalesce (bool): Only process the newest queued position per agent
+            batch (bool): Pack outbound messages into one datagram per channel per tick
+            game_ids (list): Host one session per game id on namespaced channels (None for a single game on the global channels)
+            quantum (int): Max queued positions one session processes before the next session gets a turn
+            checkpoint (str): Checkpoint file to resume from if it exists and to write periodically (None to disable)
+            checkpoint_interval (float): Seconds between two checkpoints
+            view_rate (float): Max SNAPSHOT messages per second per game for viewer processes (0 to disable)
+            rescue (bool): Free NotIt agents unfreeze frozen teammates they touch
+            shutdown_timeout (float): Max seconds to wait for the agents to acknowledge game over
         '''
-        super().__init__()
+        super().__init__(coalesce=coalesce, batch=batch)
+        self.log = logs.get_logger("GameNode")
         self.width = width
         self.height = height
         self.num_not_it = num_not_it
+        self.agent_timeout = agent_timeout
+        self.quantum = quantum
+        self.rescue = rescue
+        self.shutdown_timeout = shutdown_timeout
+
+        # Game sessions hosted by this node, keyed by game id
+        self.sessions = {}
+        self.namespaced = game_ids is not None
+        for game_id in (game_ids if self.namespaced else [None]):
+            self.add_session(game_id, width, height, num_not_it)
+
+        # Periodic checkpoints of the session state
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpointer = None
+        self._next_checkpoint = 0.0
+
+        # Viewers run in their own processes and follow the game through SNAPSHOT messages
+        self.view_rate = view_rate
+        self._next_view = 0.0
+
+    def add_session(self, game_id, width, height, num_not_it):
+        '''
+        Host a new game session
 
-        # Game state tracking
-        self.agents = {} # Map of node_id to position_t
-        self.frozen_count = 0
-        self.game_active = False
-        self.sync_request = set() # To track sync requests from nodes
-
-        # PyGame for visualization
-        self.cell_size = 20 # Size of each cell in pixels
-        self.screen = None
-        self.clock = None
-        self.gui_thread = None
-        self.gui_running = False
+        Args:
+            game_id (str): Game identifier (None for the global channels)
+            width (int): Width of the board
+            height (int): Height of the board
+            num_not_it (int): Number of NotIt agents
 
-        # To track which NotIt agents are frozen
-        self.frozen_agents = set()
+        Returns:
+            GameSession: The new session
+        '''
+        session = GameSession(self, game_id, width, height, num_not_it, self.agent_timeout, self.rescue)
+        self.sessions[game_id] = session
+        return session
 
     def on_start(self):
         '''
-        Initialize LCM subscriptions and start the GUI thread
+        Resume from the checkpoint and initialize LCM subscriptions
         '''
-        # Subscribe to position updates, sync requests, and game status
-        self.subscribe("POSITION", self.handle_position)
-        self.subscribe("SYNC_REQUEST", self.handle_sync_request)
-
-        # Initialize and start the GUI thread
-        self.gui_thread = threading.Thread(target=self.run_gui)
-        self.gui_running = True
-        self.gui_thread.start()
+        if self.checkpoint is not None:
+            self.restore_checkpoint()
+            self.checkpointer = Checkpointer(self.checkpoint)
+            self._next_checkpoint = time.monotonic() + self.checkpoint_interval
+
+        if self.metrics is not None:
+            self.metrics.add_collector(self.collect_metrics)
+
+        # Subscribe to position updates and sync requests, for every game when hosting several sessions
+        suffix = "/.*" if self.namespaced else ""
+        self.subscribe("POSITION" + suffix, self.handle_position, coalesce_key=position_key)
+        self.subscribe("SYNC_REQUEST" + suffix, self.handle_sync_request)
+        self.subscribe("JOIN_REQUEST" + suffix, self.handle_join_request)
+        # Every agent acknowledges game over at about the same time
+        self.subscribe("GAMEOVER_ACK" + suffix, self.handle_gameover_ack,
+                       queue_capacity=len(self.sessions) * (self.num_not_it + 1))
     
     def run(self):
         '''
         Main loop for the GameNode
         '''
         try:
-            # Wait for the game to be synchronized
-            while not self.game_active and self.running:
-                time.sleep(0.1)
-            
-            while self.frozen_count < self.num_not_it and self.running:
-                time.sleep(0.1)
-
-            # Send game over message when done
-            if self.running:
-                game_over_msg = gameover_t()
-                self.publish("GAMEOVER", game_over_msg)
-                print("GameNode: Game Over! All NotIt agents are frozen.")
-
-            # Wait for a second for other nodes to process the game over message
-            time.sleep(1)
+            # Sessions announce their own game over from the LCM thread
+            while not all(session.finished for session in self.sessions.values()) and self.running:
+                time.sleep(0.01)
+
+            # Sessions repeat game over until their agents acknowledged it; wait for that, up to one deadline
+            deadline = time.monotonic() + self.shutdown_timeout
+            while not all(session.acknowledged for session in self.sessions.values()) and self.running:
+                if time.monotonic() >= deadline:
+                    missing = sum(not session.acknowledged for session in self.sessions.values())
+                    self.log.warning("%d game(s) still missing game over acknowledgments after %ss", missing,
+                                     self.shutdown_timeout)
+                    break
+                time.sleep(0.005)
         
         except KeyboardInterrupt:
-            print("GameNode: Keyboard interrupt. Stopping the game.")
+            self.log.info("Keyboard interrupt. Stopping the game.")
         
         finally:
             self.running = False
@@ -84,79 +124,134 @@ class GameNode(Node):
         '''
         Clean up resources when stopping the node
         '''
-        # Signal the GUI thread to stop and wait for it to finish
-        self.gui_running = False
-        if self.gui_thread.is_alive() and self.gui_thread:
-            self.gui_thread.join(timeout=1)
+        # Write a final checkpoint, or drop it once every game is over so the next run starts fresh
+        if self.checkpointer is not None:
+            if all(session.finished for session in self.sessions.values()):
+                self.checkpointer.close()
+                if os.path.exists(self.checkpoint):
+                    os.remove(self.checkpoint)
+            else:
+                self.checkpointer.submit(self.capture_sessions())
+                self.checkpointer.close()
+                self.log.info("Checkpoint written to %s", self.checkpoint)
+
+        self.log.info("Stopped.")
+
+    def capture_sessions(self):
+        '''
+        Capture every session for a checkpoint (LCM thread, or after it has stopped)
+        '''
+        return {game_id: session.capture() for game_id, session in self.sessions.items()}
 
-        # Close the PyGame window
-        if pygame.get_init():
-            pygame.quit()
+    def collect_metrics(self):
+        '''
+        Game metrics of every session, for the metrics collector (LCM thread)
+        '''
+        return [triple for session in self.sessions.values() for triple in session.metrics()]
+
+    def restore_checkpoint(self):
+        '''
+        Load the sessions from the checkpoint file, if there is one. A file that cannot be read is renamed
+        aside with a .bad suffix and the node starts fresh, so a restarted referee does not trip over it again.
+        '''
+        if not os.path.exists(self.checkpoint):
+            return
 
-        print("GameNode: Stopped.")
+        try:
+            checkpoint = load_checkpoint(self.checkpoint)
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            bad_path = f"{self.checkpoint}.bad"
+            self.log.error("Could not load checkpoint %s, moving it to %s: %s", self.checkpoint, bad_path, e)
+            try:
+                os.replace(self.checkpoint, bad_path)
+            except OSError as e:
+                self.log.error("Could not move checkpoint %s aside: %s", self.checkpoint, e)
+            return
+
+        for game_id, state in checkpoint.items():
+            session = self.sessions.get(game_id)
+            if session is None:
+                self.log.warning("Checkpoint has game %s, which this node does not host", game_id)
+                continue
+            session.restore(state)
+
+    def on_tick(self):
+        '''
+        Drain the session inboxes round-robin, then run each session's periodic work
+        '''
+        # Every session with queued positions gets up to one quantum per round until all inboxes are empty
+        busy = [session for session in self.sessions.values() if session.inbox]
+        while busy:
+            busy = [session for session in busy if session.process(self.quantum)]
+
+        for session in self.sessions.values():
+            finished = session.finished
+            session.tick()
+            if session.finished and not finished:
+                self._next_view = 0.0 # Viewers get the final state right away; the node stops soon after
+
+        # Send the latest state to viewer processes
+        if self.view_rate > 0:
+            now = time.monotonic()
+            if now >= self._next_view:
+                self._next_view = now + 1.0 / self.view_rate
+                for session in self.sessions.values():
+                    session.publish_view()
+
+        # Hand a capture to the checkpoint writer thread
+        if self.checkpointer is not None:
+            now = time.monotonic()
+            if now >= self._next_checkpoint:
+                self._next_checkpoint = now + self.checkpoint_interval
+                self.checkpointer.submit(self.capture_sessions())
+
+    def session_for(self, channel):
+        '''
+        Find the session a channel belongs to
+
+        Args:
+            channel (str): LCM channel
+
+        Returns:
+            GameSession: The session, or None if this node does not host that game
+        '''
+        return self.sessions.get(channel_game_id(channel) if self.namespaced else None)
 
     def handle_position(self, channel, data):
         '''
-        Handle incoming position updates from agents
+        Queue an incoming position update for its session
 
         Args:
             channel (str): LCM channel
             data (bytes): LCM message data
         '''
-        msg = position_t.decode(data)
-        prev_pose = self.agents.get(msg.node_id)
-        self.agents[msg.node_id] = msg
-
-        # Check if this is a new position for a NotIt agent
-        if prev_pose is None and msg.is_it == 0:
-            print(f"GameNode: NotIt agent {msg.node_id} connected at {msg.x}, {msg.y}")
-
-        if prev_pose is None and msg.is_it == 1:
-            print(f"GameNode: It agent connected at {msg.x}, {msg.y}")
-
-        # Check for collision between It and NotIt agents
-        if msg.is_it == 1:  # This is an It position update
-            it_x, it_y = msg.x, msg.y
-            
-            # Check all NotIt nodes for collisions with the It node
-            for node_id, agent in self.agents.items():
-                if (agent.is_it == 0 and  # It's a NotIt node
-                    node_id not in self.frozen_agents and  # Not already frozen
-                    agent.x == it_x and agent.y == it_y):  # Same position
-                    
-                    # Freeze the NotIt agent
-                    freeze_msg = freeze_t()
-                    freeze_msg.node_id = node_id
-                    self.publish("FREEZE", freeze_msg)
-                    
-                    # Mark this agent as frozen
-                    self.frozen_agents.add(node_id)
-                    self.frozen_count += 1
-                    print(f"GameNode: It agent caught NotIt agent {node_id} at ({it_x}, {it_y})! ({self.frozen_count}/{self.num_not_it})")
-        
-        # Also check for collisions when receiving NotIt position updates
-        elif msg.is_it == 0:  # This is a NotIt position update
-            # Only check if this NotIt agent isn't already frozen
-            if msg.node_id not in self.frozen_agents:
-                # Find the It agent position
-                it_agent = None
-                for agent_id, agent in self.agents.items():
-                    if agent.is_it == 1:
-                        it_agent = agent
-                        break
-                
-                # If It agent exists and at same position as this NotIt
-                if it_agent and it_agent.x == msg.x and it_agent.y == msg.y:
-                    # Freeze the NotIt agent
-                    freeze_msg = freeze_t()
-                    freeze_msg.node_id = msg.node_id
-                    self.publish("FREEZE", freeze_msg)
-                    
-                    # Mark this agent as frozen
-                    self.frozen_agents.add(msg.node_id)
-                    self.frozen_count += 1
-                    print(f"GameNode: It agent caught NotIt agent {msg.node_id} at ({msg.x}, {msg.y})! ({self.frozen_count}/{self.num_not_it})")
+        session = self.session_for(channel)
+        if session is not None:
+            session.inbox.append(data)
 
+    def handle_join_request(self, channel, data):
+        '''
+        Handle join requests from standalone agent processes
+
+        Args:
+            channel (str): LCM channel
+            data (bytes): LCM message data
+        '''
+        session = self.session_for(channel)
+        if session is not None:
+            session.handle_join_request(data)
+
+    def handle_gameover_ack(self, channel, data):
+        '''
+        Handle game over acknowledgments from agents
+
+        Args:
+            channel (str): LCM channel
+            data (bytes): LCM message data
+        '''
+        session = self.session_for(channel)
+        if session is not None:
+            session.handle_gameover_ack(data)
 
     def handle_sync_request(self, channel, data):
         '''
@@ -166,90 +261,6 @@ class GameNode(Node):
             channel (str): LCM channel
             data (bytes): LCM message data
         '''
-
-        msg = sync_request_t.decode(data)
-        node_type = ["GameNode", "ItNode", "NotItNode"][msg.node_type]
-
-        # Add this node to our set of nodes that are ready
-        self.sync_request.add((msg.node_type, msg.node_id))
-        print(f"GameNode: Received sync request from {node_type} {msg.node_id}")
-
-        # Check if all (expected) nodes are ready
-        expected_count = 1 + self.num_not_it # 1 It node + num_not_it NotIt nodes
-        if len(self.sync_request) >= expected_count:
-            # ALl nodes are ready, send sync confirmation
-            print("GameNode: All nodes are ready. Starting the game!")
-            
-            confirm_msg = sync_confirm_t()
-            confirm_msg.ready = 1
-            self.publish("SYNC_CONFIRM", confirm_msg)
-
-            self.game_active = True
-
-    def run_gui(self):
-        '''
-        RUn the game visualization GUI in a separate thread
-        '''
-        # Initialize PyGame
-        pygame.init()
-        self.screen = pygame.display.set_mode((self.width * self.cell_size, self.height * self.cell_size))
-        pygame.display.set_caption("Distrubuted Freeze Tag")
-        self.clock = pygame.time.Clock()
-
-        # Colors
-        BLACK = (0, 0, 0)
-        WHITE = (255, 255, 255)
-        RED = (255, 0, 0)
-        GREEN = (0, 255, 0)
-        BLUE = (0, 0, 255) 
-        GRAY = (200, 200, 200)
-
-        # Main GUI loop
-        while self.gui_running:
-            # Process PyGame events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.gui_running = False
-                    self.running = False
-
-            # Clear the screen
-            self.screen.fill(WHITE)
-
-            # Draw the grid
-            for x in range(self.width):
-                for y in range(self.height):
-                    rect = pygame.Rect(x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size)
-                    pygame.draw.rect(self.screen, BLACK, rect, 1)
-
-            # Draw the agents
-            for node_id, agent in self.agents.items():
-                rect = pygame.Rect(agent.x * self.cell_size, agent.y * self.cell_size, self.cell_size, self.cell_size)
-
-                if agent.is_it == 1:
-                    # It agent = RED
-                    pygame.draw.rect(self.screen, RED, rect)
-                    pygame.draw.rect(self.screen, BLACK, rect, 2)  # Border
-                
-                elif node_id in self.frozen_agents:
-                    # Frozen NotIt agent = GRAY
-                    pygame.draw.rect(self.screen, GRAY, rect)
-                    pygame.draw.rect(self.screen, BLACK, rect, 2)
-                
-                else:
-                    # NotIt (active) agent = BLUE
-                    pygame.draw.rect(self.screen, BLUE, rect)
-                    pygame.draw.rect(self.screen, BLACK, rect, 2)
-
-                # Draw the node ID
-                font = pygame.font.Font(None, 24)
-                text = font.render(str(node_id), True, WHITE)
-                text_rect = text.get_rect(center=rect.center)
-                self.screen.blit(text, text_rect)
-
-            # Update the display
-            pygame.display.flip()
-            self.clock.tick(20) # 20 FPS for visualization
-
-        # Clean up PyGame (if its not done already)
-        if pygame.get_init():
-            pygame.quit()
\ No newline at end of file
+        session = self.session_for(channel)
+        if session is not None:
+            session.handle_sync_request(data)
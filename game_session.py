@@ -0,0 +1,588 @@
+# game_session.py
+import random
+import struct
+import time
+from collections import deque
+
+import numpy as np
+
+import logs
+from node import channel_name
+from liveness import LivenessTracker
+from agent_table import AgentTable
+from occupancy import OccupancyIndex, FrozenIndex
+from frozen_set import FrozenSetPublisher
+
+# Import the messages.lcm
+from messages import (position_t, freeze_t, unfreeze_t, sync_request_t, sync_confirm_t, gameover_t, gameover_ack_t, game_init_t,
+                      join_request_t, snapshot_t)
+
+# Wire layout of position_t after its 8-byte fingerprint (node_id, x, y, is_it), decoded without building a message
+POSITION_FINGERPRINT = position_t._get_packed_fingerprint()
+POSITION_FIELDS = struct.Struct(">iiib")
+
+# Seconds between two full frozen-set bitmaps on FROZEN_SET (deltas go out every tick with changes)
+FROZEN_SET_KEYFRAME_INTERVAL = 1.0
+
+# Seconds between two repeats of game over while agents on the roster have not acknowledged it
+GAMEOVER_REPEAT_INTERVAL = 0.1
+
+# Seconds between two warnings about messages dropped for an out-of-range node id
+REJECTED_LOG_INTERVAL = 1.0
+
+# Agent flags in snapshot_t
+AGENT_IT = 1
+AGENT_FROZEN = 2
+AGENT_LOST = 4
+
+
+class GameSession:
+    '''
+    State and rules for one game refereed by a GameNode.
+
+    Each session has its own agent table, sync roster, liveness tracker and game-over lifecycle, and talks on
+    channels namespaced by its game id. The GameNode queues incoming positions in the session inbox and drains
+    the inboxes of all sessions round-robin, so one busy game cannot starve the others.
+    '''
+
+    def __init__(self, node, game_id, width, height, num_not_it, agent_timeout=5.0, rescue=False):
+        '''
+        Args:
+            node (Node): Node used to publish this session's messages
+            game_id (str): Game identifier (None for the global channels)
+            width (int): Width of the board
+            height (int): Height of the board
+            num_not_it (int): Number of NotIt agents
+            agent_timeout (float): Seconds without a message before an agent is marked lost
+            rescue (bool): Free NotIt agents unfreeze frozen teammates on or next to their cell
+        '''
+        self.node = node
+        self.game_id = game_id
+        self.width = width
+        self.height = height
+        self.num_not_it = num_not_it
+        self.log = logs.get_logger("GameNode" if game_id is None else f"GameNode {game_id}")
+
+        # Game state tracking
+        self.state = AgentTable(num_not_it + 1) # Agent arrays by node id, shared with viewers and checkpoints through snapshots
+        self.occupancy = OccupancyIndex() # Cells and latest moves of the unfrozen NotIt agents
+        self.rescue = rescue
+        self.frozen_index = FrozenIndex() # Cells of the frozen NotIt agents, for rescues
+        self.frozen_count = 0 # Goes down again when a frozen agent is rescued
+        self.frozen_set = FrozenSetPublisher() # Authoritative frozen set for the agents, on FROZEN_SET
+        self.next_keyframe = 0.0
+        self.game_active = False
+        self.finished = False
+        self.finished_at = None   # Monotonic time of game over
+        self.session_id = random.getrandbits(63) # Sent with game over, so acks of another game or run are ignored
+        self.acks = set()         # (node_type, node_id) of agents that acknowledged game over
+        self.acknowledged = False # Every agent on the roster that is not lost acknowledged game over
+        self.outstanding_acks = None # Roster entries not lost and not acknowledged yet, counted from game over on
+        self.next_gameover = 0.0
+        self.sync_request = set() # To track sync requests from nodes
+        self.inbox = deque()      # Encoded position messages waiting to be processed
+        self.position_count = 0   # Position messages processed so far
+        self.catch_count = 0      # Freezes, including agents caught again after a rescue
+        self.rescue_count = 0
+        self.viewed_version = -1  # Agent table version last sent to viewers
+        self.rejected_count = 0   # Messages dropped for a node id outside this game's ids
+        self.rejected_logged = 0  # Of those, already reported in a warning
+        self.next_rejected_log = 0.0
+
+        # Node ids handed out to agents that joined through JOIN_REQUEST
+        self.joins = {}           # Map of request_id to (first_node_id, num_ids), so retried requests get the same ids
+        self.it_assigned = False
+        self.next_node_id = 1     # Next free NotIt id
+
+        # Liveness tracking: agents that stop publishing are marked lost
+        self.liveness = LivenessTracker(agent_timeout, num_not_it + 1)
+        self.lost_count = 0 # Lost NotIt agents that were not frozen
+        self.it_lost = False
+
+    def channel(self, name):
+        '''
+        Name of a channel in this session's game
+        '''
+        return channel_name(name, self.game_id)
+
+    def is_over(self):
+        '''
+        Check if the game has ended: every NotIt agent is frozen or lost, or the It agent is lost.
+        Called on the current counts every tick, so a rescue before the tick keeps the game going.
+        '''
+        return self.game_active and (self.frozen_count + self.lost_count >= self.num_not_it or self.it_lost)
+
+    def accepts(self, node_id):
+        '''
+        Check a node id from the wire against this game's ids: 0 for the It and 1..num_not_it for the NotIt
+        agents. Agent state lives in arrays indexed by node id, so a stray or hostile id must never reach them;
+        dropped messages are reported in a warning at most once per REJECTED_LOG_INTERVAL.
+
+        Args:
+            node_id (int): Node id of an incoming message
+
+        Returns:
+            bool: True if the id belongs to this game
+        '''
+        if 0 <= node_id <= self.num_not_it:
+            return True
+
+        self.rejected_count += 1
+        now = time.monotonic()
+        if now >= self.next_rejected_log:
+            self.next_rejected_log = now + REJECTED_LOG_INTERVAL
+            self.log.warning("Dropped %d message(s) with a node id outside 0..%d (latest: %d)",
+                             self.rejected_count - self.rejected_logged, self.num_not_it, node_id)
+            self.rejected_logged = self.rejected_count
+        return False
+
+    def process(self, budget):
+        '''
+        Process up to budget queued position messages
+
+        Args:
+            budget (int): Max messages to process
+
+        Returns:
+            bool: True if messages are still queued
+        '''
+        inbox = self.inbox
+        count = min(budget, len(inbox))
+        for _ in range(count):
+            self.handle_position(inbox.popleft())
+        self.position_count += count
+        return bool(inbox)
+
+    def tick(self):
+        '''
+        Periodic work from the LCM thread: liveness sweep, game-over check and frozen set
+        '''
+        if self.game_active and not self.finished:
+            self.expire_agents()
+
+            if self.is_over():
+                self.finish()
+
+        # Game over goes out as a datagram like everything else: repeat it until the agents acknowledged it
+        if self.finished and not self.acknowledged:
+            now = time.monotonic()
+            if now >= self.next_gameover:
+                self.next_gameover = now + GAMEOVER_REPEAT_INTERVAL
+                self.publish_game_over()
+            self.check_acknowledged()
+
+        self.publish_frozen_set()
+
+    def publish_frozen_set(self, now=None):
+        '''
+        Send this tick's freezes and rescues as a delta, and the whole frozen set every keyframe interval
+        '''
+        delta = self.frozen_set.delta()
+        if delta is not None:
+            self.node.publish(self.channel("FROZEN_SET"), delta)
+
+        if now is None:
+            now = time.monotonic()
+        if now >= self.next_keyframe:
+            self.next_keyframe = now + FROZEN_SET_KEYFRAME_INTERVAL
+            self.node.publish(self.channel("FROZEN_SET"), self.frozen_set.keyframe(self.state.frozen))
+
+    def publish_view(self):
+        '''
+        Send the latest agent table snapshot to viewer processes, if it changed since the last one.
+        Snapshots are only taken here and for checkpoints, so a referee without readers never builds one.
+        '''
+        self.state.publish(self.liveness.lost)
+        snapshot = self.state.snapshot()
+        if snapshot.version == self.viewed_version:
+            return
+        self.viewed_version = snapshot.version
+
+        msg = snapshot_t()
+        msg.version = snapshot.version
+        msg.width = self.width
+        msg.height = self.height
+        msg.num_not_it = self.num_not_it
+        msg.frozen_count = int(np.count_nonzero(snapshot.frozen))
+        msg.position_count = self.position_count
+        msg.game_over = int(self.finished)
+
+        msg.num_agents = len(snapshot.node_ids)
+        msg.node_ids = snapshot.node_ids.tolist()
+        msg.xs = snapshot.xs.tolist()
+        msg.ys = snapshot.ys.tolist()
+        flags = (np.where(snapshot.is_it == 1, AGENT_IT, 0) | np.where(snapshot.frozen, AGENT_FROZEN, 0) |
+                 np.where(snapshot.lost, AGENT_LOST, 0))
+        msg.flags = flags.tolist()
+        self.node.publish(self.channel("SNAPSHOT"), msg)
+
+    def metrics(self):
+        '''
+        Game counters and gauges for the metrics collector
+
+        Returns:
+            list: (name, labels, value) triples
+        '''
+        labels = {"game": "" if self.game_id is None else self.game_id}
+        return [("freezetag_positions_total", labels, self.position_count),
+                ("freezetag_catches_total", labels, self.catch_count),
+                ("freezetag_rescues_total", labels, self.rescue_count),
+                ("freezetag_frozen", labels, self.frozen_count),
+                ("freezetag_lost", labels, self.lost_count + int(self.it_lost)),
+                ("freezetag_not_it", labels, self.num_not_it),
+                ("freezetag_inbox", labels, len(self.inbox)),
+                ("freezetag_game_active", labels, int(self.game_active and not self.finished))]
+
+    def finish(self):
+        '''
+        Announce game over on this session's channel
+        '''
+        self.finished = True
+        self.finished_at = time.monotonic()
+        self.count_outstanding_acks()
+        self.state.publish(self.liveness.lost, force=True) # Viewers get one more snapshot with the game over flag
+        self.next_gameover = self.finished_at + GAMEOVER_REPEAT_INTERVAL
+        self.publish_game_over()
+
+        if self.it_lost:
+            self.log.warning("Game Over! The It agent was lost.")
+        elif self.lost_count:
+            self.log.warning("Game Over! All remaining NotIt agents are frozen (%d lost).", self.lost_count)
+        else:
+            self.log.info("Game Over! All NotIt agents are frozen.")
+
+    def publish_game_over(self):
+        '''
+        Send game over with this session's id; agents acknowledge it on GAMEOVER_ACK and exit
+        '''
+        game_over_msg = gameover_t()
+        game_over_msg.done = 1
+        game_over_msg.session_id = self.session_id
+        self.node.publish(self.channel("GAMEOVER"), game_over_msg)
+
+    def handle_gameover_ack(self, data):
+        '''
+        Record an agent's acknowledgment of game over
+
+        Args:
+            data (bytes): LCM message data
+        '''
+        msg = gameover_ack_t.decode(data)
+        if msg.session_id != self.session_id or not self.accepts(msg.node_id):
+            return
+        roster_entry = (msg.node_type, msg.node_id)
+        if roster_entry in self.acks:
+            return
+        self.acks.add(roster_entry)
+        if (self.outstanding_acks is not None and roster_entry in self.sync_request
+                and msg.node_id not in self.liveness.lost):
+            self.outstanding_acks -= 1
+        self.check_acknowledged()
+
+    def count_outstanding_acks(self):
+        '''
+        Count the roster entries that still have to acknowledge game over (once, when the game ends); from then
+        on acks, lost and returning agents and late sync requests adjust the count
+        '''
+        lost = self.liveness.lost
+        self.outstanding_acks = sum(1 for roster_entry in self.sync_request
+                                    if roster_entry not in self.acks and roster_entry[1] not in lost)
+
+    def adjust_outstanding_acks(self, node_id, delta):
+        '''
+        Count an agent out of (delta -1, marked lost) or back into (delta 1, heard from again) the
+        outstanding acks after game over, unless it already acknowledged
+        '''
+        if self.outstanding_acks is None:
+            return
+        for node_type in (1, 2):
+            roster_entry = (node_type, node_id)
+            if roster_entry in self.sync_request and roster_entry not in self.acks:
+                self.outstanding_acks += delta
+
+    def check_acknowledged(self):
+        '''
+        Flag the session as acknowledged once every agent on the roster that is not lost has acknowledged game over
+        '''
+        if self.acknowledged or not self.finished or self.outstanding_acks > 0:
+            return
+
+        self.acknowledged = True
+        self.log.info("%d agent(s) acknowledged game over in %.1f ms", len(self.acks),
+                      1000 * (time.monotonic() - self.finished_at))
+
+    def capture(self):
+        '''
+        Capture the session state for a checkpoint. Called from the LCM thread; only takes references to
+        immutable data and small copies, so serializing and writing can happen on another thread.
+
+        Returns:
+            dict: Snapshot of the agent table, sync roster, join assignments and game flags
+        '''
+        self.state.publish(self.liveness.lost, force=True)
+        return {
+            "snapshot": self.state.snapshot(),
+            "roster": frozenset(self.sync_request),
+            "joins": dict(self.joins),
+            "game_active": self.game_active,
+            "finished": self.finished,
+            "it_assigned": self.it_assigned,
+            "next_node_id": self.next_node_id,
+        }
+
+    def restore(self, checkpoint):
+        '''
+        Continue a game from a checkpoint. Agents on the roster get a fresh liveness deadline, so live
+        agents keep playing without a new sync round and only the ones that went away are marked lost.
+
+        Args:
+            checkpoint (dict): Arrays of this session from checkpoint.load_checkpoint
+        '''
+        now = time.monotonic()
+        frozen = set(checkpoint["frozen"].tolist())
+        lost = set(checkpoint["lost"].tolist())
+        game_active, finished, it_assigned, next_node_id = checkpoint["flags"].tolist()
+
+        agents = checkpoint["agents"]
+        self.state.load(agents[:, 0], agents[:, 1], agents[:, 2], agents[:, 3])
+
+        for node_id, x, y, is_it in agents.tolist():
+            if node_id in lost:
+                self.liveness.mark_lost(node_id, now)
+                if is_it == 1:
+                    self.it_lost = True
+                elif node_id not in frozen:
+                    self.lost_count += 1
+
+            # Rebuild the occupancy index; catches it would report were already made before the checkpoint
+            if is_it == 1:
+                self.occupancy.move_it(x, y)
+            elif node_id not in frozen:
+                self.occupancy.move_not_it(node_id, x, y)
+
+        for node_id in frozen:
+            self.state.freeze(node_id)
+            if self.rescue and self.state.has(node_id) and node_id not in lost:
+                self.frozen_index.add(node_id, int(self.state.xs[node_id]), int(self.state.ys[node_id]))
+        self.frozen_count = len(frozen)
+
+        self.sync_request = {(node_type, node_id) for node_type, node_id in checkpoint["roster"].tolist()}
+        self.joins = {request_id: (first, count) for request_id, first, count in checkpoint["joins"].tolist()}
+        self.it_assigned = bool(it_assigned)
+        self.next_node_id = next_node_id
+        self.game_active = bool(game_active)
+        self.finished = bool(finished)
+        if self.finished:
+            self.finished_at = now
+            self.count_outstanding_acks()
+
+        if self.game_active:
+            for _, node_id in self.sync_request:
+                if node_id not in lost:
+                    self.liveness.heartbeat(node_id, now)
+
+        self.log.info("Restored from checkpoint: %d agents, %d/%d frozen, %d lost%s", self.state.count,
+                      self.frozen_count, self.num_not_it, len(lost), " (game over)" if self.finished else "")
+
+    def expire_agents(self):
+        '''
+        Sweep the liveness tracker and update the game state for agents that went silent
+        '''
+        for node_id in self.liveness.expire():
+            if self.state.has(node_id) and self.state.is_it[node_id] == 1:
+                self.it_lost = True
+                self.log.warning("It agent lost (no update for %ss)", self.liveness.timeout)
+
+            elif not self.state.is_frozen(node_id):
+                self.lost_count += 1
+                self.log.warning("NotIt agent %d lost (no update for %ss)", node_id, self.liveness.timeout)
+
+            self.adjust_outstanding_acks(node_id, -1)
+            self.state.touch()
+
+    def freeze(self, node_id, x, y):
+        '''
+        Freeze a NotIt agent and tell it so
+
+        Args:
+            node_id (int): NotIt agent identifier
+            x (int): x-coordinate of the catch
+            y (int): y-coordinate of the catch
+        '''
+        freeze_msg = freeze_t()
+        freeze_msg.node_id = node_id
+        self.node.publish(self.channel("FREEZE"), freeze_msg)
+
+        # Mark this agent as frozen
+        self.state.freeze(node_id)
+        self.frozen_set.freeze(node_id)
+        self.occupancy.remove(node_id)
+        if self.rescue:
+            # It stands frozen on the cell of its latest update, which may be past the cell of the catch
+            self.frozen_index.add(node_id, int(self.state.xs[node_id]), int(self.state.ys[node_id]))
+        self.frozen_count += 1
+        self.catch_count += 1
+        self.log.info("It agent caught NotIt agent %d at (%d, %d)! (%d/%d)", node_id, x, y, self.frozen_count, self.num_not_it)
+
+    def rescue_near(self, rescuer_id, x, y):
+        '''
+        Unfreeze the frozen NotIt agents a free NotIt touches: on its cell or one of the four next to it.
+        Lost agents stay frozen, and so does an agent the It is standing on.
+
+        Args:
+            rescuer_id (int): Free NotIt agent identifier
+            x (int): x-coordinate of the rescuer
+            y (int): y-coordinate of the rescuer
+        '''
+        it_cell = self.occupancy.it_cell()
+        for node_id in self.frozen_index.near(x, y):
+            if node_id in self.liveness.lost or self.frozen_index.positions[node_id] == it_cell:
+                continue
+            self.unfreeze(node_id, rescuer_id)
+
+    def unfreeze(self, node_id, rescuer_id):
+        '''
+        Unfreeze a NotIt agent and tell it so
+
+        Args:
+            node_id (int): NotIt agent identifier
+            rescuer_id (int): NotIt agent that rescued it
+        '''
+        unfreeze_msg = unfreeze_t()
+        unfreeze_msg.node_id = node_id
+        unfreeze_msg.rescuer_id = rescuer_id
+        self.node.publish(self.channel("UNFREEZE"), unfreeze_msg)
+
+        x, y = self.frozen_index.positions[node_id]
+        self.frozen_index.remove(node_id)
+        self.state.unfreeze(node_id)
+        self.frozen_set.unfreeze(node_id)
+        self.occupancy.move_not_it(node_id, x, y) # Free agents are swept for catches again
+        self.frozen_count -= 1
+        self.rescue_count += 1
+        self.log.info("NotIt agent %d rescued NotIt agent %d at (%d, %d)! (%d/%d)", rescuer_id, node_id, x, y,
+                      self.frozen_count, self.num_not_it)
+
+    def handle_position(self, data):
+        '''
+        Handle an incoming position update from an agent
+
+        Args:
+            data (bytes): LCM message data
+        '''
+        if data[:8] != POSITION_FINGERPRINT:
+            raise ValueError("Decode error")
+        node_id, x, y, is_it = POSITION_FIELDS.unpack_from(data, 8)
+        if not self.accepts(node_id):
+            return
+
+        state = self.state
+        known = state.has(node_id)
+        moved = not known or state.xs[node_id] != x or state.ys[node_id] != y
+        state.update(node_id, x, y, is_it)
+
+        # Every position update doubles as a heartbeat
+        if self.game_active and self.liveness.heartbeat(node_id):
+            if is_it == 1:
+                self.it_lost = False
+            elif not state.frozen[node_id]:
+                self.lost_count -= 1
+            self.adjust_outstanding_acks(node_id, 1)
+            self.log.warning("Agent %d is back at %d, %d", node_id, x, y)
+
+        # Check if this is a new position for a NotIt agent
+        if not known and is_it == 0:
+            self.log.debug("NotIt agent %d connected at %d, %d", node_id, x, y)
+
+        if not known and is_it == 1:
+            self.log.debug("It agent connected at %d, %d", x, y)
+
+        # Check for collision between It and NotIt agents along the moves since their previous updates
+        if is_it == 1:  # This is an It position update
+            # Relay the It's moves on their own channel, so evasive NotIt agents need not follow every POSITION
+            if moved:
+                pose = position_t()
+                pose.node_id, pose.x, pose.y, pose.is_it = node_id, x, y, is_it
+                self.node.publish(self.channel("IT_POSITION"), pose)
+
+            for caught_id in self.occupancy.move_it(x, y):
+                if caught_id not in self.liveness.lost:  # Still alive
+                    self.freeze(caught_id, x, y)
+
+        # Also check for collisions when receiving NotIt position updates
+        elif is_it == 0:  # This is a NotIt position update
+            # Only check if this NotIt agent isn't already frozen
+            if not state.frozen[node_id]:
+                if self.occupancy.move_not_it(node_id, x, y):
+                    self.freeze(node_id, x, y)
+                elif self.rescue and self.frozen_index.cells and not self.finished:
+                    self.rescue_near(node_id, x, y)
+
+    def handle_join_request(self, data):
+        '''
+        Assign node ids to a standalone agent process or agent-host shard and reply with the game config
+
+        Args:
+            data (bytes): LCM message data
+        '''
+        msg = join_request_t.decode(data)
+
+        if msg.request_id not in self.joins:
+            if msg.node_type == 1:
+                # There is only one It, and it always has id 0
+                assigned = (0, 0 if self.it_assigned else 1)
+                self.it_assigned = True
+            else:
+                num_ids = max(0, min(msg.num_ids, self.num_not_it + 1 - self.next_node_id))
+                assigned = (self.next_node_id, num_ids)
+                self.next_node_id += num_ids
+
+            self.joins[msg.request_id] = assigned
+            self.log.info("Assigned %d node id(s) starting at %d to join request %x", assigned[1], assigned[0], msg.request_id)
+
+        init_msg = game_init_t()
+        init_msg.width = self.width
+        init_msg.height = self.height
+        init_msg.num_not_it = self.num_not_it
+        init_msg.request_id = msg.request_id
+        init_msg.first_node_id, init_msg.num_ids = self.joins[msg.request_id]
+        self.node.publish(self.channel("GAME_INIT"), init_msg)
+
+    def handle_sync_request(self, data):
+        '''
+        Handle a synchronization request from an agent
+
+        Args:
+            data (bytes): LCM message data
+        '''
+        msg = sync_request_t.decode(data)
+        if msg.node_type not in (1, 2) or not self.accepts(msg.node_id):
+            return
+        node_type = ["GameNode", "ItNode", "NotItNode"][msg.node_type]
+
+        # Add this node to our set of nodes that are ready
+        roster_entry = (msg.node_type, msg.node_id)
+        if (self.outstanding_acks is not None and roster_entry not in self.sync_request
+                and roster_entry not in self.acks and msg.node_id not in self.liveness.lost):
+            self.outstanding_acks += 1 # Joined after game over, so it still has to acknowledge it
+        self.sync_request.add(roster_entry)
+        self.log.debug("Received sync request from %s %d", node_type, msg.node_id)
+
+        # Check if all (expected) nodes are ready
+        expected_count = 1 + self.num_not_it # 1 It node + num_not_it NotIt nodes
+        if len(self.sync_request) >= expected_count:
+            # ALl nodes are ready, send sync confirmation
+            confirm_msg = sync_confirm_t()
+            confirm_msg.ready = 1
+            self.node.publish(self.channel("SYNC_CONFIRM"), confirm_msg)
+
+            if self.game_active:
+                return
+            self.log.info("All nodes are ready. Starting the game!")
+
+            # Arm a heartbeat deadline for every agent on the roster
+            now = time.monotonic()
+            for _, node_id in self.sync_request:
+                self.liveness.heartbeat(node_id, now)
+
+            self.game_active = True
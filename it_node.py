@@ -1,13 +1,15 @@
 # it_node.py
-import time
 # import lcm
-from node import Node
+import logs
+from node import Node, position_key, GAMEOVER_LINGER
+from planner import InterceptPlanner
+from frozen_set import FrozenSetFollower
 
 # Import the messages.lcm
-from messages import position_t, sync_request_t, sync_confirm_t
+from messages import position_t, frozen_set_t, sync_request_t, sync_confirm_t, gameover_t, gameover_ack_t
 
 class ItNode(Node):
-    def __init__(self, start_x, start_y, width, height):
+    def __init__(self, start_x, start_y, width, height, coalesce=False, batch=False, game_id=None, horizon=0):
         '''
         Initialize the ItNode with starting position and board dimensions
 
@@ -16,8 +18,13 @@ class ItNode(Node):
             start_y (int): Starting y-coordinate of the ItNode
             width (int): Width of the board
             height (int): Height of the board
+            coalesce (bool): Only process the newest queued position per NotIt node
+            batch (bool): Pack outbound messages into one datagram per channel per tick
+            game_id (str): Game to join (None for the global channels)
+            horizon (int): Ticks the intercept planner looks ahead (0 to only chase the closest NotIt)
         '''
-        super().__init__()
+        super().__init__(coalesce=coalesce, batch=batch, game_id=game_id)
+        self.log = logs.get_logger("ItNode" if game_id is None else f"ItNode {game_id}")
         self.node_id = 0 # ID for the ItNode should be 0
         self.x = start_x
         self.y = start_y
@@ -27,26 +34,31 @@ class ItNode(Node):
 
         # Game state tracking
         self.not_it_nodes = {}
-        self.frozen_nodes = set()
+        self.frozen_nodes = set() # Kept in step with the GameNode's frozen set (FROZEN_SET)
+        self.frozen_set = FrozenSetFollower(self.frozen_nodes)
+
+        # Forecast of the NotIt positions, used to intercept instead of chase
+        self.planner = InterceptPlanner(width, height, horizon) if horizon > 0 else None
     
     def on_start(self):
         '''
         Initialize LCM subscriptions & send initial position
         '''
         # Subscribe to position updates and sync requests
-        self.subscribe("SYNC_CONFIRM", self.handle_sync_confirm)
-        self.subscribe("POSITION", self.handle_position)
-        self.subscribe("GAME_OVER", self.handle_game_over)
+        self.subscribe(self.channel("SYNC_CONFIRM"), self.handle_sync_confirm)
+        self.subscribe(self.channel("POSITION"), self.handle_position, coalesce_key=position_key)
+        self.subscribe(self.channel("FROZEN_SET"), self.handle_frozen_set)
+        self.subscribe(self.channel("GAMEOVER"), self.handle_game_over)
 
         # Send sync request to the GameNode
         sync_request = sync_request_t()
         sync_request.node_type = 1 # 1 for ItNode
         sync_request.node_id = self.node_id
-        self.publish("SYNC_REQUEST", sync_request)
+        self.publish(self.channel("SYNC_REQUEST"), sync_request)
 
         # Send initial position
         self.publish_position()
-        print(f"ItNode: Started at position ({self.x}, {self.y})")
+        self.log.info("Started at position (%d, %d)", self.x, self.y)
     
     def run(self):
         '''
@@ -55,21 +67,21 @@ class ItNode(Node):
         try:
             # Wait for synchronization confirmation
             while not self.game_active and self.running:
-                time.sleep(0.1)
+                self.sleep(0.1)
             
-            print("ItNode: Game active, starting movement")
+            self.log.info("Game active, starting movement")
 
             # Main loop for the ItNode
             while self.running:
-                # Chase closes unfrozen NotIt agents
-                self.chase_closest_not_it()
+                # Intercept (or chase) unfrozen NotIt agents
+                self.move()
                 self.publish_position()
 
                 # Wait for a short period before next move
-                time.sleep(0.5)
+                self.sleep(0.5)
 
         except KeyboardInterrupt:
-            print("ItNode: Interrupted by user")
+            self.log.info("Interrupted by user")
 
     def on_stop(self):
         '''
@@ -77,7 +89,55 @@ class ItNode(Node):
         '''
         # TODO: check if we need self.running here
         # self.running = False
-        print("ItNode: Stopped")
+        self.log.info("Stopped")
+
+    def observe(self, node_id, x, y):
+        '''
+        Record the latest position of a NotIt agent
+
+        Args:
+            node_id (int): NotIt agent identifier
+            x (int): x-coordinate
+            y (int): y-coordinate
+        '''
+        self.not_it_nodes[node_id] = (x, y)
+        if self.planner is not None and node_id not in self.frozen_nodes:
+            self.planner.update(node_id, x, y)
+
+    def mark_frozen(self, node_id):
+        '''
+        Stop chasing a NotIt agent that has been frozen
+
+        Args:
+            node_id (int): NotIt agent identifier
+        '''
+        self.frozen_nodes.add(node_id)
+        if self.planner is not None:
+            self.planner.remove(node_id)
+
+    def mark_unfrozen(self, node_id):
+        '''
+        Chase a NotIt agent again after a teammate rescued it
+
+        Args:
+            node_id (int): NotIt agent identifier
+        '''
+        self.frozen_nodes.discard(node_id)
+        position = self.not_it_nodes.get(node_id)
+        if self.planner is not None and position is not None:
+            self.planner.update(node_id, *position)
+
+    def move(self):
+        '''
+        Take one step: toward the best forecast intercept, or after the closest NotIt when none is within the planner's horizon
+        '''
+        target = self.planner.best_move(self.x, self.y) if self.planner is not None else None
+        if target is None:
+            self.chase_closest_not_it()
+            return
+
+        self.x, self.y = target
+        self.log.debug("Moved to (%d, %d), intercepting", self.x, self.y)
 
     def chase_closest_not_it(self):
         '''
@@ -146,7 +206,7 @@ class ItNode(Node):
             elif dy < 0:
                 self.y = max(self.y - 1, 0)
                 
-        print(f"ItNode: Moved to ({self.x}, {self.y}), chasing NotIt node {closest_node_id}")
+        self.log.debug("Moved to (%d, %d), chasing NotIt node %d", self.x, self.y, closest_node_id)
     
     def publish_position(self):
         '''
@@ -158,7 +218,7 @@ class ItNode(Node):
         pose.y = self.y
         pose.is_it = 1
 
-        self.publish("POSITION", pose)
+        self.publish(self.channel("POSITION"), pose)
 
     def handle_sync_confirm(self, channel, data):
         '''
@@ -171,7 +231,7 @@ class ItNode(Node):
         msg = sync_confirm_t.decode(data)
         if msg.ready == 1:
             self.game_active = True
-            print("ItNode: Received sync confirmation, game is active")
+            self.log.debug("Received sync confirmation, game is active")
 
     def handle_position(self, channel, data):
         '''
@@ -184,25 +244,47 @@ class ItNode(Node):
         msg = position_t.decode(data)
 
         if msg.is_it == 0:
-            self.not_it_nodes[msg.node_id] = (msg.x, msg.y)
-            # print(f"ItNode: Received position update from NotIt node {msg.node_id} at ({msg.x}, {msg.y})")
+            self.observe(msg.node_id, msg.x, msg.y)
+            # self.log.debug("Received position update from NotIt node %d at (%d, %d)", msg.node_id, msg.x, msg.y)
 
-            # Check if the NotIt node pose is same as It node pose
-            if self.x == msg.x and self.y == msg.y:
-                print(f"ItNode: Caught NotIt node {msg.node_id} at ({msg.x}, {msg.y})!")
-                self.frozen_nodes.add(msg.node_id)
-            
-            # Position update to ensure GameNode sees this collision
+            # Position update to ensure GameNode sees this collision (catches come back on FROZEN_SET)
             self.publish_position()
 
+    def handle_frozen_set(self, channel, data):
+        '''
+        Apply a delta or keyframe of the GameNode's frozen set, so only unfrozen NotIt nodes are chased
+
+        Args:
+            channel (str): LCM channel
+            data (bytes): LCM message data
+        '''
+        frozen, unfrozen = self.frozen_set.apply(frozen_set_t.decode(data))
+        for node_id in frozen:
+            self.mark_frozen(node_id)
+        for node_id in unfrozen:
+            self.log.debug("NotIt node %d was rescued", node_id)
+            self.mark_unfrozen(node_id)
+
     def handle_game_over(self, channel, data):
         '''
-        Handle game over message from GameNode
+        Handle game over message from the GameNode: acknowledge it (and every repeat of it), then stop
 
         Args:
             channel (str): LCM channel
             data (bytes): LCM message data
         '''
-        print("ItNode: Game over!")
-        self.running = False
-        # sys.exit(0)
\ No newline at end of file
+        msg = gameover_t.decode(data)
+        if not msg.done:
+            return
+
+        ack = gameover_ack_t()
+        ack.session_id = msg.session_id
+        ack.node_type = 1 # 1 for ItNode
+        ack.node_id = self.node_id
+        self.publish(self.channel("GAMEOVER_ACK"), ack)
+
+        # Every repeat gets an ack too, in case ours was lost; keep listening a little after the last one
+        self.linger(GAMEOVER_LINGER)
+        if self.running:
+            self.log.info("Game over!")
+            self.request_stop()
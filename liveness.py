@@ -0,0 +1,104 @@
+# liveness.py
+import heapq
+import math
+import time
+
+import numpy as np
+
+from agent_table import grow
+
+
+class LivenessTracker:
+    '''
+    Tracks when each agent was last heard from and reports agents that miss their deadline.
+
+    Deadlines are kept in a min-heap ordered by expiry time. A heartbeat only updates the
+    last-seen time, an array indexed by node id (NaN for agents never heard from); heap entries
+    are re-armed lazily when they reach the top of the heap.
+    That makes a heartbeat O(1) and a sweep O(k log n) for the k entries that come due,
+    so checking thousands of agents every tick stays cheap.
+    '''
+
+    def __init__(self, timeout, capacity=1024):
+        '''
+        Args:
+            timeout (float): Seconds an agent may stay silent before it is marked lost
+            capacity (int): Node ids to allocate room for up front
+        '''
+        self.timeout = timeout
+        self.last_seen = np.full(capacity, np.nan) # Last heartbeat time per node id
+        self.lost = set()   # Node ids that missed their deadline
+        self._heap = []     # (deadline, node_id), one entry per live tracked agent
+
+    def heartbeat(self, node_id, now=None):
+        '''
+        Record that an agent is alive
+
+        Args:
+            node_id (int): Agent identifier
+            now (float): Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            bool: True if the agent was previously marked lost and is now back
+        '''
+        if now is None:
+            now = time.monotonic()
+
+        if node_id >= len(self.last_seen):
+            self.last_seen = grow(self.last_seen, node_id + 1, np.nan)
+
+        revived = node_id in self.lost
+        if revived or math.isnan(self.last_seen[node_id]):
+            # Lost agents have no heap entry, so arm a fresh deadline for them
+            self.lost.discard(node_id)
+            heapq.heappush(self._heap, (now + self.timeout, node_id))
+
+        self.last_seen[node_id] = now
+        return revived
+
+    def mark_lost(self, node_id, now=None):
+        '''
+        Mark an agent as lost without waiting for its deadline (e.g. when restoring a checkpoint)
+
+        Args:
+            node_id (int): Agent identifier
+            now (float): Current monotonic time (defaults to time.monotonic())
+        '''
+        if now is None:
+            now = time.monotonic()
+
+        # A heap entry left from an earlier heartbeat is dropped by the next sweep
+        self.lost.add(node_id)
+        if node_id >= len(self.last_seen):
+            self.last_seen = grow(self.last_seen, node_id + 1, np.nan)
+        if math.isnan(self.last_seen[node_id]):
+            self.last_seen[node_id] = now
+
+    def expire(self, now=None):
+        '''
+        Collect agents whose deadline has passed since they were last heard from
+
+        Args:
+            now (float): Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            list: Node ids that were marked lost by this sweep
+        '''
+        if now is None:
+            now = time.monotonic()
+
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            _, node_id = heapq.heappop(self._heap)
+            if node_id in self.lost:
+                continue
+
+            # The agent may have sent heartbeats since this entry was armed
+            deadline = float(self.last_seen[node_id]) + self.timeout
+            if deadline <= now:
+                self.lost.add(node_id)
+                expired.append(node_id)
+            else:
+                heapq.heappush(self._heap, (deadline, node_id))
+
+        return expired
@@ -0,0 +1,311 @@
+# load_gen.py
+import argparse
+import math
+import random
+import time
+
+import logs
+from node import Node, GAMEOVER_LINGER
+from stats import percentile
+
+# Import the messages.lcm
+from messages import position_t, freeze_t, sync_request_t, sync_confirm_t, gameover_t, gameover_ack_t
+
+
+class LoadGenerator(Node):
+    '''
+    Simulates N NotIt agents and a stationary It against a real GameNode.
+
+    NotIt agents random-walk around the board but never step onto the It's cell on their own. A configurable
+    share of updates instead places an agent exactly on the It, which the GameNode must answer with a FREEZE.
+    Timing those replies gives the catch latency, and counting them shows when the GameNode starts to fall behind.
+    A collision without a reply within reply_timeout counts as a lost reply, and its agent can collide again.
+    '''
+
+    def __init__(self, num_agents, width, height, rates, duration=5.0, collision_rate=0.001, min_catch_ratio=0.95,
+                 agent_timeout=5.0, sync_timeout=30.0, reply_timeout=1.0, batch=False, game_id=None, seed=None):
+        '''
+        Args:
+            num_agents (int): Number of simulated NotIt agents (ids 1..num_agents)
+            width (int): Width of the board
+            height (int): Height of the board
+            rates (list): Aggregate update rates to step through (updates per second)
+            duration (float): Seconds per rate step
+            collision_rate (float): Share of updates that put an agent on the It's cell
+            min_catch_ratio (float): Share of collisions that must get a FREEZE for a step to count as sustained
+            agent_timeout (float): The GameNode's --agent-timeout, to warn about rates too low to keep every agent alive
+            sync_timeout (float): Seconds to wait for the GameNode to start the game
+            reply_timeout (float): Seconds after which a collision without a FREEZE counts as a lost reply
+            batch (bool): Pack outbound messages into one datagram per channel per tick
+            game_id (str): Game to load (None for the global channels)
+            seed (int): Random seed
+        '''
+        super().__init__(batch=batch, game_id=game_id)
+        self.log = logs.get_logger("LoadGen")
+        self.num_agents = num_agents
+        self.width = width
+        self.height = height
+        self.rates = rates
+        self.duration = duration
+        self.collision_rate = collision_rate
+        self.min_catch_ratio = min_catch_ratio
+        self.agent_timeout = agent_timeout
+        self.sync_timeout = sync_timeout
+        self.reply_timeout = reply_timeout
+        self.rng = random.Random(seed)
+
+        # The It sits in the middle of the board
+        self.it_x = width // 2
+        self.it_y = height // 2
+
+        # Simulated agent state
+        self.x = [0] * (num_agents + 1)
+        self.y = [0] * (num_agents + 1)
+        for node_id in range(1, num_agents + 1):
+            self.x[node_id], self.y[node_id] = self.random_cell()
+        self.frozen = set()
+        self.game_active = False
+        self.game_over = False
+
+        # Catch bookkeeping, shared with the LCM thread
+        self.collision_sent = {} # Map of node_id to send time of its collision update, until answered or expired
+        self.latencies = []      # Seconds from collision update to FREEZE
+        self.collisions = 0
+        self.freezes = 0
+        self.lost_replies = 0    # Collisions without a FREEZE within reply_timeout
+
+    def random_cell(self):
+        '''
+        Random cell that is not the It's cell
+        '''
+        while True:
+            x, y = self.rng.randrange(self.width), self.rng.randrange(self.height)
+            if (x, y) != (self.it_x, self.it_y):
+                return x, y
+
+    def on_start(self):
+        self.subscribe(self.channel("SYNC_CONFIRM"), self.handle_sync_confirm)
+        self.subscribe(self.channel("FREEZE"), self.handle_freeze)
+        self.subscribe(self.channel("GAMEOVER"), self.handle_game_over)
+
+    def on_stop(self):
+        pass
+
+    def run(self):
+        '''
+        Sync with the GameNode, then step through the rates and report where catches start to drop
+        '''
+        if not self.sync(self.sync_timeout):
+            self.log.error("The GameNode did not start the game. Is it running with --num-not-it %d?", self.num_agents)
+            return
+
+        # Updates go round-robin, so each agent is heard from every num_agents / rate seconds
+        if min(self.rates) * self.agent_timeout < 2 * self.num_agents:
+            self.log.warning("At %.0f updates/s each agent is heard from only every %.1fs; with --agent-timeout %s "
+                             "agents may be marked lost", min(self.rates), self.num_agents / min(self.rates), self.agent_timeout)
+
+        print(f"{'target/s':>9} {'sent/s':>9} {'collisions':>10} {'freezes':>8} {'lost':>6} {'ratio':>6} {'p50 ms':>7} "
+              f"{'p99 ms':>7}")
+        sustained = None
+        drop_point = None
+        for rate in self.rates:
+            result = self.run_step(rate, self.duration)
+            if self.game_over:
+                self.log.warning("The GameNode ended the game (every agent frozen or lost); use more agents or a lower --collision-rate")
+                break
+            ratio = result["freezes"] / result["collisions"] if result["collisions"] else 1.0
+            print(f"{rate:>9.0f} {result['achieved']:>9.0f} {result['collisions']:>10} {result['freezes']:>8} "
+                  f"{result['lost']:>6} {ratio:>6.2f} {result['p50'] * 1e3:>7.1f} {result['p99'] * 1e3:>7.1f}")
+
+            if ratio >= self.min_catch_ratio and result["achieved"] >= 0.95 * rate:
+                sustained = rate
+            elif drop_point is None:
+                drop_point = rate
+
+        print(f"LoadGen: sustained {sustained or 0:.0f} updates/s; "
+              + (f"catches dropped at {drop_point:.0f} updates/s" if drop_point else "no drop point reached"))
+
+    def sync(self, timeout):
+        '''
+        Register every simulated agent with the GameNode and wait for the game to start
+
+        Returns:
+            bool: True once the GameNode confirmed
+        '''
+        request = sync_request_t()
+        deadline = time.monotonic() + timeout
+        while not self.game_active and time.monotonic() < deadline:
+            for node_type, node_id in [(1, 0)] + [(2, node_id) for node_id in range(1, self.num_agents + 1)]:
+                request.node_type = node_type
+                request.node_id = node_id
+                self.publish(self.channel("SYNC_REQUEST"), request)
+            self.publish_it()
+            time.sleep(1)
+        return self.game_active
+
+    def publish_it(self):
+        pose = position_t()
+        pose.node_id = 0
+        pose.x = self.it_x
+        pose.y = self.it_y
+        pose.is_it = 1
+        self.publish(self.channel("POSITION"), pose)
+
+    def step(self, node_id, pose, collide=True):
+        '''
+        Move one agent and publish its position
+
+        Args:
+            node_id (int): Simulated NotIt agent
+            pose (position_t): Reused message
+            collide (bool): Allow this update to land on the It
+        '''
+        if node_id not in self.frozen:
+            if collide and node_id not in self.collision_sent and self.rng.random() < self.collision_rate:
+                # Land exactly on the It and time the GameNode's reply
+                self.x[node_id], self.y[node_id] = self.it_x, self.it_y
+                self.collision_sent[node_id] = time.perf_counter()
+                self.collisions += 1
+            else:
+                dx, dy = self.rng.choice(((0, 1), (0, -1), (1, 0), (-1, 0)))
+                x = min(max(self.x[node_id] + dx, 0), self.width - 1)
+                y = min(max(self.y[node_id] + dy, 0), self.height - 1)
+                if (x, y) != (self.it_x, self.it_y):
+                    self.x[node_id], self.y[node_id] = x, y
+
+        pose.node_id = node_id
+        pose.x = self.x[node_id]
+        pose.y = self.y[node_id]
+        self.publish(self.channel("POSITION"), pose)
+
+    def expire_collisions(self, cutoff):
+        '''
+        Count collisions sent before cutoff and still without a FREEZE as lost replies, and let their agents collide again
+
+        Args:
+            cutoff (float): perf_counter() time
+        '''
+        for node_id, sent_at in list(self.collision_sent.items()):
+            # The LCM thread pops answered collisions too: whichever side pops an entry first owns it
+            if sent_at < cutoff and self.collision_sent.pop(node_id, None) is not None:
+                self.lost_replies += 1
+
+    def run_step(self, rate, duration, grace=1.0):
+        '''
+        Publish position updates at a fixed aggregate rate, round-robin over the agents
+
+        Args:
+            rate (float): Target updates per second
+            duration (float): Seconds to run
+            grace (float): Seconds to wait for outstanding FREEZE replies afterwards, still sending updates
+                so no agent goes silent long enough to be marked lost
+
+        Returns:
+            dict: Achieved rate, collisions sent, freezes received, lost replies and latency percentiles
+        '''
+        collisions_before = self.collisions
+        freezes_before = self.freezes
+        lost_before = self.lost_replies
+        latencies_before = len(self.latencies)
+
+        pose = position_t()
+        pose.is_it = 0
+        tick = 0.01 # Publish in 10ms slices
+        sent = 0
+        node_id = 0
+        start = time.perf_counter()
+        next_tick = start
+
+        while self.running and not self.game_over and time.perf_counter() - start < duration + grace:
+            elapsed = time.perf_counter() - start
+            target = int(rate * (elapsed + tick))
+            while sent < target:
+                node_id = node_id % self.num_agents + 1
+                self.step(node_id, pose, collide=elapsed < duration)
+                sent += 1
+            self.publish_it()
+            self.expire_collisions(time.perf_counter() - self.reply_timeout)
+
+            next_tick += tick
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+        elapsed = time.perf_counter() - start
+        self.expire_collisions(math.inf) # Collisions still unanswered after the grace period
+
+        latencies = sorted(self.latencies[latencies_before:])
+        return {
+            "rate": rate,
+            "achieved": sent / elapsed,
+            "collisions": self.collisions - collisions_before,
+            "freezes": self.freezes - freezes_before,
+            "lost": self.lost_replies - lost_before,
+            "p50": percentile(latencies, 50) if latencies else math.nan,
+            "p99": percentile(latencies, 99) if latencies else math.nan,
+        }
+
+    def handle_sync_confirm(self, channel, data):
+        msg = sync_confirm_t.decode(data)
+        if msg.ready == 1:
+            self.game_active = True
+
+    def handle_game_over(self, channel, data):
+        '''
+        Acknowledge game over (and every repeat of it) for the It and every simulated agent, as real agents do,
+        so the GameNode does not wait out its shutdown timeout for them
+        '''
+        msg = gameover_t.decode(data)
+        if not msg.done:
+            return
+        self.game_over = True
+
+        ack = gameover_ack_t()
+        ack.session_id = msg.session_id
+        for node_type, node_id in [(1, 0)] + [(2, node_id) for node_id in range(1, self.num_agents + 1)]:
+            ack.node_type = node_type
+            ack.node_id = node_id
+            self.publish(self.channel("GAMEOVER_ACK"), ack)
+        self.linger(GAMEOVER_LINGER)
+
+    def handle_freeze(self, channel, data):
+        msg = freeze_t.decode(data)
+        if msg.node_id in self.frozen:
+            return
+        # A reply to an expired collision still freezes the agent, but it was already counted as lost
+        self.frozen.add(msg.node_id)
+        sent_at = self.collision_sent.pop(msg.node_id, None)
+        if sent_at is not None:
+            self.freezes += 1
+            self.latencies.append(time.perf_counter() - sent_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress-test a running GameNode with synthetic POSITION traffic')
+    parser.add_argument('--width', type=int, default=1000, help='Width of the game board')
+    parser.add_argument('--height', type=int, default=1000, help='Height of the game board')
+    parser.add_argument('--num-agents', type=int, default=10000,
+                        help='Simulated NotIt agents (start the GameNode with the same --num-not-it)')
+    parser.add_argument('--rates', type=float, nargs='+', default=[1000, 2000, 5000, 10000, 20000, 50000],
+                        help='Aggregate update rates to step through (updates per second)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per rate step')
+    parser.add_argument('--collision-rate', type=float, default=0.001, help='Share of updates that land on the It')
+    parser.add_argument('--min-catch-ratio', type=float, default=0.95,
+                        help='A step counts as sustained if at least this share of collisions got a FREEZE')
+    parser.add_argument('--agent-timeout', type=float, default=5.0, help="The GameNode's --agent-timeout")
+    parser.add_argument('--reply-timeout', type=float, default=1.0,
+                        help='Seconds after which a collision without a FREEZE counts as a lost reply')
+    parser.add_argument('--game-id', default=None, help='Game to load when the GameNode hosts several games')
+    parser.add_argument('--batch', action='store_true', help='Pack outbound messages into one datagram per channel per tick')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed')
+    args = parser.parse_args()
+
+    generator = LoadGenerator(args.num_agents, args.width, args.height, args.rates, args.duration,
+                              args.collision_rate, args.min_catch_ratio, args.agent_timeout,
+                              reply_timeout=args.reply_timeout, batch=args.batch, game_id=args.game_id, seed=args.seed)
+    try:
+        generator.launch_node()
+    except KeyboardInterrupt:
+        generator.stop()
+        logs.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# logs.py
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+# Settings picked by the launcher before nodes are forked
+_level = logging.INFO
+_rate = 100.0 # Max records per second per node (None for unlimited)
+_listener = None
+_listener_pid = None
+
+
+class RateLimitFilter(logging.Filter):
+    '''
+    Token bucket per logger name, so one chatty node cannot flood the output.
+    Warnings and errors are never dropped.
+    '''
+
+    def __init__(self, rate, burst=None):
+        '''
+        Args:
+            rate (float): Records per second allowed for each logger
+            burst (float): Bucket size (defaults to one second worth of records)
+        '''
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.buckets = {} # Map of logger name to (tokens, last refill time)
+        self.dropped = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        now = time.monotonic()
+        tokens, last = self.buckets.get(record.name, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+        if tokens < 1:
+            self.buckets[record.name] = (tokens, now)
+            self.dropped += 1
+            return False
+
+        self.buckets[record.name] = (tokens - 1, now)
+        return True
+
+
+def configure(level=logging.INFO, rate=100.0):
+    '''
+    Set the log level and per-node rate limit. Call this in the launcher before nodes are started.
+
+    Args:
+        level (int or str): Minimum level to emit, e.g. "DEBUG" to include per-move messages
+        rate (float): Max records per second per node below WARNING (None for unlimited)
+    '''
+    global _level, _rate
+    _level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    _rate = rate
+
+
+def start():
+    '''
+    Route this process's log records through a queue to a background writer thread.
+    Called once per process; callers never block on stdout.
+    '''
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    if _rate:
+        queue_handler.addFilter(RateLimitFilter(_rate))
+
+    # Drop any handlers inherited from the parent process
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(_level)
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(name)s: %(message)s"))
+    _listener = logging.handlers.QueueListener(records, stream_handler)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+
+def shutdown():
+    '''
+    Flush queued records and stop the background writer thread. Later records are written synchronously.
+    '''
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        for handler in _listener.handlers:
+            root.addHandler(handler)
+
+        _listener = None
+
+
+def get_logger(name):
+    '''
+    Get the logger for a node. Records are prefixed with the name, e.g. "GameNode: ..."
+
+    Args:
+        name (str): Node name
+    '''
+    return logging.getLogger(name)
@@ -10,3 +10,10 @@ from .freeze_t import freeze_t as freeze_t
 from .sync_request_t import sync_request_t as sync_request_t
 from .sync_confirm_t import sync_confirm_t as sync_confirm_t
 from .game_init_t import game_init_t as game_init_t
+from .batch_t import batch_t as batch_t
+from .join_request_t import join_request_t as join_request_t
+from .snapshot_t import snapshot_t as snapshot_t
+from .unfreeze_t import unfreeze_t as unfreeze_t
+from .metrics_t import metrics_t as metrics_t
+from .frozen_set_t import frozen_set_t as frozen_set_t
+from .gameover_ack_t import gameover_ack_t as gameover_ack_t
@@ -0,0 +1,93 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+
+from io import BytesIO
+import struct
+
+class batch_t(object):
+    """ Batch of encoded messages published on one channel in a single datagram """
+
+    __slots__ = ["channel", "num_records", "lengths", "num_bytes", "payload"]
+
+    __typenames__ = ["string", "int16_t", "int16_t", "int32_t", "byte"]
+
+    __dimensions__ = [None, None, ["num_records"], None, ["num_bytes"]]
+
+    def __init__(self):
+        self.channel = ""
+        """ LCM Type: string """
+        self.num_records = 0
+        """
+        channel the records were published on
+        LCM Type: int16_t
+        """
+
+        self.lengths = []
+        """ LCM Type: int16_t[num_records] """
+        self.num_bytes = 0
+        """
+        encoded size of each record
+        LCM Type: int32_t
+        """
+
+        self.payload = b""
+        """ LCM Type: byte[num_bytes] """
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(batch_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        __channel_encoded = self.channel.encode('utf-8')
+        buf.write(struct.pack('>I', len(__channel_encoded)+1))
+        buf.write(__channel_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">h", self.num_records))
+        buf.write(struct.pack('>%dh' % self.num_records, *self.lengths[:self.num_records]))
+        buf.write(struct.pack(">i", self.num_bytes))
+        buf.write(bytearray(self.payload[:self.num_bytes]))
+
+    @staticmethod
+    def decode(data: bytes):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != batch_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return batch_t._decode_one(buf)
+
+    @staticmethod
+    def _decode_one(buf):
+        self = batch_t()
+        __channel_len = struct.unpack('>I', buf.read(4))[0]
+        self.channel = buf.read(__channel_len)[:-1].decode('utf-8', 'replace')
+        self.num_records = struct.unpack(">h", buf.read(2))[0]
+        self.lengths = struct.unpack('>%dh' % self.num_records, buf.read(self.num_records * 2))
+        self.num_bytes = struct.unpack(">i", buf.read(4))[0]
+        self.payload = buf.read(self.num_bytes)
+        return self
+
+    @staticmethod
+    def _get_hash_recursive(parents):
+        if batch_t in parents: return 0
+        tmphash = (0x2d133dc0ad0363b6) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _packed_fingerprint = None
+
+    @staticmethod
+    def _get_packed_fingerprint():
+        if batch_t._packed_fingerprint is None:
+            batch_t._packed_fingerprint = struct.pack(">Q", batch_t._get_hash_recursive([]))
+        return batch_t._packed_fingerprint
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", batch_t._get_packed_fingerprint())[0]
+
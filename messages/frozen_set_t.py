@@ -0,0 +1,111 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+
+from io import BytesIO
+import struct
+
+class frozen_set_t(object):
+    """ Authoritative frozen set of a game: deltas between keyframes that carry the whole set as a bitmap """
+
+    __slots__ = ["epoch", "version", "keyframe", "num_frozen", "frozen", "num_unfrozen", "unfrozen", "num_bytes", "bitmap"]
+
+    __typenames__ = ["int64_t", "int64_t", "int8_t", "int32_t", "int32_t", "int32_t", "int32_t", "int32_t", "byte"]
+
+    __dimensions__ = [None, None, None, None, ["num_frozen"], None, ["num_unfrozen"], None, ["num_bytes"]]
+
+    def __init__(self):
+        self.epoch = 0
+        """ LCM Type: int64_t """
+        self.version = 0
+        """
+        random per GameNode run; a new epoch is only joined at a keyframe
+        LCM Type: int64_t
+        """
+
+        self.keyframe = 0
+        """
+        increases with every delta; a delta applies on top of version - 1
+        LCM Type: int8_t
+        """
+
+        self.num_frozen = 0
+        """
+        1: bitmap holds the whole set at this version; 0: delta
+        LCM Type: int32_t
+        """
+
+        self.frozen = []
+        """ LCM Type: int32_t[num_frozen] """
+        self.num_unfrozen = 0
+        """
+        delta: node ids frozen since version - 1
+        LCM Type: int32_t
+        """
+
+        self.unfrozen = []
+        """ LCM Type: int32_t[num_unfrozen] """
+        self.num_bytes = 0
+        """
+        delta: node ids rescued since version - 1
+        LCM Type: int32_t
+        """
+
+        self.bitmap = b""
+        """ LCM Type: byte[num_bytes] """
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(frozen_set_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">qqbi", self.epoch, self.version, self.keyframe, self.num_frozen))
+        buf.write(struct.pack('>%di' % self.num_frozen, *self.frozen[:self.num_frozen]))
+        buf.write(struct.pack(">i", self.num_unfrozen))
+        buf.write(struct.pack('>%di' % self.num_unfrozen, *self.unfrozen[:self.num_unfrozen]))
+        buf.write(struct.pack(">i", self.num_bytes))
+        buf.write(bytearray(self.bitmap[:self.num_bytes]))
+
+    @staticmethod
+    def decode(data: bytes):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != frozen_set_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return frozen_set_t._decode_one(buf)
+
+    @staticmethod
+    def _decode_one(buf):
+        self = frozen_set_t()
+        self.epoch, self.version, self.keyframe, self.num_frozen = struct.unpack(">qqbi", buf.read(21))
+        self.frozen = struct.unpack('>%di' % self.num_frozen, buf.read(self.num_frozen * 4))
+        self.num_unfrozen = struct.unpack(">i", buf.read(4))[0]
+        self.unfrozen = struct.unpack('>%di' % self.num_unfrozen, buf.read(self.num_unfrozen * 4))
+        self.num_bytes = struct.unpack(">i", buf.read(4))[0]
+        self.bitmap = buf.read(self.num_bytes)
+        return self
+
+    @staticmethod
+    def _get_hash_recursive(parents):
+        if frozen_set_t in parents: return 0
+        tmphash = (0xc4aa7770b2ea7d7) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _packed_fingerprint = None
+
+    @staticmethod
+    def _get_packed_fingerprint():
+        if frozen_set_t._packed_fingerprint is None:
+            frozen_set_t._packed_fingerprint = struct.pack(">Q", frozen_set_t._get_hash_recursive([]))
+        return frozen_set_t._packed_fingerprint
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", frozen_set_t._get_packed_fingerprint())[0]
+
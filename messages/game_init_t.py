@@ -8,13 +8,13 @@ from io import BytesIO
 import struct
 
 class game_init_t(object):
-    """ Game initialization params """
+    """ Game initialization params, sent in reply to a join request """
 
-    __slots__ = ["width", "height", "num_not_it"]
+    __slots__ = ["width", "height", "num_not_it", "request_id", "first_node_id", "num_ids"]
 
-    __typenames__ = ["int32_t", "int32_t", "int32_t"]
+    __typenames__ = ["int32_t", "int32_t", "int32_t", "int64_t", "int32_t", "int32_t"]
 
-    __dimensions__ = [None, None, None]
+    __dimensions__ = [None, None, None, None, None, None]
 
     def __init__(self):
         self.width = 0
@@ -31,6 +31,20 @@ class game_init_t(object):
         LCM Type: int32_t
         """
 
+        self.request_id = 0
+        """
+        Node ids assigned to the requester: [first_node_id, first_node_id + num_ids)
+        LCM Type: int64_t
+        """
+
+        self.first_node_id = 0
+        """
+        echoes join_request_t.request_id
+        LCM Type: int32_t
+        """
+
+        self.num_ids = 0
+        """ LCM Type: int32_t """
 
     def encode(self):
         buf = BytesIO()
@@ -39,7 +53,7 @@ class game_init_t(object):
         return buf.getvalue()
 
     def _encode_one(self, buf):
-        buf.write(struct.pack(">iii", self.width, self.height, self.num_not_it))
+        buf.write(struct.pack(">iiiqii", self.width, self.height, self.num_not_it, self.request_id, self.first_node_id, self.num_ids))
 
     @staticmethod
     def decode(data: bytes):
@@ -54,13 +68,13 @@ class game_init_t(object):
     @staticmethod
     def _decode_one(buf):
         self = game_init_t()
-        self.width, self.height, self.num_not_it = struct.unpack(">iii", buf.read(12))
+        self.width, self.height, self.num_not_it, self.request_id, self.first_node_id, self.num_ids = struct.unpack(">iiiqii", buf.read(28))
         return self
 
     @staticmethod
     def _get_hash_recursive(parents):
         if game_init_t in parents: return 0
-        tmphash = (0x8a76c277f5979e2e) & 0xffffffffffffffff
+        tmphash = (0xcb4984d79e279b94) & 0xffffffffffffffff
         tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
         return tmphash
     _packed_fingerprint = None
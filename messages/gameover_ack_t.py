@@ -0,0 +1,77 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+
+from io import BytesIO
+import struct
+
+class gameover_ack_t(object):
+    """ Acknowledgment of a game over, sent by an agent right before it exits """
+
+    __slots__ = ["session_id", "node_type", "node_id"]
+
+    __typenames__ = ["int64_t", "int8_t", "int32_t"]
+
+    __dimensions__ = [None, None, None]
+
+    def __init__(self):
+        self.session_id = 0
+        """ LCM Type: int64_t """
+        self.node_type = 0
+        """
+        session_id of the acknowledged gameover_t
+        LCM Type: int8_t
+        """
+
+        self.node_id = 0
+        """
+        1: ItNode; 2: NotItNode
+        LCM Type: int32_t
+        """
+
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(gameover_ack_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">qbi", self.session_id, self.node_type, self.node_id))
+
+    @staticmethod
+    def decode(data: bytes):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != gameover_ack_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return gameover_ack_t._decode_one(buf)
+
+    @staticmethod
+    def _decode_one(buf):
+        self = gameover_ack_t()
+        self.session_id, self.node_type, self.node_id = struct.unpack(">qbi", buf.read(13))
+        return self
+
+    @staticmethod
+    def _get_hash_recursive(parents):
+        if gameover_ack_t in parents: return 0
+        tmphash = (0x9d52799be197ba03) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _packed_fingerprint = None
+
+    @staticmethod
+    def _get_packed_fingerprint():
+        if gameover_ack_t._packed_fingerprint is None:
+            gameover_ack_t._packed_fingerprint = struct.pack(">Q", gameover_ack_t._get_hash_recursive([]))
+        return gameover_ack_t._packed_fingerprint
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", gameover_ack_t._get_packed_fingerprint())[0]
+
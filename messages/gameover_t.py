@@ -10,15 +10,21 @@ import struct
 class gameover_t(object):
     """ Game over message to signal end of game """
 
-    __slots__ = ["done"]
+    __slots__ = ["done", "session_id"]
 
-    __typenames__ = ["int8_t"]
+    __typenames__ = ["int8_t", "int64_t"]
 
-    __dimensions__ = [None]
+    __dimensions__ = [None, None]
 
     def __init__(self):
         self.done = 0
         """ LCM Type: int8_t """
+        self.session_id = 0
+        """
+        1: done, 0: not done
+        LCM Type: int64_t
+        """
+
 
     def encode(self):
         buf = BytesIO()
@@ -27,7 +33,7 @@ class gameover_t(object):
         return buf.getvalue()
 
     def _encode_one(self, buf):
-        buf.write(struct.pack(">b", self.done))
+        buf.write(struct.pack(">bq", self.done, self.session_id))
 
     @staticmethod
     def decode(data: bytes):
@@ -42,13 +48,13 @@ class gameover_t(object):
     @staticmethod
     def _decode_one(buf):
         self = gameover_t()
-        self.done = struct.unpack(">b", buf.read(1))[0]
+        self.done, self.session_id = struct.unpack(">bq", buf.read(9))
         return self
 
     @staticmethod
     def _get_hash_recursive(parents):
         if gameover_t in parents: return 0
-        tmphash = (0x90e9a182fec1ae12) & 0xffffffffffffffff
+        tmphash = (0xac39afa5d9f24cc4) & 0xffffffffffffffff
         tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
         return tmphash
     _packed_fingerprint = None
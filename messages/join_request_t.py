@@ -0,0 +1,77 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+
+from io import BytesIO
+import struct
+
+class join_request_t(object):
+    """ Request to join a game from a standalone agent process or agent-host shard """
+
+    __slots__ = ["request_id", "node_type", "num_ids"]
+
+    __typenames__ = ["int64_t", "int8_t", "int32_t"]
+
+    __dimensions__ = [None, None, None]
+
+    def __init__(self):
+        self.request_id = 0
+        """ LCM Type: int64_t """
+        self.node_type = 0
+        """
+        random nonce chosen by the requester
+        LCM Type: int8_t
+        """
+
+        self.num_ids = 0
+        """
+        1: ItNode; 2: NotItNode
+        LCM Type: int32_t
+        """
+
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(join_request_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">qbi", self.request_id, self.node_type, self.num_ids))
+
+    @staticmethod
+    def decode(data: bytes):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != join_request_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return join_request_t._decode_one(buf)
+
+    @staticmethod
+    def _decode_one(buf):
+        self = join_request_t()
+        self.request_id, self.node_type, self.num_ids = struct.unpack(">qbi", buf.read(13))
+        return self
+
+    @staticmethod
+    def _get_hash_recursive(parents):
+        if join_request_t in parents: return 0
+        tmphash = (0xf2f6cca6895f9850) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _packed_fingerprint = None
+
+    @staticmethod
+    def _get_packed_fingerprint():
+        if join_request_t._packed_fingerprint is None:
+            join_request_t._packed_fingerprint = struct.pack(">Q", join_request_t._get_hash_recursive([]))
+        return join_request_t._packed_fingerprint
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", join_request_t._get_packed_fingerprint())[0]
+
@@ -0,0 +1,98 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+
+from io import BytesIO
+import struct
+
+class metrics_t(object):
+    """ Counters, gauges and histogram buckets of one node, pushed to the metrics collector """
+
+    __slots__ = ["node", "pid", "num_series", "names", "values"]
+
+    __typenames__ = ["string", "int64_t", "int32_t", "string", "double"]
+
+    __dimensions__ = [None, None, None, ["num_series"], ["num_series"]]
+
+    def __init__(self):
+        self.node = ""
+        """ LCM Type: string """
+        self.pid = 0
+        """
+        node name, e.g. "GameNode" or "NotItNode 0/3"
+        LCM Type: int64_t
+        """
+
+        self.num_series = 0
+        """ LCM Type: int32_t """
+        self.names = []
+        """ LCM Type: string[num_series] """
+        self.values = []
+        """
+        series in Prometheus syntax, e.g. freezetag_messages_in_total{channel="POSITION"}
+        LCM Type: double[num_series]
+        """
+
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(metrics_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        __node_encoded = self.node.encode('utf-8')
+        buf.write(struct.pack('>I', len(__node_encoded)+1))
+        buf.write(__node_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">qi", self.pid, self.num_series))
+        for i0 in range(self.num_series):
+            __names_encoded = self.names[i0].encode('utf-8')
+            buf.write(struct.pack('>I', len(__names_encoded)+1))
+            buf.write(__names_encoded)
+            buf.write(b"\0")
+        buf.write(struct.pack('>%dd' % self.num_series, *self.values[:self.num_series]))
+
+    @staticmethod
+    def decode(data: bytes):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != metrics_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return metrics_t._decode_one(buf)
+
+    @staticmethod
+    def _decode_one(buf):
+        self = metrics_t()
+        __node_len = struct.unpack('>I', buf.read(4))[0]
+        self.node = buf.read(__node_len)[:-1].decode('utf-8', 'replace')
+        self.pid, self.num_series = struct.unpack(">qi", buf.read(12))
+        self.names = []
+        for i0 in range(self.num_series):
+            __names_len = struct.unpack('>I', buf.read(4))[0]
+            self.names.append(buf.read(__names_len)[:-1].decode('utf-8', 'replace'))
+        self.values = struct.unpack('>%dd' % self.num_series, buf.read(self.num_series * 8))
+        return self
+
+    @staticmethod
+    def _get_hash_recursive(parents):
+        if metrics_t in parents: return 0
+        tmphash = (0x2383b65c5167777) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _packed_fingerprint = None
+
+    @staticmethod
+    def _get_packed_fingerprint():
+        if metrics_t._packed_fingerprint is None:
+            metrics_t._packed_fingerprint = struct.pack(">Q", metrics_t._get_hash_recursive([]))
+        return metrics_t._packed_fingerprint
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", metrics_t._get_packed_fingerprint())[0]
+
@@ -0,0 +1,107 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+
+from io import BytesIO
+import struct
+
+class snapshot_t(object):
+    """ Referee state for viewer processes, published a few times per second """
+
+    __slots__ = ["version", "width", "height", "num_not_it", "frozen_count", "position_count", "game_over", "num_agents", "node_ids", "xs", "ys", "flags"]
+
+    __typenames__ = ["int64_t", "int32_t", "int32_t", "int32_t", "int32_t", "int64_t", "int8_t", "int32_t", "int32_t", "int32_t", "int32_t", "int8_t"]
+
+    __dimensions__ = [None, None, None, None, None, None, None, None, ["num_agents"], ["num_agents"], ["num_agents"], ["num_agents"]]
+
+    def __init__(self):
+        self.version = 0
+        """ LCM Type: int64_t """
+        self.width = 0
+        """
+        agent table version, increases with every change
+        LCM Type: int32_t
+        """
+
+        self.height = 0
+        """ LCM Type: int32_t """
+        self.num_not_it = 0
+        """ LCM Type: int32_t """
+        self.frozen_count = 0
+        """ LCM Type: int32_t """
+        self.position_count = 0
+        """ LCM Type: int64_t """
+        self.game_over = 0
+        """
+        position messages processed so far
+        LCM Type: int8_t
+        """
+
+        self.num_agents = 0
+        """
+        1 once the game has ended
+        LCM Type: int32_t
+        """
+
+        self.node_ids = []
+        """ LCM Type: int32_t[num_agents] """
+        self.xs = []
+        """ LCM Type: int32_t[num_agents] """
+        self.ys = []
+        """ LCM Type: int32_t[num_agents] """
+        self.flags = []
+        """ LCM Type: int8_t[num_agents] """
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(snapshot_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">qiiiiqbi", self.version, self.width, self.height, self.num_not_it, self.frozen_count, self.position_count, self.game_over, self.num_agents))
+        buf.write(struct.pack('>%di' % self.num_agents, *self.node_ids[:self.num_agents]))
+        buf.write(struct.pack('>%di' % self.num_agents, *self.xs[:self.num_agents]))
+        buf.write(struct.pack('>%di' % self.num_agents, *self.ys[:self.num_agents]))
+        buf.write(struct.pack('>%db' % self.num_agents, *self.flags[:self.num_agents]))
+
+    @staticmethod
+    def decode(data: bytes):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != snapshot_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return snapshot_t._decode_one(buf)
+
+    @staticmethod
+    def _decode_one(buf):
+        self = snapshot_t()
+        self.version, self.width, self.height, self.num_not_it, self.frozen_count, self.position_count, self.game_over, self.num_agents = struct.unpack(">qiiiiqbi", buf.read(37))
+        self.node_ids = struct.unpack('>%di' % self.num_agents, buf.read(self.num_agents * 4))
+        self.xs = struct.unpack('>%di' % self.num_agents, buf.read(self.num_agents * 4))
+        self.ys = struct.unpack('>%di' % self.num_agents, buf.read(self.num_agents * 4))
+        self.flags = struct.unpack('>%db' % self.num_agents, buf.read(self.num_agents))
+        return self
+
+    @staticmethod
+    def _get_hash_recursive(parents):
+        if snapshot_t in parents: return 0
+        tmphash = (0xb9d8cf8d2c15cd2e) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _packed_fingerprint = None
+
+    @staticmethod
+    def _get_packed_fingerprint():
+        if snapshot_t._packed_fingerprint is None:
+            snapshot_t._packed_fingerprint = struct.pack(">Q", snapshot_t._get_hash_recursive([]))
+        return snapshot_t._packed_fingerprint
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", snapshot_t._get_packed_fingerprint())[0]
+
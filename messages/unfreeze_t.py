@@ -0,0 +1,67 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+
+from io import BytesIO
+import struct
+
+class unfreeze_t(object):
+    """ Message to unfreeze a NotIt rescued by a teammate """
+
+    __slots__ = ["node_id", "rescuer_id"]
+
+    __typenames__ = ["int32_t", "int32_t"]
+
+    __dimensions__ = [None, None]
+
+    def __init__(self):
+        self.node_id = 0
+        """ LCM Type: int32_t """
+        self.rescuer_id = 0
+        """ LCM Type: int32_t """
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(unfreeze_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">ii", self.node_id, self.rescuer_id))
+
+    @staticmethod
+    def decode(data: bytes):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != unfreeze_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return unfreeze_t._decode_one(buf)
+
+    @staticmethod
+    def _decode_one(buf):
+        self = unfreeze_t()
+        self.node_id, self.rescuer_id = struct.unpack(">ii", buf.read(8))
+        return self
+
+    @staticmethod
+    def _get_hash_recursive(parents):
+        if unfreeze_t in parents: return 0
+        tmphash = (0xb2b7389cb4042b5d) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _packed_fingerprint = None
+
+    @staticmethod
+    def _get_packed_fingerprint():
+        if unfreeze_t._packed_fingerprint is None:
+            unfreeze_t._packed_fingerprint = struct.pack(">Q", unfreeze_t._get_hash_recursive([]))
+        return unfreeze_t._packed_fingerprint
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", unfreeze_t._get_packed_fingerprint())[0]
+
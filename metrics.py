@@ -0,0 +1,221 @@
+# metrics.py
+import bisect
+import os
+import time
+
+# Import the messages.lcm
+from messages import metrics_t
+
+# Channel the nodes push their metrics on (shared by all games; the node name tells them apart)
+METRICS_CHANNEL = "METRICS"
+
+# Histogram bucket bounds in seconds, for handler and loop times
+TIME_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+# Push interval in seconds, inherited by the node processes (None disables metrics)
+_interval = None
+
+
+def configure(interval=5.0):
+    '''
+    Make the nodes started by this process push metrics. Call this in the launcher before nodes are started.
+
+    Args:
+        interval (float): Seconds between two pushes per node (None to disable)
+    '''
+    global _interval
+    _interval = interval
+
+
+def create(node_name):
+    '''
+    Metrics registry for a node, or None if metrics are disabled
+    '''
+    return MetricsRegistry(node_name, _interval) if _interval else None
+
+
+def read_process_stats(pid="self"):
+    '''
+    CPU time and resident memory of a process, from /proc (Linux)
+
+    Returns:
+        tuple: (CPU seconds used so far, RSS in bytes), or None if they are not available
+    '''
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    # utime and stime are fields 14 and 15 of stat; the split starts at field 3
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return cpu, resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def series(name, labels=None):
+    '''
+    Series name in Prometheus syntax, e.g. series("x_total", {"channel": "POSITION"}) is 'x_total{channel="POSITION"}'
+    '''
+    if not labels:
+        return name
+    pairs = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    return f"{name}{{{pairs}}}"
+
+
+class Histogram:
+    '''
+    Fixed-bucket histogram: an observation is one binary search and two additions
+    '''
+
+    def __init__(self, buckets=TIME_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Last slot counts observations above every bound
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def export(self, name, labels=None):
+        '''
+        Cumulative bucket, sum and count series
+
+        Returns:
+            list: (series, value) pairs
+        '''
+        labels = labels or {}
+        result = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            result.append((series(f"{name}_bucket", {**labels, "le": bound}), cumulative))
+        result.append((series(f"{name}_sum", labels), self.sum))
+        result.append((series(f"{name}_count", labels), self.count))
+        return result
+
+
+class ChannelStats:
+    '''
+    Traffic on one channel in one direction
+    '''
+    __slots__ = ("messages", "bytes", "handler_time")
+
+    def __init__(self, timed):
+        self.messages = 0
+        self.bytes = 0
+        self.handler_time = Histogram() if timed else None
+
+
+class MetricsRegistry:
+    '''
+    Counters and histograms of one node, pushed to the collector on the METRICS channel.
+
+    The hot paths only touch plain integers and lists: every received message adds to the counters of its
+    channel and one histogram bucket for its handler time, every published message adds to the counters of
+    its channel. Series names and the metrics_t message are only built once per push interval.
+    Components add their own values (e.g. catches per game) through collector callbacks, called at push time.
+    '''
+
+    def __init__(self, node_name, interval=5.0):
+        '''
+        Args:
+            node_name (str): Name the collector shows the node under
+            interval (float): Seconds between two pushes
+        '''
+        self.node_name = node_name
+        self.interval = interval
+        self.received = {}  # Map of channel to ChannelStats of inbound messages
+        self.sent = {}      # Map of channel to ChannelStats of outbound messages
+        self.loop_time = Histogram() # Duration of one pass of the handling loop
+        self.collectors = [] # Callables returning (name, labels, value) triples at push time
+        self._next_push = 0.0
+
+    def instrument(self, handler):
+        '''
+        Wrap a message handler to count its messages and time it
+        '''
+        received = self.received
+        perf_counter = time.perf_counter
+
+        def timed_handler(channel, data):
+            start = perf_counter()
+            handler(channel, data)
+            elapsed = perf_counter() - start
+
+            stats = received.get(channel)
+            if stats is None:
+                stats = received[channel] = ChannelStats(timed=True)
+            stats.messages += 1
+            stats.bytes += len(data)
+            stats.handler_time.observe(elapsed)
+        return timed_handler
+
+    def count_sent(self, channel, size):
+        '''
+        Count a published message
+        '''
+        stats = self.sent.get(channel)
+        if stats is None:
+            stats = self.sent[channel] = ChannelStats(timed=False)
+        stats.messages += 1
+        stats.bytes += size
+
+    def add_collector(self, collect):
+        '''
+        Register a callable that returns extra (name, labels, value) triples at push time
+        '''
+        self.collectors.append(collect)
+
+    def due(self, now):
+        '''
+        Check whether the next push is due (and schedule the one after it)
+        '''
+        if now < self._next_push:
+            return False
+        self._next_push = now + self.interval
+        return True
+
+    def export(self):
+        '''
+        Every series of this node
+
+        Returns:
+            list: (series, value) pairs
+        '''
+        result = []
+        for channel, stats in list(self.received.items()):
+            labels = {"channel": channel}
+            result.append((series("freezetag_messages_in_total", labels), stats.messages))
+            result.append((series("freezetag_bytes_in_total", labels), stats.bytes))
+            result.extend(stats.handler_time.export("freezetag_handler_seconds", labels))
+        for channel, stats in list(self.sent.items()):
+            labels = {"channel": channel}
+            result.append((series("freezetag_messages_out_total", labels), stats.messages))
+            result.append((series("freezetag_bytes_out_total", labels), stats.bytes))
+        result.extend(self.loop_time.export("freezetag_loop_seconds"))
+
+        process = read_process_stats()
+        if process is not None:
+            result.append(("freezetag_cpu_seconds_total", process[0]))
+            result.append(("freezetag_rss_bytes", process[1]))
+
+        for collect in self.collectors:
+            result.extend((series(name, labels), value) for name, labels, value in collect())
+        return result
+
+    def message(self):
+        '''
+        Build the metrics_t message for the collector
+        '''
+        exported = self.export()
+        msg = metrics_t()
+        msg.node = self.node_name
+        msg.pid = os.getpid()
+        msg.num_series = len(exported)
+        msg.names = [name for name, _ in exported]
+        msg.values = [float(value) for _, value in exported]
+        return msg
@@ -1,36 +1,261 @@
 # node.py
 from abc import abstractmethod
+import re
 import lcm
 import threading
+import time
+from functools import partial
+
+import logs
+import metrics
+from messages import batch_t
+
+# Prefix of the channels carrying batch_t envelopes and the datagram budget for one batch
+BATCH_CHANNEL = "BATCH"
+BATCH_MAX_BYTES = 1400
+
+# Seconds a stopping agent keeps answering game over after the last one it saw. The GameNode repeats game over
+# every 100ms until every agent acknowledged it, so a lost ack gets another chance.
+GAMEOVER_LINGER = 0.3
+
+
+def batch_channel(channel):
+    """
+        Channel carrying the batches of a channel (or channel pattern), e.g. "POSITION/7" becomes "BATCH/POSITION/7",
+        so LCM only delivers batches to nodes that listen on the channel inside.
+    """
+    return f"{BATCH_CHANNEL}/{channel}"
+
+
+def position_key(data):
+    """
+        Coalescing key for encoded position_t messages: the raw node_id bytes that follow the 8-byte fingerprint.
+    """
+    return data[8:12]
+
+
+def channel_name(name, game_id=None):
+    """
+        Namespace a channel by game id, e.g. "POSITION" becomes "POSITION/7". Without a game id the global name is used.
+    """
+    return name if game_id is None else f"{name}/{game_id}"
+
+
+def channel_game_id(channel):
+    """
+        Game id of a namespaced channel, or None for a global channel.
+    """
+    _, sep, game_id = channel.partition("/")
+    return game_id if sep else None
+
 
 class Node:
-    def __init__(self):
+    def __init__(self, coalesce=False, max_drain=1000, batch=False, game_id=None):
         self.running = False
+        self._wake = threading.Event() # Set by request_stop to cut short a sleep() in run()
+        self._handling = False         # The LCM thread runs until stop(), which may linger after run() returned
+        self._linger_until = 0.0
+        self.game_id = game_id   # Namespaces this node's channels (None for the global channels)
+        self.published_count = 0 # Messages published
+        self.datagram_count = 0  # LCM publishes actually sent (one per message, or one per batch)
+
+        # Optional latest-value-wins coalescing of inbound messages
+        self.coalesce = coalesce
+        self.max_drain = max_drain # Max messages handled from the socket in one pass
+        self.coalesced_count = 0   # Messages dropped because a newer one replaced them
+        self._pending = {}         # Map of (channel, key) to (handler, data)
+
+        # Local subscriptions, used to dispatch records unpacked from batches
+        self._handlers = []        # List of (compiled channel regex, handler)
+        self._handler_cache = {}   # Map of channel to matching handlers
 
-    def subscribe(self, channel, handler):
-        self.lc.subscribe(channel, handler)
+        # Optional outbound batching: records are queued per channel and flushed every tick
+        self.batch = batch
+        self._outbox = {}          # Map of channel to list of encoded records
+        self._outbox_bytes = {}    # Map of channel to queued payload size
+        self._outbox_lock = threading.Lock()
+
+        # Optional metrics pushed to the collector (see metrics.configure), created in launch_node
+        self.metrics = None
+
+    def subscribe(self, channel, handler, coalesce_key=None, queue_capacity=None):
+        """
+            Subscribe a handler to a channel. If coalescing is enabled and coalesce_key is given, the handler
+            only sees the newest message per (channel, coalesce_key(data)) from each pass of the handling loop.
+            LCM drops messages beyond a queue of 30 per subscription; pass queue_capacity for channels that
+            receive larger bursts.
+        """
+        if self.coalesce and coalesce_key is not None:
+            handler = partial(self._queue_coalesced, handler, coalesce_key)
+        if self.metrics is not None:
+            handler = self.metrics.instrument(handler)
+
+        # Batches from other nodes come on a channel of their own per channel they carry
+        self._handlers.append((re.compile(channel), handler))
+        self._handler_cache.clear()
+        subscriptions = [self.lc.subscribe(channel, handler), self.lc.subscribe(batch_channel(channel), self._handle_batch)]
+        if queue_capacity is not None:
+            for subscription in subscriptions:
+                subscription.set_queue_capacity(queue_capacity)
+
+    def _queue_coalesced(self, handler, coalesce_key, channel, data):
+        key = (channel, coalesce_key(data))
+        if key in self._pending:
+            self.coalesced_count += 1
+        self._pending[key] = (handler, data)
+
+    def _dispatch_coalesced(self):
+        pending, self._pending = self._pending, {}
+        for (channel, _), (handler, data) in pending.items():
+            handler(channel, data)
+
+    def channel(self, name):
+        """
+            Name of a channel in this node's game
+        """
+        return channel_name(name, self.game_id)
 
     def publish(self, channel, msg):
-        self.lc.publish(channel, msg.encode())
+        data = msg.encode()
+        self.published_count += 1
+        if self.metrics is not None:
+            self.metrics.count_sent(channel, len(data))
+
+        if not self.batch:
+            self.lc.publish(channel, data)
+            self.datagram_count += 1
+            return
+
+        with self._outbox_lock:
+            queued = self._outbox_bytes.get(channel, 0)
+            # LCM header and batch_t envelope: 33 bytes plus the channel name and 2 bytes per record length
+            overhead = 33 + len(channel) + 2 * len(self._outbox.get(channel, ()))
+            if queued and overhead + queued + len(data) + 2 > BATCH_MAX_BYTES:
+                self._send_batch(channel, self._outbox.pop(channel))
+                queued = 0
+
+            self._outbox.setdefault(channel, []).append(data)
+            self._outbox_bytes[channel] = queued + len(data)
+
+    def flush(self):
+        """
+            Send every queued outbound record. Called once per pass of the handling loop and when the node stops.
+        """
+        if not self._outbox:
+            return
+
+        with self._outbox_lock:
+            outbox, self._outbox = self._outbox, {}
+            self._outbox_bytes = {}
+            for channel, records in outbox.items():
+                self._send_batch(channel, records)
+
+    def _send_batch(self, channel, records):
+        # A lone record goes out as a plain message, no envelope needed
+        if len(records) == 1:
+            self.lc.publish(channel, records[0])
+        else:
+            batch = batch_t()
+            batch.channel = channel
+            batch.num_records = len(records)
+            batch.lengths = [len(record) for record in records]
+            batch.payload = b"".join(records)
+            batch.num_bytes = len(batch.payload)
+            self.lc.publish(batch_channel(channel), batch.encode())
+        self.datagram_count += 1
+
+    def _handle_batch(self, channel, data):
+        batch = batch_t.decode(data)
+
+        handlers = self._handler_cache.get(batch.channel)
+        if handlers is None:
+            handlers = [handler for pattern, handler in self._handlers if pattern.fullmatch(batch.channel)]
+            self._handler_cache[batch.channel] = handlers
+        if not handlers:
+            return
+
+        payload = memoryview(batch.payload)
+        offset = 0
+        for length in batch.lengths:
+            record = bytes(payload[offset:offset + length])
+            offset += length
+            for handler in handlers:
+                handler(batch.channel, record)
 
     def _handle_loop(self):
-        while self.running:
-            self.lc.handle_timeout(10)  # 10ms timeout to check for messages
+        while self._handling:
+            # 10ms timeout to check for messages, then drain whatever else is already queued in one pass
+            handled = self.lc.handle_timeout(10)
+            start = time.perf_counter()
+            if handled > 0:
+                drained = 1
+                while drained < self.max_drain and self.lc.handle_timeout(0) > 0:
+                    drained += 1
+
+            if self._pending:
+                self._dispatch_coalesced()
+            self.on_tick()
+            self.flush()
+
+            if self.metrics is not None:
+                self._push_metrics(start)
+
+    def _push_metrics(self, start):
+        # Time of this pass after the first message (or the 10ms timeout): the drain, ticks and flush
+        now = time.perf_counter()
+        self.metrics.loop_time.observe(now - start)
+        if self.metrics.due(now):
+            self.lc.publish(metrics.METRICS_CHANNEL, self.metrics.message().encode())
+
+    def _node_metrics(self):
+        return [("freezetag_datagrams_out_total", None, self.datagram_count),
+                ("freezetag_coalesced_total", None, self.coalesced_count)]
+
+    def request_stop(self):
+        """
+            Ask the node to stop, e.g. from a handler: run() loops waiting in sleep() return right away.
+        """
+        self.running = False
+        self._wake.set()
+
+    def sleep(self, seconds):
+        """
+            Wait in run() between two steps, returning early if the node is asked to stop.
+        """
+        self._wake.wait(seconds)
+
+    def linger(self, seconds):
+        """
+            Keep handling messages for at least this long, even once run() has returned, e.g. to answer repeats
+            of a message acknowledged before stopping. Calls from handlers extend the deadline.
+        """
+        self._linger_until = max(self._linger_until, time.monotonic() + seconds)
 
     def stop(self):
         self.running = False
+        while time.monotonic() < self._linger_until:
+            time.sleep(min(0.01, max(0.0, self._linger_until - time.monotonic())))
+        self._handling = False
         
         if self.thread.is_alive():
             try:
                 self.thread.join()
             except Exception as e:
-                print(f"Error joining thread: {e}")
-            
+                logs.get_logger(type(self).__name__).error("Error joining thread: %s", e)
+
+        self.flush()
         self.on_stop()
     
     def launch_node(self):
+        logs.start()
         self.lc = lcm.LCM()
         self.running = True
+        self._handling = True
+
+        log = getattr(self, "log", None)
+        self.metrics = metrics.create(log.name if log is not None else type(self).__name__)
+        if self.metrics is not None:
+            self.metrics.add_collector(self._node_metrics)
         self.on_start()
         
         # Start the LCM handling loop in a background thread.
@@ -39,6 +264,7 @@ class Node:
         
         self.run()
         self.stop()
+        logs.shutdown()
                 
     @abstractmethod 
     def on_start(self):
@@ -54,6 +280,12 @@ class Node:
         """
         pass
     
+    def on_tick(self):
+        """
+            This method is called from the LCM thread after every pass of the handling loop. Put periodic work that touches handler state here.
+        """
+        pass
+
     @abstractmethod
     def on_stop(self):
         """
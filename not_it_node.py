@@ -1,14 +1,14 @@
 # not_it_node.py
-import time
 import random
 # import lcm
-from node import Node
+import logs
+from node import Node, GAMEOVER_LINGER
 
 # Import the messages.lcm
-from messages import position_t, freeze_t, sync_request_t, sync_confirm_t
+from messages import position_t, freeze_t, unfreeze_t, sync_request_t, sync_confirm_t, gameover_t, gameover_ack_t
 
 class NotItNode(Node):
-    def __init__(self, node_id, start_x, start_y, width, height):
+    def __init__(self, node_id, start_x, start_y, width, height, batch=False, game_id=None, evasion=0.0):
         '''
         Initialize a NotItNode
         
@@ -18,8 +18,12 @@ class NotItNode(Node):
             start_y (int): Starting y-coordinate of the NotItNode
             width (int): Width of the board
             height (int): Height of the board
+            batch (bool): Pack outbound messages into one datagram per channel per tick
+            game_id (str): Game to join (None for the global channels)
+            evasion (float): Share of moves that flee from the It instead of picking a random direction
         '''
-        super().__init__()
+        super().__init__(batch=batch, game_id=game_id)
+        self.log = logs.get_logger(f"NotItNode {node_id}" if game_id is None else f"NotItNode {game_id}/{node_id}")
         self.node_id = node_id
         self.x = start_x
         self.y = start_y
@@ -28,24 +32,31 @@ class NotItNode(Node):
         self.frozen = False
         self.game_active = False
 
+        # Evasion: the GameNode relays the It's position on IT_POSITION, one small message per It move
+        self.evasion = evasion
+        self.it_position = None # Last known (x, y) of the It
+
     def on_start(self):
         '''
         Initialize LCM subscriptions and send initial position
         '''
         # Subscribe to synchronization confirmation and freeze events
-        self.subscribe("SYNC_CONFIRM", self.handle_sync_confirm)
-        self.subscribe("FREEZE", self.handle_freeze)
-        self.subscribe("GAME_OVER", self.handle_game_over)
+        self.subscribe(self.channel("SYNC_CONFIRM"), self.handle_sync_confirm)
+        self.subscribe(self.channel("FREEZE"), self.handle_freeze)
+        self.subscribe(self.channel("UNFREEZE"), self.handle_unfreeze)
+        self.subscribe(self.channel("GAMEOVER"), self.handle_game_over)
+        if self.evasion > 0:
+            self.subscribe(self.channel("IT_POSITION"), self.handle_it_position)
 
         # Send sync request to the GameNode
         sync_request = sync_request_t()
         sync_request.node_type = 2 # 2 for NotItNode
         sync_request.node_id = self.node_id
-        self.publish("SYNC_REQUEST", sync_request)
+        self.publish(self.channel("SYNC_REQUEST"), sync_request)
 
         # Send initial position
         self.publish_position()
-        print(f"NotItNode {self.node_id}: Started at position ({self.x}, {self.y})")
+        self.log.debug("Started at position (%d, %d)", self.x, self.y)
 
     def run(self):
         '''
@@ -54,43 +65,65 @@ class NotItNode(Node):
         try:
             # Wait for synchronization confirmation
             while not self.game_active and self.running:
-                time.sleep(0.1)
+                self.sleep(0.1)
 
-            print(f"NotItNode {self.node_id}: Game active, starting movement")
+            self.log.debug("Game active, starting movement")
             
 
-            while not self.frozen and self.running:
-                # NotItNode moves randomly
-                self.move_randomly()
+            while self.running:
+                # NotItNode moves randomly, or away from the It; if frozen, it stays in place until rescued
+                if not self.frozen:
+                    self.move()
                 self.publish_position()
 
                 # Wait for a second before next move
-                time.sleep(1)
-            
-            # If frozen, stay in place but keep publishing position
-            while self.frozen and self.running:
-                self.publish_position()
-                time.sleep(1)
+                self.sleep(1)
 
         except KeyboardInterrupt:
-            print(f"NotItNode {self.node_id}: Interrupted by user")
+            self.log.info("Interrupted by user")
             # self.running = False
         
     def on_stop(self):
         '''
         Stop the NotItNode: Clean up resources
         '''
-        print(f"NotItNode {self.node_id}: Stopping")
+        self.log.debug("Stopping")
         # TODO: check if we need self.running here
         # self.running = False
 
+    def move(self):
+        '''
+        Take one step: away from the It for an `evasion` share of moves (once its position is known), otherwise random
+        '''
+        if self.it_position is not None and random.random() < self.evasion:
+            self.move_away()
+        else:
+            self.move_randomly()
+
+    def move_away(self):
+        '''
+        Move to the adjacent cell furthest from the It.
+
+        On an open board the It-distance field is the Manhattan distance to the It, so the field is known
+        everywhere from the It's position alone and each lookup is O(1). Ties are broken randomly.
+        '''
+        it_x, it_y = self.it_position
+        moves = [(self.x + dx, self.y + dy) for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0))
+                 if 0 <= self.x + dx < self.width and 0 <= self.y + dy < self.height]
+        if not moves:
+            return
+
+        furthest = max(abs(x - it_x) + abs(y - it_y) for x, y in moves)
+        self.x, self.y = random.choice([(x, y) for x, y in moves if abs(x - it_x) + abs(y - it_y) == furthest])
+        self.log.debug("Fled to position (%d, %d)", self.x, self.y)
+
     def move_randomly(self, attempts=0, max_attempts=10):
         '''
         Move to a random adjacent position within the board
         '''
         # Stop if we've tried too many times
         if attempts >= max_attempts:
-            print(f"NotItNode {self.node_id}: Couldn't find a valid move after {max_attempts} attempts, staying at ({self.x}, {self.y})")
+            self.log.debug("Couldn't find a valid move after %d attempts, staying at (%d, %d)", max_attempts, self.x, self.y)
             return
 
         # Possible moves: up, down, left, right (no diagonal moves)
@@ -112,7 +145,7 @@ class NotItNode(Node):
         if 0 <= new_x < self.width and 0 <= new_y < self.height:
             self.x = new_x
             self.y = new_y
-            print(f"NotItNode {self.node_id}: Moved to position ({self.x}, {self.y})")
+            self.log.debug("Moved to position (%d, %d)", self.x, self.y)
 
         else:
             # If the move is out of bounds, try again with an attempt counter
@@ -127,7 +160,7 @@ class NotItNode(Node):
         pose.x = self.x
         pose.y = self.y
         pose.is_it = 0 #NotItNode
-        self.publish("POSITION", pose)
+        self.publish(self.channel("POSITION"), pose)
 
     def handle_sync_confirm(self, channel, data):
         '''
@@ -136,7 +169,7 @@ class NotItNode(Node):
         msg = sync_confirm_t.decode(data)
         if msg.ready == 1:
             self.game_active = True
-            print(f"NotItNode {self.node_id}: Received synchronization confirmation")
+            self.log.debug("Received synchronization confirmation")
 
     def handle_freeze(self, channel, data):
         '''
@@ -149,14 +182,54 @@ class NotItNode(Node):
         msg = freeze_t.decode(data)
         if msg.node_id == self.node_id and not self.frozen:
             self.frozen = True
-            print(f"NotItNode {self.node_id}: I've been frozen!")
+            self.log.info("I've been frozen!")
             # Immediately publish updated position to confirm frozen state
             self.publish_position()
 
+    def handle_unfreeze(self, channel, data):
+        '''
+        Handle unfreeze message from the GameNode, sent when a teammate rescues this node
+
+        Args:
+            channel (str): LCM channel
+            data (bytes): LCM message data
+        '''
+        msg = unfreeze_t.decode(data)
+        if msg.node_id == self.node_id and self.frozen:
+            self.frozen = False
+            self.log.info("Rescued by NotIt node %d!", msg.rescuer_id)
+
+    def handle_it_position(self, channel, data):
+        '''
+        Handle the It position relayed by the GameNode
+
+        Args:
+            channel (str): LCM channel
+            data (bytes): LCM message data
+        '''
+        msg = position_t.decode(data)
+        self.it_position = (msg.x, msg.y)
+
     def handle_game_over(self, channel, data):
         '''
-        Handle game over message from the GameNode
+        Handle game over message from the GameNode: acknowledge it (and every repeat of it), then stop
+
+        Args:
+            channel (str): LCM channel
+            data (bytes): LCM message data
         '''
-        print(f"NotItNode {self.node_id}: Game over!")
-        self.running = False
-        self.stop()
\ No newline at end of file
+        msg = gameover_t.decode(data)
+        if not msg.done:
+            return
+
+        ack = gameover_ack_t()
+        ack.session_id = msg.session_id
+        ack.node_type = 2 # 2 for NotItNode
+        ack.node_id = self.node_id
+        self.publish(self.channel("GAMEOVER_ACK"), ack)
+
+        # Every repeat gets an ack too, in case ours was lost; keep listening a little after the last one
+        self.linger(GAMEOVER_LINGER)
+        if self.running:
+            self.log.debug("Game over!")
+            self.request_stop()
@@ -0,0 +1,230 @@
+# occupancy.py
+
+
+def segment_cells(x0, y0, x1, y1):
+    '''
+    Cells an agent passes through when it moves from (x0, y0) to (x1, y1).
+
+    Agents move one cell at a time along x or y, so the route is walked as a 4-connected line that
+    interleaves x and y steps as evenly as possible. For single steps and straight moves this is the
+    exact route; for a multi-cell jump (coalesced or batched updates) it is the most direct one.
+
+    Returns:
+        tuple: (x, y) cells from the start to the end cell, both included
+    '''
+    dx, dy = abs(x1 - x0), abs(y1 - y0)
+    sx = 1 if x1 > x0 else -1
+    sy = 1 if y1 > y0 else -1
+
+    cells = [(x0, y0)]
+    x, y = x0, y0
+    ix = iy = 0
+    while ix < dx or iy < dy:
+        # Step along the axis that lags behind the straight line
+        if (1 + 2 * ix) * dy < (1 + 2 * iy) * dx:
+            x += sx
+            ix += 1
+        else:
+            y += sy
+            iy += 1
+        cells.append((x, y))
+    return tuple(cells)
+
+
+def paths_meet(a, b):
+    '''
+    Check if two agents that start moving at the same time, one cell per step, meet on the way: they stand
+    on the same cell after the same number of steps, or swap cells in one step. An agent whose path is
+    shorter waits on its last cell.
+
+    Args:
+        a (tuple): Cells of the first agent's move, from segment_cells
+        b (tuple): Cells of the second agent's move
+
+    Returns:
+        bool: True if the agents meet
+    '''
+    last_a, last_b = len(a) - 1, len(b) - 1
+    previous = None
+    for step in range(max(last_a, last_b) + 1):
+        cell_a, cell_b = a[min(step, last_a)], b[min(step, last_b)]
+        if cell_a == cell_b or previous == (cell_b, cell_a):
+            return True
+        previous = (cell_a, cell_b)
+    return False
+
+
+class OccupancyIndex:
+    '''
+    Cell index of the unfrozen NotIt agents and their latest moves, for swept collision checks.
+
+    Every position update is treated as a move from the agent's previous cell to its new one. Moves are
+    stamped with a sequence number in processing order, so a move spans (previous update, this update].
+    The It catches a NotIt if one of them sat still on a cell the other passed, or if their moves overlap
+    in that order and meet on the way (paths_meet): the same cell after the same number of steps, or a
+    swap of cells in one step. That catches agents that swap cells between updates or move several cells
+    per update, and leaves alone a NotIt that stepped off a cell right before the It stepped onto it.
+
+    Updates carry no time within the interval, so overlapping moves are assumed to start together and
+    advance one cell per step. When the real moves were out of step (e.g. one agent's update was delayed or
+    coalesced), a meeting can be missed or reported one step off.
+
+    Lookups go through two maps from cell to NotIt ids: where each NotIt is now, and the cells of its
+    latest move. An It move only visits the cells it passed, instead of every agent.
+    '''
+
+    def __init__(self):
+        self.seq = 0         # Sequence number of the latest move
+        self.cells = {}      # Map of (x, y) to ids of the NotIt agents on that cell
+        self.trails = {}     # Map of (x, y) to ids of the NotIt agents whose latest move passed that cell
+        self.moves = {}      # Map of NotIt id to (cells of its latest move, seq of the previous move, seq)
+        self.it_move = None  # (cells of the It's latest move, seq of the previous move, seq)
+
+    def _next_move(self, previous, x, y):
+        self.seq += 1
+        if previous is None:
+            return ((x, y),), self.seq, self.seq
+        path, _, seq = previous
+        return segment_cells(path[-1][0], path[-1][1], x, y), seq, self.seq
+
+    def move_it(self, x, y):
+        '''
+        Record a move of the It
+
+        Args:
+            x (int): New x-coordinate
+            y (int): New y-coordinate
+
+        Returns:
+            list: Sorted ids of the NotIt agents the It caught on the way
+        '''
+        self.it_move = path, previous_seq, _ = self._next_move(self.it_move, x, y)
+
+        # NotIt agents that moved since the It's previous update are checked step by step; the others
+        # stood on their cell the whole time
+        caught = set()
+        moving = set()
+        for cell in path:
+            for node_id in self.cells.get(cell, ()):
+                if self.moves[node_id][2] > previous_seq:
+                    moving.add(node_id)
+                else:
+                    caught.add(node_id)
+            for node_id in self.trails.get(cell, ()):
+                if self.moves[node_id][2] > previous_seq:
+                    moving.add(node_id)
+        caught.update(node_id for node_id in moving if paths_meet(path, self.moves[node_id][0]))
+        return sorted(caught)
+
+    def move_not_it(self, node_id, x, y):
+        '''
+        Record a move of an unfrozen NotIt agent
+
+        Args:
+            node_id (int): NotIt agent identifier
+            x (int): New x-coordinate
+            y (int): New y-coordinate
+
+        Returns:
+            bool: True if the agent ran into the It on the way
+        '''
+        previous = self.moves.get(node_id)
+        self._remove_cells(node_id, previous)
+        move = path, previous_seq, _ = self._next_move(previous, x, y)
+
+        self.moves[node_id] = move
+        self.cells.setdefault(path[-1], set()).add(node_id)
+        for cell in path:
+            self.trails.setdefault(cell, set()).add(node_id)
+
+        if self.it_move is None:
+            return False
+        it_path, _, it_seq = self.it_move
+        # An It that moved during this move has to meet the agent on the way; a sitting It only covers its own cell
+        if it_seq > previous_seq:
+            return paths_meet(it_path, path)
+        return it_path[-1] in path
+
+    def it_cell(self):
+        '''
+        Cell the It reported last (None before its first update)
+        '''
+        return None if self.it_move is None else self.it_move[0][-1]
+
+    def remove(self, node_id):
+        '''
+        Drop a NotIt agent from the index (e.g. once it is frozen)
+
+        Args:
+            node_id (int): NotIt agent identifier
+        '''
+        self._remove_cells(node_id, self.moves.pop(node_id, None))
+
+    def _remove_cells(self, node_id, move):
+        if move is None:
+            return
+        path = move[0]
+        self._discard(self.cells, path[-1], node_id)
+        for cell in path:
+            self._discard(self.trails, cell, node_id)
+
+    @staticmethod
+    def _discard(index, cell, node_id):
+        ids = index.get(cell)
+        if ids is not None:
+            ids.discard(node_id)
+            if not ids:
+                del index[cell]
+
+
+class FrozenIndex:
+    '''
+    Cell index of the frozen NotIt agents, for the rescue rule.
+
+    A free NotIt rescues every frozen teammate on its own cell or one of the four cells next to it. With a
+    map from cell to frozen ids that test is five dictionary lookups per position update, however many
+    agents are on the board.
+    '''
+
+    def __init__(self):
+        self.cells = {}     # Map of (x, y) to ids of the frozen NotIt agents on that cell
+        self.positions = {} # Map of frozen NotIt id to its cell
+
+    def add(self, node_id, x, y):
+        '''
+        Record a frozen NotIt agent
+
+        Args:
+            node_id (int): NotIt agent identifier
+            x (int): x-coordinate where it stands frozen
+            y (int): y-coordinate where it stands frozen
+        '''
+        self.remove(node_id)
+        self.positions[node_id] = (x, y)
+        self.cells.setdefault((x, y), set()).add(node_id)
+
+    def remove(self, node_id):
+        '''
+        Drop a NotIt agent from the index (e.g. once it is rescued)
+
+        Args:
+            node_id (int): NotIt agent identifier
+        '''
+        cell = self.positions.pop(node_id, None)
+        if cell is not None:
+            OccupancyIndex._discard(self.cells, cell, node_id)
+
+    def near(self, x, y):
+        '''
+        Frozen NotIt agents on (x, y) or on one of its four neighbors
+
+        Returns:
+            list: Sorted ids of the frozen agents within reach
+        '''
+        cells = self.cells
+        found = []
+        for cell in ((x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            ids = cells.get(cell)
+            if ids:
+                found.extend(ids)
+        return sorted(found)
@@ -0,0 +1,127 @@
+# planner.py
+import numpy as np
+
+from board import ChunkedBoard, neighbor_counts
+
+
+class InterceptPlanner:
+    '''
+    Chooses It moves from a forecast of where the NotIt agents will be over the next few ticks.
+
+    The planner keeps the number of unfrozen NotIt agents on each cell on a ChunkedBoard, updated in O(1)
+    per position message, so its memory follows the agent count rather than the board area. To plan a
+    move it copies a window around the It out of the board and steps it forward `horizon` ticks with the
+    random-walk kernel of NotItNode.move_randomly: each tick an agent moves with probability move_prob to
+    one of its on-board neighbors, chosen uniformly. The board-edge mask is the neighbor count per cell,
+    computed for the window only, so no probability leaks off the board. The result is the expected
+    number of NotIt agents on each cell at each future tick.
+
+    Every candidate move is scored by the best expected catches per tick it allows: the probability mass on
+    a cell the It can still reach by tick t, divided by t. The window radius and the work per move depend
+    only on the horizon, not on the board size or the number of agents.
+    '''
+
+    def __init__(self, width, height, horizon=8, move_prob=0.5):
+        '''
+        Args:
+            width (int): Width of the board
+            height (int): Height of the board
+            horizon (int): Ticks to look ahead
+            move_prob (float): Chance that a NotIt moves during one It tick (It period / NotIt period)
+        '''
+        self.width = width
+        self.height = height
+        self.horizon = horizon
+        self.move_prob = move_prob
+        self.radius = 2 * horizon # Agents further away cannot meet the It within the horizon
+
+        self.board = ChunkedBoard(width, height) # Unfrozen NotIt agents per cell
+        self.positions = {} # Map of node_id to (x, y) of the agents counted on the board
+
+    def update(self, node_id, x, y):
+        '''
+        Record the latest position of an unfrozen NotIt agent
+        '''
+        previous = self.positions.get(node_id)
+        self.positions[node_id] = (x, y)
+        if previous is not None:
+            self.board.move(previous[0], previous[1], x, y)
+        else:
+            self.board.add(x, y)
+
+    def remove(self, node_id):
+        '''
+        Stop tracking a NotIt agent (e.g. once it is frozen)
+        '''
+        previous = self.positions.pop(node_id, None)
+        if previous is not None:
+            self.board.remove(previous[0], previous[1])
+
+    def forecast(self, x, y):
+        '''
+        Expected NotIt agents per cell in a window around (x, y) for ticks 1..horizon
+
+        Returns:
+            tuple: (list of horizon (rows, columns) arrays, window x offset, window y offset)
+        '''
+        x0, x1 = max(0, x - self.radius), min(self.width, x + self.radius + 1)
+        y0, y1 = max(0, y - self.radius), min(self.height, y + self.radius + 1)
+        density = self.board.window(x0, y0, x1, y1)
+        # Number of on-board neighbors of every cell (the random walk only picks valid moves)
+        degree = neighbor_counts(self.width, self.height, x0, y0, x1, y1)
+
+        forecasts = []
+        for _ in range(self.horizon):
+            # One tick of the random walk: stay, or spread evenly to the on-board neighbors
+            share = density * (self.move_prob / degree)
+            step = density * (1.0 - self.move_prob)
+            step[1:, :] += share[:-1, :]
+            step[:-1, :] += share[1:, :]
+            step[:, 1:] += share[:, :-1]
+            step[:, :-1] += share[:, 1:]
+            forecasts.append(step)
+            density = step
+        return forecasts, x0, y0
+
+    def best_move(self, x, y):
+        '''
+        Pick the It's next cell
+
+        Args:
+            x (int): Current x-coordinate of the It
+            y (int): Current y-coordinate of the It
+
+        Returns:
+            tuple: (x, y) of the best next cell, or None if no NotIt agent is within reach of the horizon
+        '''
+        forecasts, x0, y0 = self.forecast(x, y)
+        if not forecasts[-1].any():
+            return None
+
+        rows, columns = forecasts[0].shape
+        grid_y, grid_x = np.mgrid[0:rows, 0:columns]
+
+        final = forecasts[-1]
+        mass = final.sum()
+
+        best, best_score = None, None
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1), (0, 0)):
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < self.width and 0 <= ny < self.height):
+                continue
+
+            # After this move the It can be anywhere within t-1 steps of (nx, ny) at tick t
+            distance = np.abs(grid_x - (nx - x0)) + np.abs(grid_y - (ny - y0))
+            value = 0.0
+            for t, forecast in enumerate(forecasts, 1):
+                value = max(value, forecast[distance <= t - 1].max() / t)
+
+            # Ties (e.g. no catch possible within the horizon) go to the move closest to the forecast mass
+            score = (value, -(final * distance).sum() / mass)
+            if best_score is None or score > best_score:
+                best, best_score = (nx, ny), score
+
+        # Nothing reachable within the horizon: leave it to the caller's fallback
+        if best_score[0] == 0.0:
+            return None
+        return best
@@ -0,0 +1,238 @@
+# position_codec.py
+
+# First byte of every version-2 packet. position_t messages start with their fingerprint (0x9e...), so a
+# receiver can tell the two formats apart on the same channel.
+POSITION_V2 = 0x02
+
+# Move codes in the top 3 bits of a record's tag byte
+MOVE_STAY = 0
+MOVE_RIGHT = 1  # x + 1
+MOVE_LEFT = 2   # x - 1
+MOVE_DOWN = 3   # y + 1
+MOVE_UP = 4     # y - 1
+MOVE_ABSOLUTE = 7 # Bit-packed coordinates follow
+
+# Step of each move code, and the other way around
+STEPS = {MOVE_STAY: (0, 0), MOVE_RIGHT: (1, 0), MOVE_LEFT: (-1, 0), MOVE_DOWN: (0, 1), MOVE_UP: (0, -1)}
+MOVES = {step: code for code, step in STEPS.items()}
+
+# Records are numbered per node modulo 16 (low 4 bits of the tag byte), so a receiver notices lost steps,
+# except runs of lost records that are a multiple of 16 long
+SEQUENCE_MODULO = 16
+
+
+def coordinate_bits(width, height):
+    '''
+    Bits needed for an x and a y coordinate on a board
+
+    Returns:
+        tuple: (x bits, y bits)
+    '''
+    return max(1, (width - 1).bit_length()), max(1, (height - 1).bit_length())
+
+
+def write_varint(out, value):
+    '''
+    Append a non-negative integer as an unsigned LEB128 varint (7 bits per byte, low bits first)
+    '''
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    '''
+    Read an unsigned LEB128 varint
+
+    Returns:
+        tuple: (value, offset after the varint)
+    '''
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class PositionEncoder:
+    '''
+    Sender side of the version-2 position format.
+
+    A packet is the POSITION_V2 byte followed by records. A record is the node id as a varint, a tag byte
+    (move code, is_it flag, 4-bit sequence number) and, for absolute records only, the coordinates
+    bit-packed into as few bytes as the board needs (x above y, big-endian). A one-cell move or a frozen
+    agent standing still costs 2 bytes for node ids below 128, against 21 bytes for a position_t.
+
+    Steps only make sense to a receiver that has the previous position, so the first record of a node,
+    any jump of more than one cell and every keyframe interval-th record are sent absolute.
+    '''
+
+    def __init__(self, width, height, keyframe_interval=8):
+        '''
+        Args:
+            width (int): Width of the board
+            height (int): Height of the board
+            keyframe_interval (int): Records per node between two absolute records (at most 16). It also
+                bounds how long a run of lost records the sequence numbers miss can leave a position wrong
+        '''
+        if not 1 <= keyframe_interval <= SEQUENCE_MODULO:
+            raise ValueError(f"Keyframe interval must be between 1 and {SEQUENCE_MODULO} (got {keyframe_interval})")
+        self.width = width
+        self.height = height
+        self.x_bits, self.y_bits = coordinate_bits(width, height)
+        self.coordinate_bytes = (self.x_bits + self.y_bits + 7) // 8
+        self.keyframe_interval = keyframe_interval
+        self.sent = {} # Map of node id to (x, y, sequence number, records since the last absolute one)
+
+    def encode(self, positions):
+        '''
+        Encode position updates into one packet
+
+        Args:
+            positions (iterable): (node_id, x, y, is_it) tuples
+
+        Returns:
+            bytes: The packet
+        '''
+        out = bytearray((POSITION_V2,))
+        for node_id, x, y, is_it in positions:
+            self.encode_record(out, node_id, x, y, is_it)
+        return bytes(out)
+
+    def encode_packets(self, positions, max_bytes):
+        '''
+        Encode position updates into as few packets as fit in max_bytes each (e.g. one datagram)
+
+        Args:
+            positions (iterable): (node_id, x, y, is_it) tuples
+            max_bytes (int): Size limit of one packet
+
+        Returns:
+            list: The packets (bytes)
+        '''
+        packets = []
+        out = bytearray((POSITION_V2,))
+        for node_id, x, y, is_it in positions:
+            start = len(out)
+            self.encode_record(out, node_id, x, y, is_it)
+            if len(out) > max_bytes and start > 1:
+                # Move the record that did not fit to a new packet
+                packets.append(bytes(out[:start]))
+                out = bytearray((POSITION_V2,)) + out[start:]
+        if len(out) > 1:
+            packets.append(bytes(out))
+        return packets
+
+    def encode_record(self, out, node_id, x, y, is_it):
+        '''
+        Append one record to a packet
+
+        Args:
+            out (bytearray): Packet being built
+            node_id (int): Agent identifier (not negative)
+            x (int): x-coordinate
+            y (int): y-coordinate
+            is_it (int): 1 for the It agent, 0 for a NotIt agent
+        '''
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f"Position ({x}, {y}) is outside the {self.width}x{self.height} board")
+
+        last = self.sent.get(node_id)
+        if last is None:
+            sequence, since_absolute, move = 0, 0, MOVE_ABSOLUTE
+        else:
+            last_x, last_y, last_sequence, since_absolute = last
+            sequence = (last_sequence + 1) % SEQUENCE_MODULO
+            since_absolute += 1
+            move = MOVES.get((x - last_x, y - last_y), MOVE_ABSOLUTE)
+            if since_absolute >= self.keyframe_interval:
+                move = MOVE_ABSOLUTE
+
+        write_varint(out, node_id)
+        out.append(move << 5 | (1 if is_it else 0) << 4 | sequence)
+        if move == MOVE_ABSOLUTE:
+            out += (x << self.y_bits | y).to_bytes(self.coordinate_bytes, "big")
+            since_absolute = 0
+        self.sent[node_id] = (x, y, sequence, since_absolute)
+
+
+class PositionDecoder:
+    '''
+    Receiver side of the version-2 position format: keeps the last position and sequence number of every
+    node so steps can be applied.
+
+    A step is only applied when its sequence number follows the node's previous record; after a lost record
+    the node's steps are skipped until its next absolute record, so a gap delays a position. The one gap the
+    4-bit sequence numbers cannot see is a run of exactly a multiple of 16 lost records of a node: the next
+    step is then applied to a stale position, and the node stays off by the moves it missed until its next
+    absolute record, at most keyframe_interval - 1 records later.
+    '''
+
+    def __init__(self, width, height):
+        '''
+        Args:
+            width (int): Width of the board
+            height (int): Height of the board
+        '''
+        self.width = width
+        self.height = height
+        self.x_bits, self.y_bits = coordinate_bits(width, height)
+        self.coordinate_bytes = (self.x_bits + self.y_bits + 7) // 8
+        self.y_mask = (1 << self.y_bits) - 1
+        self.received = {}     # Map of node id to (x, y, sequence number) of its last applied record
+        self.skipped_count = 0 # Steps skipped because an earlier record of the node was lost
+
+    def decode(self, data):
+        '''
+        Decode a packet
+
+        Args:
+            data (bytes): Packet from PositionEncoder.encode
+
+        Returns:
+            list: (node_id, x, y, is_it) tuples of the records that could be applied, in packet order
+        '''
+        if not data or data[0] != POSITION_V2:
+            raise ValueError("Not a version-2 position packet")
+
+        received = self.received
+        positions = []
+        offset = 1
+        end = len(data)
+        while offset < end:
+            # Node ids below 128 are a single varint byte
+            node_id = data[offset]
+            if node_id < 0x80:
+                offset += 1
+            else:
+                node_id, offset = read_varint(data, offset)
+            tag = data[offset]
+            offset += 1
+
+            move = tag >> 5
+            is_it = tag >> 4 & 1
+            sequence = tag & 0x0F
+            if move == MOVE_ABSOLUTE:
+                packed = int.from_bytes(data[offset:offset + self.coordinate_bytes], "big")
+                offset += self.coordinate_bytes
+                x, y = packed >> self.y_bits, packed & self.y_mask
+            else:
+                last = received.get(node_id)
+                if last is None or (last[2] + 1) % SEQUENCE_MODULO != sequence:
+                    received.pop(node_id, None) # Wait for the next absolute record
+                    self.skipped_count += 1
+                    continue
+                step = STEPS.get(move)
+                if step is None:
+                    raise ValueError(f"Unknown move code {move} in a version-2 position packet")
+                dx, dy = step
+                x, y = last[0] + dx, last[1] + dy
+
+            received[node_id] = (x, y, sequence)
+            positions.append((node_id, x, y, is_it))
+        return positions
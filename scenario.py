@@ -0,0 +1,135 @@
+# scenario.py
+import argparse
+
+import numpy as np
+
+# Built-in start layout generators
+LAYOUTS = ["uniform", "clustered", "perimeter"]
+
+
+def load_scenario(path):
+    '''
+    Memory-map a scenario file. Pages are only read for the rows that are used,
+    and processes that map the same file share them through the page cache.
+
+    Args:
+        path (str): .npy file holding an (N+1, 2) int32 array: N NotIt (x, y) rows followed by the It (x, y)
+
+    Returns:
+        numpy.ndarray: Read-only (N+1, 2) array of positions
+    '''
+    positions = np.load(path, mmap_mode="r")
+    if positions.ndim != 2 or positions.shape[1] != 2 or positions.shape[0] < 2:
+        raise ValueError(f"Scenario {path} must hold an (N+1, 2) array of positions, got shape {positions.shape}")
+    return positions
+
+
+def save_scenario(path, positions):
+    '''
+    Write positions to a scenario file
+
+    Args:
+        path (str): Output .npy file
+        positions (numpy.ndarray): (N+1, 2) array, NotIt rows first and the It last
+    '''
+    np.save(path, np.asarray(positions, dtype=np.int32))
+
+
+def generate(layout, num_not_it, width, height, seed=0, clusters=None):
+    '''
+    Generate a start layout. The same arguments always produce the same layout, so a shard can
+    regenerate it and take its own rows instead of being sent the full list.
+
+    Args:
+        layout (str): One of LAYOUTS
+            uniform: every agent on a uniformly random cell
+            clustered: NotIt agents in Gaussian clusters around random centers, It uniform
+            perimeter: NotIt agents spread evenly along the board edge, It in the center
+        num_not_it (int): Number of NotIt agents
+        width (int): Width of the board
+        height (int): Height of the board
+        seed (int): Random seed
+        clusters (int): Number of clusters for the clustered layout (default: about sqrt(num_not_it))
+
+    Returns:
+        numpy.ndarray: (num_not_it + 1, 2) int32 array, NotIt rows first and the It last
+    '''
+    rng = np.random.default_rng(seed)
+    positions = np.empty((num_not_it + 1, 2), dtype=np.int32)
+    size = np.array([width, height])
+
+    if layout == "uniform":
+        positions[:] = rng.integers(0, size, size=(num_not_it + 1, 2))
+
+    elif layout == "clustered":
+        clusters = clusters or max(1, int(np.sqrt(num_not_it)))
+        centers = rng.integers(0, size, size=(clusters, 2))
+        spread = np.maximum(1.0, size / (2 * np.sqrt(clusters)))
+        offsets = rng.normal(0.0, spread / 2, size=(num_not_it, 2))
+        members = centers[rng.integers(0, clusters, size=num_not_it)] + np.rint(offsets).astype(np.int64)
+        positions[:-1] = np.clip(members, 0, size - 1)
+        positions[-1] = rng.integers(0, size)
+
+    elif layout == "perimeter":
+        # Walk the edge clockwise from (0, 0) and place agents at evenly spaced steps
+        edge_length = max(1, 2 * (width + height) - 4)
+        steps = (np.arange(num_not_it) * edge_length // max(1, num_not_it)) % edge_length
+        x = np.select([steps < width,
+                       steps < width + height - 1,
+                       steps < 2 * width + height - 2],
+                      [steps,
+                       np.full_like(steps, width - 1),
+                       (width - 1) - (steps - (width + height - 2))],
+                      default=0)
+        y = np.select([steps < width,
+                       steps < width + height - 1,
+                       steps < 2 * width + height - 2],
+                      [np.zeros_like(steps),
+                       steps - (width - 1),
+                       np.full_like(steps, height - 1)],
+                      default=(height - 1) - (steps - (2 * width + height - 3)))
+        positions[:-1, 0] = np.clip(x, 0, width - 1)
+        positions[:-1, 1] = np.clip(y, 0, height - 1)
+        positions[-1] = (width // 2, height // 2)
+
+    else:
+        raise ValueError(f"Unknown layout {layout!r} (expected one of {LAYOUTS})")
+
+    return positions
+
+
+def out_of_bounds(positions, width, height):
+    '''
+    Vectorized bounds check of a whole layout
+
+    Args:
+        positions (numpy.ndarray): (N+1, 2) array of positions
+        width (int): Width of the board
+        height (int): Height of the board
+
+    Returns:
+        numpy.ndarray: Indices of the rows that are outside the board
+    '''
+    positions = np.asarray(positions)
+    bad = ((positions[:, 0] < 0) | (positions[:, 0] >= width) |
+           (positions[:, 1] < 0) | (positions[:, 1] >= height))
+    return np.flatnonzero(bad)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a scenario file of start positions')
+    parser.add_argument('--layout', choices=LAYOUTS, default="uniform", help='Start layout generator')
+    parser.add_argument('--width', type=int, required=True, help='Width of the game board')
+    parser.add_argument('--height', type=int, required=True, help='Height of the game board')
+    parser.add_argument('--num-not-it', type=int, required=True, help='Number of NotIt agents')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', '-o', required=True, help='Output .npy file')
+    args = parser.parse_args()
+
+    positions = generate(args.layout, args.num_not_it, args.width, args.height, args.seed)
+    save_scenario(args.output, positions)
+    print(f"Scenario: wrote {len(positions) - 1} NotIt agents and the It ({args.layout}) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+# stats.py
+import math
+
+
+def percentile(sorted_values, p):
+    '''
+    Nearest-rank percentile of an already sorted list
+    '''
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
@@ -0,0 +1,249 @@
+# supervisor.py
+import os
+import time
+import multiprocessing
+import logs
+from node import Node, channel_name, channel_game_id
+from metrics import read_process_stats
+
+# Import the messages.lcm
+from messages import snapshot_t
+
+
+def parse_cores(text):
+    '''
+    Parse a CPU list such as "0", "2-3" or "0,4-7"
+
+    Returns:
+        list: Sorted core numbers
+    '''
+    cores = set()
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        cores.update(range(int(first), int(last or first) + 1))
+    return sorted(cores)
+
+
+class Supervised:
+    '''
+    A node process watched by the Supervisor
+    '''
+
+    def __init__(self, name, factory, role, game_id=None, restart=True):
+        '''
+        Args:
+            name (str): Process name
+            factory (callable): Builds the node from the last known agents of its game ({node_id: (x, y, flags)})
+            role (str): "referee" or "agent" (agents include viewers); selects the cores and priority
+            game_id (str): Game the node plays in, for its last known state
+            restart (bool): Restart the node if it crashes
+        '''
+        self.name = name
+        self.factory = factory
+        self.role = role
+        self.game_id = game_id
+        self.restart = restart
+        self.process = None
+        self.restarts = 0
+        self.cpu_sample = None # (time, CPU seconds) of the previous stats sample
+
+
+class Supervisor(Node):
+    '''
+    Starts the node processes of game.py, pins them to cores and restarts the ones that crash.
+
+    The referee and the agents get separate core sets (by default the agents get every core the referee
+    does not), and agents can run at a lower priority, so a box crowded with agents cannot delay the
+    GameNode. The supervisor follows the SNAPSHOT channel of every game, so a crashed agent is restarted
+    where the referee last saw it, frozen if it was frozen, and a restarted It knows which agents are
+    frozen. A crashed referee is restarted from its checkpoint. Restarts come out of one budget, so a node
+    that keeps crashing cannot restart forever. Every stats interval it samples CPU and RSS of each process.
+    '''
+
+    def __init__(self, game_ids=(None,), restart_budget=5, stats_interval=10.0, referee_cores=None,
+                 agent_cores=None, agent_nice=0, poll_interval=0.5):
+        '''
+        Args:
+            game_ids (list): Games to follow (None for the global channels)
+            restart_budget (int): Max crashed processes restarted over the whole run
+            stats_interval (float): Seconds between two CPU/RSS samples (0 to disable)
+            referee_cores (list): Cores for the GameNode (None to leave it unpinned)
+            agent_cores (list): Cores for agents and viewers (None for every core the referee does not use)
+            agent_nice (int): Niceness added to agent and viewer processes
+            poll_interval (float): Seconds between two checks of the processes
+        '''
+        super().__init__()
+        self.log = logs.get_logger("Supervisor")
+        self.game_ids = list(game_ids)
+        self.restart_budget = restart_budget
+        self.stats_interval = stats_interval
+        self.agent_nice = agent_nice
+        self.poll_interval = poll_interval
+
+        # Core sets; agents avoid the referee's cores unless told otherwise
+        self.cores = {"referee": referee_cores, "agent": agent_cores}
+        if referee_cores is not None and agent_cores is None and hasattr(os, "sched_getaffinity"):
+            self.cores["agent"] = sorted(os.sched_getaffinity(0) - set(referee_cores)) or None
+
+        self.nodes = []        # Supervised processes, referee first
+        self.restarts = 0      # Restarts used from the budget
+        self.stats = {}        # Map of process name to (CPU %, RSS bytes) from the latest sample
+        self.last_agents = {}  # Map of game id to {node_id: (x, y, flags)} from the latest snapshot
+
+    def add(self, name, factory, role="agent", game_id=None, restart=True):
+        '''
+        Start a node process and watch it
+
+        Args:
+            name (str): Process name
+            factory (callable): Builds the node from the last known agents of its game
+            role (str): "referee" or "agent"
+            game_id (str): Game the node plays in
+            restart (bool): Restart the node if it crashes
+        '''
+        supervised = Supervised(name, factory, role, game_id, restart)
+        self.nodes.append(supervised)
+        self.spawn(supervised)
+
+    def spawn(self, supervised):
+        '''
+        Start (or restart) the process of a supervised node, then pin it and set its priority
+        '''
+        node = supervised.factory(self.last_agents.get(supervised.game_id, {}))
+        process = multiprocessing.Process(target=node.launch_node, name=supervised.name)
+        process.start()
+        supervised.process = process
+        supervised.cpu_sample = None
+
+        cores = self.cores[supervised.role]
+        try:
+            if cores is not None:
+                os.sched_setaffinity(process.pid, cores)
+            if supervised.role == "agent" and self.agent_nice:
+                os.setpriority(os.PRIO_PROCESS, process.pid, self.agent_nice)
+        except (AttributeError, OSError) as e:
+            self.log.warning("Could not pin or reprioritize %s: %s", supervised.name, e)
+
+    def on_start(self):
+        '''
+        Follow the referee's snapshots and keep the supervisor itself off the referee's cores
+        '''
+        for game_id in self.game_ids:
+            self.subscribe(channel_name("SNAPSHOT", game_id), self.handle_snapshot)
+
+        if self.cores["agent"] is not None and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, self.cores["agent"])
+
+    def handle_snapshot(self, channel, data):
+        '''
+        Keep the last known position and flags of every agent of a game
+
+        Args:
+            channel (str): LCM channel
+            data (bytes): LCM message data
+        '''
+        msg = snapshot_t.decode(data)
+        self.last_agents[channel_game_id(channel)] = dict(zip(msg.node_ids, zip(msg.xs, msg.ys, msg.flags)))
+
+    def run(self):
+        '''
+        Watch the processes until the referee is done
+        '''
+        next_stats = time.monotonic() + self.stats_interval
+        try:
+            while self.running:
+                referee = self.nodes[0].process
+                if referee.exitcode == 0:
+                    return
+                if not self.check_processes():
+                    return
+
+                now = time.monotonic()
+                if self.stats_interval > 0 and now >= next_stats:
+                    next_stats = now + self.stats_interval
+                    self.sample_stats(now)
+                    self.log_stats()
+
+                time.sleep(self.poll_interval)
+
+        except KeyboardInterrupt:
+            self.log.info("Interrupted. Terminating all nodes...")
+
+    def check_processes(self):
+        '''
+        Restart crashed processes while the budget lasts
+
+        Returns:
+            bool: False if the referee crashed and cannot be restarted
+        '''
+        for supervised in self.nodes:
+            exitcode = supervised.process.exitcode
+            if exitcode is None or exitcode == 0:
+                continue
+
+            if not supervised.restart or self.restarts >= self.restart_budget:
+                if supervised.role == "referee":
+                    self.log.error("%s exited with code %d and is not restarted", supervised.name, exitcode)
+                    return False
+                if supervised.restart:
+                    self.log.error("%s exited with code %d; restart budget of %d used up", supervised.name,
+                                   exitcode, self.restart_budget)
+                    supervised.restart = False
+                continue
+
+            self.restarts += 1
+            supervised.restarts += 1
+            self.log.warning("%s exited with code %d, restarting (%d/%d)", supervised.name, exitcode,
+                             self.restarts, self.restart_budget)
+            supervised.process.close()
+            self.spawn(supervised)
+        return True
+
+    def sample_stats(self, now=None):
+        '''
+        Sample CPU usage (percent of one core since the previous sample) and RSS of every running process
+        '''
+        if now is None:
+            now = time.monotonic()
+
+        self.stats = {}
+        for supervised in self.nodes:
+            process = supervised.process
+            sample = read_process_stats(process.pid) if process.exitcode is None else None
+            if sample is None:
+                continue
+
+            cpu, rss = sample
+            percent = 0.0
+            if supervised.cpu_sample is not None and now > supervised.cpu_sample[0]:
+                percent = 100.0 * (cpu - supervised.cpu_sample[1]) / (now - supervised.cpu_sample[0])
+            supervised.cpu_sample = (now, cpu)
+            self.stats[supervised.name] = (percent, rss)
+
+    def log_stats(self):
+        '''
+        Log the latest sample: the referee and the busiest processes, and totals over all of them
+        '''
+        if not self.stats:
+            return
+
+        mb = 1024 * 1024
+        total_cpu = sum(cpu for cpu, _ in self.stats.values())
+        total_rss = sum(rss for _, rss in self.stats.values())
+        self.log.info("%d processes: CPU %.0f%%, RSS %.0f MB, %d restart(s)", len(self.stats), total_cpu,
+                      total_rss / mb, self.restarts)
+
+        referee = self.nodes[0].name
+        busiest = sorted((name for name in self.stats if name != referee), key=lambda name: -self.stats[name][0])
+        for name in ([referee] if referee in self.stats else []) + busiest[:3]:
+            cpu, rss = self.stats[name]
+            self.log.info("  %s: CPU %.1f%%, RSS %.1f MB", name, cpu, rss / mb)
+
+    def processes(self):
+        '''
+        Current process of every supervised node, for the launcher to clean up
+        '''
+        return [supervised.process for supervised in self.nodes]
+
+    def on_stop(self):
+        self.log.info("Stopped after %d restart(s).", self.restarts)
@@ -0,0 +1,255 @@
+# term_viewer.py
+import argparse
+import math
+import shutil
+import sys
+import time
+
+import numpy as np
+
+import logs
+from node import Node
+from game_session import AGENT_IT, AGENT_FROZEN, AGENT_LOST
+
+# Import the messages.lcm
+from messages import snapshot_t
+
+# Characters for the downsampled heatmap of active NotIt agents, from empty to densest block ('@' is the It)
+HEATMAP = " .:-=+*#%"
+
+# Cell colors and their ANSI escape sequences
+PLAIN, RED, BLUE, GRAY = range(4)
+COLOR_CODES = ["\x1b[0m", "\x1b[1;31m", "\x1b[34m", "\x1b[90m"]
+
+
+class TerminalViewer(Node):
+    '''
+    Terminal view of a game for machines without a display, e.g. over SSH.
+
+    Like the PyGame viewer it follows the SNAPSHOT channel in its own process. Boards larger than the terminal
+    are downsampled: each character covers a block of cells and shows how many active NotIt agents it holds as
+    a heatmap character. Every frame is rendered into character and color arrays and compared with the previous
+    frame, and only the runs of characters that changed are written with ANSI cursor moves, so a quiet game
+    costs almost no CPU or bandwidth.
+    '''
+
+    def __init__(self, game_id=None, fps=10, repaint_interval=5.0, out=None):
+        '''
+        Args:
+            game_id (str): Game to show (None for the global channels)
+            fps (int): Max frames per second
+            repaint_interval (float): Seconds between full repaints, which clean up output from other processes
+            out (file): Terminal to draw on (default: sys.stdout)
+        '''
+        super().__init__(game_id=game_id)
+        self.log = logs.get_logger("TerminalViewer")
+        self.fps = fps
+        self.repaint_interval = repaint_interval
+        self.out = out or sys.stdout
+        self.snapshot = None # Latest snapshot_t, replaced by the LCM thread
+
+        # Previous frame, for diffing
+        self._chars = None
+        self._colors = None
+        self._header = None
+
+        # Counters
+        self.bytes_written = 0
+        self._rate = 0.0         # Position messages per second processed by the GameNode
+        self._rate_sample = None # (time, position_count) of the previous snapshot
+
+    def on_start(self):
+        self.subscribe(self.channel("SNAPSHOT"), self.handle_snapshot)
+
+    def on_stop(self):
+        # Show the cursor again, reset colors and leave the prompt below the board
+        rows = shutil.get_terminal_size().lines
+        self.out.write(f"\x1b[0m\x1b[?25h\x1b[{rows};1H\n")
+        self.out.flush()
+
+    def handle_snapshot(self, channel, data):
+        '''
+        Keep the latest snapshot (a single reference assignment, read by the drawing loop without a lock)
+
+        Args:
+            channel (str): LCM channel
+            data (bytes): LCM message data
+        '''
+        self.snapshot = snapshot_t.decode(data)
+
+    def run(self):
+        '''
+        Draw frames until the node is stopped
+        '''
+        self.out.write("\x1b[?25l\x1b[2J") # Hide the cursor and clear the screen
+        drawn = None
+        size = None
+        repaint_at = 0.0
+        bytes_sample = (time.monotonic(), 0)
+        bandwidth = 0.0
+
+        while self.running:
+            now = time.monotonic()
+            snapshot = self.snapshot
+            terminal = shutil.get_terminal_size()
+
+            # Redraw everything after a resize and every repaint interval, otherwise only what changed
+            if terminal != size or now >= repaint_at:
+                size = terminal
+                repaint_at = now + self.repaint_interval
+                self._chars = self._colors = self._header = None
+                self.out.write("\x1b[0m\x1b[2J")
+                drawn = None
+
+            if snapshot is not None and snapshot is not drawn:
+                drawn = snapshot
+                self.update_rate(snapshot, now)
+
+                if now - bytes_sample[0] >= 1.0:
+                    bandwidth = (self.bytes_written - bytes_sample[1]) / (now - bytes_sample[0])
+                    bytes_sample = (now, self.bytes_written)
+
+                chars, colors, scale = self.render(snapshot, size.columns, max(1, size.lines - 1))
+                header = self.header(snapshot, scale, bandwidth)
+                self.write(self.diff(header, chars, colors))
+
+            time.sleep(1.0 / self.fps)
+
+    def update_rate(self, snapshot, now):
+        '''
+        Update the GameNode's messages per second from the position count of consecutive snapshots
+        '''
+        if self._rate_sample is not None:
+            then, count = self._rate_sample
+            if now > then and snapshot.position_count >= count:
+                rate = (snapshot.position_count - count) / (now - then)
+                self._rate = rate if self._rate == 0.0 else 0.7 * self._rate + 0.3 * rate
+        self._rate_sample = (now, snapshot.position_count)
+
+    def render(self, snapshot, columns, rows):
+        '''
+        Render a snapshot into character and color arrays that fit the terminal
+
+        Args:
+            snapshot (snapshot_t): Referee state
+            columns (int): Terminal columns available for the board
+            rows (int): Terminal rows available for the board
+
+        Returns:
+            tuple: (chars, colors, (block width, block height)) with chars and colors as (rows, columns) uint8 arrays
+        '''
+        # Board cells per character
+        fx = max(1, math.ceil(snapshot.width / columns))
+        fy = max(1, math.ceil(snapshot.height / rows))
+        draw_columns = math.ceil(snapshot.width / fx)
+        draw_rows = math.ceil(snapshot.height / fy)
+        blocks = draw_columns * draw_rows
+
+        chars = np.full((rows, columns), ord(" "), dtype=np.uint8)
+        colors = np.zeros((rows, columns), dtype=np.uint8)
+
+        xs = np.asarray(snapshot.xs, dtype=np.int64)
+        ys = np.asarray(snapshot.ys, dtype=np.int64)
+        flags = np.asarray(snapshot.flags, dtype=np.int64)
+        on_board = (xs >= 0) & (xs < snapshot.width) & (ys >= 0) & (ys < snapshot.height) & ((flags & AGENT_LOST) == 0)
+        block = (ys // fy) * draw_columns + xs // fx
+
+        active = on_board & ((flags & (AGENT_IT | AGENT_FROZEN)) == 0)
+        frozen = on_board & ((flags & AGENT_FROZEN) != 0)
+        it = on_board & ((flags & AGENT_IT) != 0)
+        active_counts = np.bincount(block[active], minlength=blocks)
+        frozen_counts = np.bincount(block[frozen], minlength=blocks)
+
+        board_chars = np.full(blocks, ord("." if fx * fy == 1 else " "), dtype=np.uint8)
+        board_colors = np.full(blocks, GRAY, dtype=np.uint8)
+        if fx * fy == 1:
+            # One character per cell
+            board_chars[frozen_counts > 0] = ord("*")
+            board_chars[active_counts > 0] = ord("o")
+        else:
+            # Heatmap: frozen-only blocks are dim, active blocks scale with their agent count
+            board_chars[frozen_counts > 0] = ord(",")
+            peak = max(1, int(active_counts.max(initial=0)))
+            levels = np.ceil(active_counts * (len(HEATMAP) - 1) / peak).astype(np.int64)
+            ramp = np.frombuffer(HEATMAP.encode(), dtype=np.uint8)
+            board_chars[active_counts > 0] = ramp[levels[active_counts > 0]]
+        board_colors[active_counts > 0] = BLUE
+        board_chars[block[it]] = ord("@")
+        board_colors[block[it]] = RED
+
+        chars[:draw_rows, :draw_columns] = board_chars.reshape(draw_rows, draw_columns)[:rows, :columns]
+        colors[:draw_rows, :draw_columns] = board_colors.reshape(draw_rows, draw_columns)[:rows, :columns]
+        return chars, colors, (fx, fy)
+
+    def header(self, snapshot, scale, bandwidth):
+        '''
+        Status line with the live counters
+        '''
+        lost = sum(1 for flags in snapshot.flags if flags & AGENT_LOST)
+        game = "" if self.game_id is None else f" {self.game_id}"
+        status = " - GAME OVER" if snapshot.game_over else ""
+        return (f"Freeze Tag{game}{status} | frozen {snapshot.frozen_count}/{snapshot.num_not_it} | lost {lost}"
+                f" | {self._rate:.0f} msg/s | tick {snapshot.version}"
+                f" | {snapshot.width}x{snapshot.height} at {scale[0]}x{scale[1]}/char | out {bandwidth / 1024:.1f} kB/s")
+
+    def diff(self, header, chars, colors):
+        '''
+        ANSI output that turns the previous frame into this one
+
+        Returns:
+            str: Escape sequences and text for the header and every changed run of characters
+        '''
+        parts = []
+        if header != self._header:
+            columns = chars.shape[1]
+            parts.append(f"\x1b[1;1H\x1b[0m\x1b[7m{header[:columns].ljust(columns)}\x1b[0m")
+            self._header = header
+
+        if self._chars is None or self._chars.shape != chars.shape:
+            changed = np.ones(chars.shape, dtype=bool)
+        else:
+            changed = (chars != self._chars) | (colors != self._colors)
+        self._chars, self._colors = chars, colors
+
+        color = None
+        for row in np.flatnonzero(changed.any(axis=1)):
+            columns = np.flatnonzero(changed[row])
+            # Split into runs of adjacent changed characters; short gaps are rewritten rather than skipped
+            breaks = np.flatnonzero(np.diff(columns) > 4) + 1
+            for run in np.split(columns, breaks):
+                start, end = run[0], run[-1] + 1
+                parts.append(f"\x1b[{row + 2};{start + 1}H")
+                for column in range(start, end):
+                    if colors[row, column] != color:
+                        color = colors[row, column]
+                        parts.append(COLOR_CODES[color])
+                    parts.append(chr(chars[row, column]))
+        if color is not None:
+            parts.append(COLOR_CODES[PLAIN])
+        return "".join(parts)
+
+    def write(self, text):
+        if text:
+            self.out.write(text)
+            self.out.flush()
+            self.bytes_written += len(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch a running Distributed Freeze Tag game in the terminal')
+    parser.add_argument('--game-id', default=None, help='Game to show when the GameNode hosts several games')
+    parser.add_argument('--fps', type=int, default=10, help='Max frames per second')
+    args = parser.parse_args()
+
+    # Only warnings, so log messages rarely land in the middle of the board
+    logs.configure("WARNING")
+    viewer = TerminalViewer(args.game_id, args.fps)
+    try:
+        viewer.launch_node()
+    except KeyboardInterrupt:
+        viewer.stop()
+        logs.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# tournament.py
+import argparse
+import itertools
+import multiprocessing
+import os
+import random
+import time
+from array import array
+
+import scenario
+from occupancy import OccupancyIndex
+from stats import percentile
+from it_node import ItNode
+from not_it_node import NotItNode
+
+# Start layouts a sweep can use (append only: stored results refer to them by index)
+LAYOUTS = ["uniform", "it_corner", "clustered", "perimeter"]
+
+# On-disk result columns: name -> array typecode
+RESULT_COLUMNS = {
+    "game": "q",       # Game index in the sweep
+    "seed": "q",
+    "width": "i",
+    "height": "i",
+    "num_not_it": "i",
+    "layout": "b",     # Index into LAYOUTS
+    "it_horizon": "i",
+    "evasion": "d",
+    "max_ticks": "i",
+    "ticks": "i",      # It moves until game over (or max_ticks)
+    "catches": "i",
+    "completed": "b",  # 1 if every NotIt was frozen before max_ticks
+}
+
+# Columns that together identify a game: a resumed sweep only skips games stored with the same values
+RESUME_KEY = ["seed", "width", "height", "num_not_it", "layout", "it_horizon", "evasion", "max_ticks"]
+
+# Values of the columns added after the first stores were written, for rows that predate them
+COLUMN_DEFAULTS = {"it_horizon": 0, "evasion": 0.0, "max_ticks": 10000}
+
+
+class ResultsStore:
+    '''
+    Columnar results file: one directory with one fixed-width binary file per column.
+
+    Results are appended column by column and flushed in chunks, so a sweep can be interrupted at any point.
+    On open, columns are truncated to the shortest one, which drops a partially written row. Columns missing
+    from an older store are filled with their COLUMN_DEFAULTS value.
+    '''
+
+    def __init__(self, path):
+        '''
+        Args:
+            path (str): Results directory (created if missing)
+        '''
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        self.columns = {}
+        missing = []
+        for name, typecode in RESULT_COLUMNS.items():
+            column = array(typecode)
+            file_path = os.path.join(path, f"{name}.bin")
+            if os.path.exists(file_path):
+                with open(file_path, "rb") as f:
+                    data = f.read()
+                column.frombytes(data[:len(data) - len(data) % column.itemsize])
+            elif name in COLUMN_DEFAULTS:
+                missing.append(name)
+            self.columns[name] = column
+
+        # Drop a partially written last row
+        rows = min(len(column) for name, column in self.columns.items() if name not in missing)
+        for name in missing:
+            self.columns[name].extend([COLUMN_DEFAULTS[name]] * rows)
+        for name, column in self.columns.items():
+            del column[rows:]
+            with open(os.path.join(path, f"{name}.bin"), "wb") as f:
+                column.tofile(f)
+
+        self._flushed = rows
+
+    def __len__(self):
+        return len(self.columns["game"])
+
+    def finished_games(self):
+        '''
+        Games already in the store
+
+        Returns:
+            set: Tuples of the RESUME_KEY columns of every stored game
+        '''
+        return set(zip(*(self.columns[name] for name in RESUME_KEY)))
+
+    def append(self, result):
+        '''
+        Append one game result (a dict with every column)
+        '''
+        for name, column in self.columns.items():
+            column.append(result[name])
+
+    def flush(self):
+        '''
+        Write appended rows to disk
+        '''
+        rows = len(self)
+        for name, column in self.columns.items():
+            with open(os.path.join(self.path, f"{name}.bin"), "ab") as f:
+                column[self._flushed:rows].tofile(f)
+        self._flushed = rows
+
+
+def make_layout(layout, width, height, num_not_it, rng):
+    '''
+    Generate start positions for a game
+
+    Args:
+        layout (str): One of LAYOUTS
+        width (int): Width of the board
+        height (int): Height of the board
+        num_not_it (int): Number of NotIt agents
+        rng (random.Random): Seeded random generator
+
+    Returns:
+        tuple: (list of NotIt (x, y), It (x, y))
+    '''
+    if layout in ("clustered", "perimeter"):
+        positions = scenario.generate(layout, num_not_it, width, height, rng.getrandbits(32)).tolist()
+        return positions[:-1], positions[-1]
+
+    not_it_positions = [(rng.randrange(width), rng.randrange(height)) for _ in range(num_not_it)]
+
+    if layout == "it_corner":
+        it_position = (0, 0)
+    else:
+        it_position = (rng.randrange(width), rng.randrange(height))
+
+    return not_it_positions, it_position
+
+
+def simulate_game(width, height, not_it_positions, it_position, seed, max_ticks=10000, horizon=0, evasion=0.0):
+    '''
+    Play one headless game with the real ItNode and NotItNode movement logic.
+
+    One tick is one It move (every 0.5s in a live game); NotIt agents move every second tick (every 1s).
+    Catches go through the same OccupancyIndex as in GameSession, fed one update per move in the same order,
+    so agents that swap cells are caught as in a live game.
+    With a horizon, the It uses its intercept planner instead of chasing the closest NotIt.
+    With evasion, NotIt agents flee from the It's current position for that share of their moves.
+
+    Returns:
+        tuple: (ticks until game over, catches, completed)
+    '''
+    random.seed(seed) # NotItNode.move_randomly draws from the global generator
+
+    it = ItNode(it_position[0], it_position[1], width, height, horizon=horizon)
+    not_its = [NotItNode(i + 1, x, y, width, height, evasion=evasion) for i, (x, y) in enumerate(not_it_positions)]
+    frozen = it.frozen_nodes # The It sees the authoritative frozen set
+    occupancy = OccupancyIndex()
+
+    def freeze(not_it):
+        not_it.frozen = True
+        it.mark_frozen(not_it.node_id)
+        occupancy.remove(not_it.node_id)
+
+    def move_not_it(not_it):
+        if occupancy.move_not_it(not_it.node_id, not_it.x, not_it.y):
+            freeze(not_it)
+
+    occupancy.move_it(it.x, it.y)
+    for not_it in not_its:
+        move_not_it(not_it)
+
+    by_id = {not_it.node_id: not_it for not_it in not_its}
+    for tick in range(1, max_ticks + 1):
+        for not_it in not_its:
+            it.observe(not_it.node_id, not_it.x, not_it.y)
+        it.move()
+        for node_id in occupancy.move_it(it.x, it.y):
+            freeze(by_id[node_id])
+
+        if tick % 2 == 0:
+            for not_it in not_its:
+                if not not_it.frozen:
+                    not_it.it_position = (it.x, it.y)
+                    not_it.move()
+                    move_not_it(not_it)
+
+        if len(frozen) == len(not_its):
+            return tick, len(frozen), True
+
+    return max_ticks, len(frozen), False
+
+
+def run_task(task):
+    '''
+    Process pool entry point: generate the layout for one game and play it
+    '''
+    game, seed, width, height, num_not_it, layout, max_ticks, horizon, evasion = task
+    rng = random.Random(seed)
+    not_it_positions, it_position = make_layout(LAYOUTS[layout], width, height, num_not_it, rng)
+    ticks, catches, completed = simulate_game(width, height, not_it_positions, it_position, seed, max_ticks, horizon, evasion)
+
+    return {"game": game, "seed": seed, "width": width, "height": height, "num_not_it": num_not_it,
+            "layout": layout, "it_horizon": horizon, "evasion": evasion, "max_ticks": max_ticks,
+            "ticks": ticks, "catches": catches, "completed": int(completed)}
+
+
+def report(store):
+    '''
+    Print aggregate statistics per (board size, agent count, layout, It horizon, evasion, max ticks)
+    '''
+    columns = store.columns
+    groups = {}
+    for row in range(len(store)):
+        key = tuple(columns[name][row] for name in ("width", "height", "num_not_it", "layout", "it_horizon", "evasion",
+                                                    "max_ticks"))
+        groups.setdefault(key, []).append(row)
+
+    print(f"{'board':>9} {'agents':>6} {'layout':>9} {'horizon':>7} {'evasion':>7} {'max':>6} {'games':>6} {'done':>6} "
+          f"{'mean':>8} {'p50':>6} {'p90':>6} {'p99':>6} {'catch/tick':>10}")
+    for (width, height, num_not_it, layout, horizon, evasion, max_ticks), rows in sorted(groups.items()):
+        ticks = sorted(columns["ticks"][row] for row in rows)
+        total_catches = sum(columns["catches"][row] for row in rows)
+        completed = sum(columns["completed"][row] for row in rows)
+
+        print(f"{f'{width}x{height}':>9} {num_not_it:>6} {LAYOUTS[layout]:>9} {horizon:>7} {evasion:>7.2f} {max_ticks:>6} "
+              f"{len(rows):>6} {completed:>6} "
+              f"{sum(ticks) / len(ticks):>8.1f} {percentile(ticks, 50):>6} {percentile(ticks, 90):>6} "
+              f"{percentile(ticks, 99):>6} {total_catches / sum(ticks):>10.4f}")
+
+
+def parse_size(value):
+    width, _, height = value.partition("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a sweep of seeded headless freeze tag games')
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(20, 15)], help='Board sizes, e.g. 20x15 50x50')
+    parser.add_argument('--agents', type=int, nargs='+', default=[2], help='NotIt agent counts')
+    parser.add_argument('--layouts', nargs='+', default=["uniform"], choices=LAYOUTS, help='Start layouts')
+    parser.add_argument('--games', type=int, default=100, help='Games per (size, agents, layout) configuration')
+    parser.add_argument('--seed', type=int, default=0, help='Base seed of the sweep')
+    parser.add_argument('--max-ticks', type=int, default=10000, help='Ticks after which an unfinished game is cut off')
+    parser.add_argument('--it-horizon', type=int, default=0,
+                        help='Look-ahead of the It intercept planner (0 to chase the closest NotIt)')
+    parser.add_argument('--evasion', type=float, default=0.0,
+                        help='Share of NotIt moves that flee from the It (0 for a pure random walk)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--results', default='tournament_results', help='Results directory (resumed if it exists)')
+    args = parser.parse_args()
+
+    store = ResultsStore(args.results)
+    finished = store.finished_games()
+
+    # Every game has a fixed index and seed, and a resumed sweep skips the games stored with the same seed and
+    # settings, so changing any option of the sweep plays the games it has not seen yet
+    configs = itertools.product(args.sizes, args.agents, [LAYOUTS.index(layout) for layout in args.layouts])
+    tasks = []
+    game = 0
+    for (width, height), num_not_it, layout in configs:
+        for _ in range(args.games):
+            seed = args.seed * 1000003 + game
+            if (seed, width, height, num_not_it, layout, args.it_horizon, args.evasion, args.max_ticks) not in finished:
+                tasks.append((game, seed, width, height, num_not_it, layout, args.max_ticks, args.it_horizon,
+                              args.evasion))
+            game += 1
+
+    print(f"Tournament: {game} games, {game - len(tasks)} already done, running {len(tasks)} on {args.workers} workers")
+
+    start = time.monotonic()
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            for done, result in enumerate(pool.imap_unordered(run_task, tasks, chunksize=16), 1):
+                store.append(result)
+                if done % 256 == 0:
+                    store.flush()
+                    print(f"Tournament: {done}/{len(tasks)} games ({done / (time.monotonic() - start):.0f} games/s)")
+    except KeyboardInterrupt:
+        print("Tournament: Interrupted, rerun the same command to resume")
+    finally:
+        store.flush()
+
+    report(store)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# viewer.py
+import argparse
+import time
+# import lcm
+import pygame
+import logs
+from node import Node
+from board import viewport
+from game_session import AGENT_IT, AGENT_FROZEN, AGENT_LOST
+
+# Import the messages.lcm
+from messages import snapshot_t
+
+
+class Viewer(Node):
+    '''
+    PyGame view of a game, in its own process.
+
+    The GameNode publishes its state on the SNAPSHOT channel a few times per second. The viewer keeps only the
+    latest message and draws it at its own frame rate, so drawing never competes with the referee, and a viewer
+    can attach to or detach from a running game at any time. Closing the window only closes the viewer.
+
+    Boards larger than the view are shown through a viewport that follows the It, so drawing costs the
+    visible cells plus one bounds check per agent, whatever the board size.
+    '''
+
+    def __init__(self, game_id=None, cell_size=20, fps=20, view_columns=60, view_rows=40):
+        '''
+        Args:
+            game_id (str): Game to show (None for the global channels)
+            cell_size (int): Size of each cell in pixels
+            fps (int): Max frames per second
+            view_columns (int): Max board columns shown at once
+            view_rows (int): Max board rows shown at once
+        '''
+        super().__init__(game_id=game_id)
+        self.log = logs.get_logger("Viewer")
+        self.cell_size = cell_size
+        self.fps = fps
+        self.view_columns = view_columns
+        self.view_rows = view_rows
+        self.snapshot = None # Latest snapshot_t, replaced by the LCM thread
+
+    def on_start(self):
+        self.subscribe(self.channel("SNAPSHOT"), self.handle_snapshot)
+
+    def on_stop(self):
+        if pygame.get_init():
+            pygame.quit()
+
+    def handle_snapshot(self, channel, data):
+        '''
+        Keep the latest snapshot (a single reference assignment, read by the drawing loop without a lock)
+
+        Args:
+            channel (str): LCM channel
+            data (bytes): LCM message data
+        '''
+        self.snapshot = snapshot_t.decode(data)
+
+    def run(self):
+        '''
+        Draw the latest snapshot until the window is closed
+        '''
+        # Wait for the first snapshot to learn the board size
+        while self.snapshot is None and self.running:
+            time.sleep(0.05)
+        snapshot = self.snapshot
+        if snapshot is None:
+            return
+
+        pygame.init()
+        columns, rows = min(snapshot.width, self.view_columns), min(snapshot.height, self.view_rows)
+        screen = pygame.display.set_mode((columns * self.cell_size, rows * self.cell_size))
+        caption = "Distrubuted Freeze Tag" if self.game_id is None else f"Distrubuted Freeze Tag - game {self.game_id}"
+        pygame.display.set_caption(caption)
+        clock = pygame.time.Clock()
+
+        # Colors
+        BLACK = (0, 0, 0)
+        WHITE = (255, 255, 255)
+        RED = (255, 0, 0)
+        BLUE = (0, 0, 255)
+        GRAY = (200, 200, 200)
+
+        font = pygame.font.Font(None, 24)
+        drawn_version = -1
+
+        while self.running:
+            # Process PyGame events
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+
+            # Only redraw when the state has changed
+            snapshot = self.snapshot
+            if snapshot.version == drawn_version:
+                clock.tick(self.fps)
+                continue
+            drawn_version = snapshot.version
+
+            # Follow the It (or stay centered before it reports) when the board is larger than the view
+            center = (snapshot.width // 2, snapshot.height // 2)
+            for x, y, flags in zip(snapshot.xs, snapshot.ys, snapshot.flags):
+                if flags & AGENT_IT:
+                    center = (x, y)
+                    break
+            x0, y0, x1, y1 = viewport(snapshot.width, snapshot.height, *center, columns, rows)
+
+            # Clear the screen
+            screen.fill(WHITE)
+
+            # Draw the grid of the visible cells
+            for x in range(x1 - x0):
+                for y in range(y1 - y0):
+                    rect = pygame.Rect(x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size)
+                    pygame.draw.rect(screen, BLACK, rect, 1)
+
+            # Draw the agents in view
+            for node_id, x, y, flags in zip(snapshot.node_ids, snapshot.xs, snapshot.ys, snapshot.flags):
+                if flags & AGENT_LOST or not (x0 <= x < x1 and y0 <= y < y1):
+                    continue
+
+                rect = pygame.Rect((x - x0) * self.cell_size, (y - y0) * self.cell_size, self.cell_size, self.cell_size)
+
+                if flags & AGENT_IT:
+                    # It agent = RED
+                    pygame.draw.rect(screen, RED, rect)
+                elif flags & AGENT_FROZEN:
+                    # Frozen NotIt agent = GRAY
+                    pygame.draw.rect(screen, GRAY, rect)
+                else:
+                    # NotIt (active) agent = BLUE
+                    pygame.draw.rect(screen, BLUE, rect)
+                pygame.draw.rect(screen, BLACK, rect, 2) # Border
+
+                # Draw the node ID
+                text = font.render(str(node_id), True, WHITE)
+                text_rect = text.get_rect(center=rect.center)
+                screen.blit(text, text_rect)
+
+            # Show where the view is when it does not cover the whole board
+            title = caption
+            if (x1 - x0, y1 - y0) != (snapshot.width, snapshot.height):
+                title = f"{title} - cells ({x0}, {y0}) to ({x1 - 1}, {y1 - 1}) of {snapshot.width}x{snapshot.height}"
+            if snapshot.game_over:
+                title = f"{title} - Game Over"
+            pygame.display.set_caption(title)
+
+            # Update the display
+            pygame.display.flip()
+            clock.tick(self.fps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch a running Distributed Freeze Tag game')
+    parser.add_argument('--game-id', default=None, help='Game to show when the GameNode hosts several games')
+    parser.add_argument('--cell-size', type=int, default=20, help='Size of each cell in pixels')
+    parser.add_argument('--fps', type=int, default=20, help='Max frames per second')
+    parser.add_argument('--view-columns', type=int, default=60, help='Max board columns shown; larger boards follow the It')
+    parser.add_argument('--view-rows', type=int, default=40, help='Max board rows shown; larger boards follow the It')
+    args = parser.parse_args()
+
+    viewer = Viewer(args.game_id, args.cell_size, args.fps, args.view_columns, args.view_rows)
+    try:
+        viewer.launch_node()
+    except KeyboardInterrupt:
+        viewer.stop()
+        logs.shutdown()
+
+
+if __name__ == "__main__":
+    main()